@@ -0,0 +1,23 @@
+# ✅ RESPONSABILITIES OF HANDLER : 
+# 1. Turn the readiness report into the status code load balancers act on
+# 2. MUST NOT contain business logic
+
+from fastapi import status
+from fastapi.responses import JSONResponse
+from app.services.health_service import get_health_service
+
+async def liveness_handler():
+  # Only proves the process and its event loop answer. A slow database must not get the worker restarted
+  return {"status": "alive"}
+
+async def readiness_handler():
+  try:
+    report = await get_health_service().readiness()
+  except Exception as e:
+    # Whatever broke, this worker should not receive traffic
+    return JSONResponse({"status": "not_ready", "failing": ["unexpected_error"]}, status_code=status.HTTP_503_SERVICE_UNAVAILABLE)
+
+  return JSONResponse(
+    {"status": "ready" if report["ready"] else "not_ready", "failing": report["failing"], "checks": report["checks"]},
+    status_code=status.HTTP_200_OK if report["ready"] else status.HTTP_503_SERVICE_UNAVAILABLE,
+  )
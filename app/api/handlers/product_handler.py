@@ -5,24 +5,97 @@
 # 4. Handle errors HTTP 
 # 5. MUST NOT contain business logic
 
-from fastapi import HTTPException, Response, status
-from fastapi.responses import JSONResponse
-from app.core.db import AsyncSessionDependency
+import hashlib
+import json
+from typing import AsyncGenerator, Awaitable, Callable, Optional
+from fastapi import HTTPException, Request, Response, status
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse, StreamingResponse
+from app.core.broker import Subscription, product_broker
+from app.core.cache import product_cache
+from app.core.config import settings
+from app.core.db import AsyncSessionDependency, release_session
+from app.core.idempotency import StoredResponse, idempotency_store
+from app.helpers.change_cursor import parse_change_cursor, format_change_cursor
+from app.helpers.client_identity import client_identity
+from app.helpers.binary_formats import JSON, MSGPACK, negotiate_media_type, encode_msgpack, encode_arrow_stream
+from app.helpers.etag import format_etag, parse_if_match
+from app.helpers.json_rows import trusted_dump
+from app.helpers.query_params import parse_id_list, parse_field_list
 from app.services.product_service import ProductService
-from app.schemas.product import ProductCreate, ProductResponse, ProductUpdate
-from app.errors.product_errors import ProductNotFoundError, DuplicateProductNameError, NoFieldsToUpdateError
+from app.services.sharded_product_service import get_product_service
+from app.schemas.product import ProductCreate, ProductResponse, ProductUpdate, ProductChangeResponse, ProductBatchRequest, partial_product_response
+from app.errors.product_errors import ProductNotFoundError, DuplicateProductNameError, NoFieldsToUpdateError, ProductVersionConflictError, ChangeCursorExpiredError
+from app.errors.broker_errors import TooManySubscribersError
+from app.errors.idempotency_errors import IdempotencyKeyReusedError
+from app.errors.format_errors import NotAcceptableError
+
+def trusted_json_response(content, status_code: int = status.HTTP_200_OK, headers: Optional[dict] = None) -> JSONResponse:
+  # For content already made of ProductResponse dumps (trusted_dump): returning a JSONResponse
+  # skips FastAPI validating it again against the route's response_model
+  return JSONResponse(content, status_code=status_code, headers=headers)
+
+async def run_idempotent(
+  scope: str,
+  request: Request,
+  idempotency_key: str,
+  payload: dict,
+  success_status: int,
+  operation: Callable[[], Awaitable[dict]],
+  response: Optional[Response] = None
+):
+  if len(idempotency_key) > settings.IDEMPOTENCY_KEY_MAX_LENGTH:
+    raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Idempotency-Key is too long")
+
+  async def produce():
+    try:
+      content = await operation()
+    except HTTPException as e:
+      # Client errors are final, so they are replayed too. Server errors are not stored
+      if e.status_code >= status.HTTP_500_INTERNAL_SERVER_ERROR:
+        raise
+      return StoredResponse(e.status_code, {"detail": e.detail}, dict(e.headers or {}))
+
+    headers = {}
+    if response is not None and "etag" in response.headers:
+      headers["ETag"] = response.headers["etag"]
+    return StoredResponse(success_status, jsonable_encoder(content), headers)
+
+  # The same key sent with a different body is a client bug, not a retry
+  fingerprint = hashlib.sha256(json.dumps(jsonable_encoder(payload), sort_keys=True).encode()).hexdigest()
+  # Keys are only unique per client, two clients picking the same key must not see each other's responses
+  client = client_identity(request.scope, settings.TRUSTED_PROXIES)
+  try:
+    stored, replayed = await idempotency_store.run(f"{scope}:{client}:{idempotency_key}", fingerprint, produce)
+  except IdempotencyKeyReusedError as e:
+    raise HTTPException(status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, detail=str(e))
+
+  headers = dict(stored.headers)
+  if replayed:
+    headers["Idempotent-Replayed"] = "true"
+  return JSONResponse(content=stored.content, status_code=stored.status_code, headers=headers)
+
+async def create_product(product_data: ProductCreate, session: AsyncSessionDependency, request: Request, idempotency_key: Optional[str] = None):
+  if idempotency_key and settings.IDEMPOTENCY_ENABLED:
+    return await run_idempotent(
+      "POST /products",
+      request,
+      idempotency_key,
+      product_data.model_dump(),
+      status.HTTP_201_CREATED,
+      lambda: create_product(product_data, session, request)
+    )
 
-async def create_product(product_data: ProductCreate, session: AsyncSessionDependency):
   try: 
     # Create the service
-    service = ProductService(session)
+    service = get_product_service(session)
     # Call business logic 
     product = await service.create_product(product_data)
     
     # Format HTTP response 
     return {
       "message": "Product created successfully",
-      "data": ProductResponse.model_validate(product).model_dump(),
+      "data": trusted_dump(product, ProductResponse),
       "status": "success"
     }
 
@@ -30,34 +103,268 @@ async def create_product(product_data: ProductCreate, session: AsyncSessionDepen
     raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
   except Exception as e:
     raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Unexpected error ocurred")
+  finally:
+    # Give the connection back now, not when the dependency is torn down after the response is sent
+    await release_session(session)
   
-async def get_products_handler(session: AsyncSessionDependency):
+def parse_product_fields(fields: Optional[str]) -> Optional[list[str]]:
+  if fields is None:
+    return None
+  try:
+    return parse_field_list(fields, ProductResponse.model_fields)
+  except ValueError as e:
+    raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+
+async def get_products_handler(session: AsyncSessionDependency, fields: Optional[str] = None, accept: Optional[str] = None):
+  selected_fields = parse_product_fields(fields)
+
+  try:
+    media_type = negotiate_media_type(accept)
+  except NotAcceptableError as e:
+    raise HTTPException(status_code=status.HTTP_406_NOT_ACCEPTABLE, detail=str(e))
+
   try:
-    service = ProductService(session)
-    products = await service.get_all_products()
+    service = get_product_service(session)
+    if media_type != JSON:
+      return await get_products_binary(service, selected_fields, media_type)
+
+    if not selected_fields and settings.READ_FAST_PATH_ENABLED:
+      # Already serialized rows, skip the route's response model entirely
+      return Response(await service.get_all_products_json(), media_type="application/json")
+
+    products = await service.get_all_products(selected_fields)
+
+    if selected_fields:
+      # Bypass the route's full response model, only the requested fields are serialized
+      partial_response = partial_product_response(tuple(selected_fields))
+      return JSONResponse([partial_response.model_validate(row).model_dump(mode="json") for row in products])
     return products
   
   except Exception as e:
     raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Unexpected error ocurred")
+  finally:
+    await release_session(session)
   
-async def get_product_by_id_handler(product_id: int, session: AsyncSessionDependency):
-  try: 
-    service = ProductService(session)
-    product = await service.get_product_by_id(product_id)
+async def get_products_binary(service, selected_fields: Optional[list[str]], media_type: str):
+  if selected_fields:
+    rows = [row._asdict() for row in await service.get_all_products(selected_fields)]
+  else:
+    rows = await service.get_all_product_rows()
+  columns = selected_fields or list(ProductResponse.model_fields)
+
+  if media_type == MSGPACK:
+    content = encode_msgpack([{column: row[column] for column in columns} for row in rows])
+  else:
+    content = encode_arrow_stream(rows, ProductResponse, columns)
+  return Response(content, media_type=media_type)
 
-    return product
+async def get_product_stats_handler(session: AsyncSessionDependency):
+  try:
+    service = get_product_service(session)
+    return await service.get_stats()
+
+  except Exception as e:
+    raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Unexpected error ocurred")
+  finally:
+    await release_session(session)
+
+async def get_product_changes_handler(since: str, limit: int, wait: float, session: AsyncSessionDependency):
+  service = get_product_service(session)
+  try:
+    cursor = parse_change_cursor(since, service.shard_count)
+  except ValueError as e:
+    raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+
+  try:
+    page = await service.wait_for_change_page(cursor, limit, wait)
+    for shard, change in page:
+      cursor[shard] = change.seq
+
+    return {
+      "changes": [change for _, change in page],
+      "last_seq": format_change_cursor(cursor)
+    }
+
+  except ChangeCursorExpiredError as e:
+    raise HTTPException(status_code=status.HTTP_410_GONE, detail=str(e))
+  except Exception as e:
+    raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Unexpected error ocurred")
+  finally:
+    await release_session(session)
+
+async def stream_product_changes_handler(ids: Optional[str], last_event_id: Optional[str], session: AsyncSessionDependency):
+  service = get_product_service(session)
+  try:
+    product_ids = parse_id_list(ids) if ids else None
+    cursor = parse_change_cursor(last_event_id, service.shard_count)
+  except ValueError as e:
+    raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+
+  try:
+    # Subscribe before reading the backlog so no change falls in between
+    subscription = product_broker.subscribe(product_ids)
+  except TooManySubscribersError as e:
+    raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail=str(e))
+
+  try:
+    backlog = []
+    # Resume a dropped stream from the outbox
+    if last_event_id is not None:
+      position = list(cursor)
+      while True:
+        page = await service.get_change_page(position, settings.CHANGES_PAGE_SIZE, product_ids)
+        for shard, change in page:
+          position[shard] = change.seq
+          backlog.append((shard, ProductChangeResponse.model_validate(change).model_dump(mode="json")))
+        # A short page is the end of the outbox, anything newer arrives as a live event
+        if len(page) < settings.CHANGES_PAGE_SIZE:
+          break
+    elif service.shard_count > 1:
+      # Event ids carry every shard's position, a new stream starts from where each shard is now
+      cursor = await service.get_change_cursor()
+  except ChangeCursorExpiredError as e:
+    product_broker.unsubscribe(subscription)
+    raise HTTPException(status_code=status.HTTP_410_GONE, detail=str(e))
+  except Exception as e:
+    product_broker.unsubscribe(subscription)
+    raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Unexpected error ocurred")
+  finally:
+    # The stream itself never touches the database, don't hold a connection while it is open
+    await release_session(session)
+
+  return StreamingResponse(
+    product_change_events(subscription, backlog, cursor),
+    media_type="text/event-stream",
+    headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+  )
+
+async def product_change_events(subscription: Subscription, backlog: list[tuple[int, dict]], cursor: list[int]) -> AsyncGenerator[str, None]:
+  try:
+    for shard, event in backlog:
+      cursor[shard] = event["seq"]
+      yield format_sse_event(event, cursor)
+
+    while True:
+      event = await subscription.get(settings.STREAM_HEARTBEAT_SECONDS)
+      if subscription.evicted:
+        return
+      if event is None:
+        # Comment line keeps idle connections open through proxies
+        yield ": keep-alive\n\n"
+        continue
+      # Already sent as part of the backlog
+      shard = event.get("shard", 0)
+      if event["seq"] <= cursor[shard]:
+        continue
+      cursor[shard] = event["seq"]
+      yield format_sse_event(event, cursor)
+  finally:
+    product_broker.unsubscribe(subscription)
+
+def format_sse_event(event: dict, cursor: list[int]) -> str:
+  # The id is the whole cursor, a reconnecting client sends it back as Last-Event-ID
+  return f"id: {format_change_cursor(cursor)}\nevent: {event['operation']}\ndata: {json.dumps(event)}\n\n"
+
+async def get_products_batch_handler(ids: str, session: AsyncSessionDependency):
+  try:
+    product_ids = parse_id_list(ids)
+  except ValueError as e:
+    raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+
+  return await fetch_products_batch(product_ids, session)
+
+async def post_products_batch_handler(batch: ProductBatchRequest, session: AsyncSessionDependency):
+  return await fetch_products_batch(list(dict.fromkeys(batch.ids)), session)
+
+async def fetch_products_batch(product_ids: list[int], session: AsyncSessionDependency):
+  if len(product_ids) > settings.BATCH_MAX_IDS:
+    raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=f"At most {settings.BATCH_MAX_IDS} ids can be requested at once")
+
+  try:
+    # Serve what we can from the cache, then fetch the rest in a single query
+    found = product_cache.get_many(product_ids)
+    uncached_ids = [product_id for product_id in product_ids if product_id not in found]
+
+    if uncached_ids:
+      generation = product_cache.generation
+      service = get_product_service(session)
+      for product in await service.get_products_by_ids(uncached_ids):
+        data = trusted_dump(product, ProductResponse)
+        product_cache.set(product.id, data, generation)
+        found[product.id] = data
+
+    return trusted_json_response({
+      "data": [found[product_id] for product_id in product_ids if product_id in found],
+      "missing": [product_id for product_id in product_ids if product_id not in found]
+    })
+
+  except Exception as e:
+    raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Unexpected error ocurred")
+  finally:
+    await release_session(session)
+
+async def get_product_by_id_handler(product_id: int, session: AsyncSessionDependency, fields: Optional[str] = None):
+  selected_fields = parse_product_fields(fields)
+  if selected_fields:
+    return await get_product_fields_by_id(product_id, selected_fields, session)
+
+  try: 
+    # Always read from the database, the ETag must be the current version for If-Match
+    service = get_product_service(session)
+    data = trusted_dump(await service.get_product_by_id(product_id), ProductResponse)
+    return trusted_json_response(data, headers={"ETag": format_etag(data["version"])})
   
   except ProductNotFoundError as e:
     raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=str(e))
   except Exception as e:
     raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Unexpected error ocurred")
+  finally:
+    await release_session(session)
     
-async def update_product_handler(product_id: int, product_data: ProductUpdate, session: AsyncSessionDependency):
+async def get_product_fields_by_id(product_id: int, selected_fields: list[str], session: AsyncSessionDependency):
+  try:
+    # The version is always selected for the ETag, even when it is not part of the fieldset
+    service = get_product_service(session)
+    data = await service.get_product_by_id(product_id, list(dict.fromkeys(selected_fields + ["version"])))
+
+    partial_response = partial_product_response(tuple(selected_fields))
+    content = partial_response.model_validate(data).model_dump(mode="json")
+    return JSONResponse(content, headers={"ETag": format_etag(data.version)})
+
+  except ProductNotFoundError as e:
+    raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=str(e))
+  except Exception as e:
+    raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Unexpected error ocurred")
+  finally:
+    await release_session(session)
+
+async def update_product_handler(product_id: int, product_data: ProductUpdate, if_match: Optional[str], session: AsyncSessionDependency, request: Request, response: Response, idempotency_key: Optional[str] = None):
+  if idempotency_key and settings.IDEMPOTENCY_ENABLED:
+    return await run_idempotent(
+      f"PATCH /products/{product_id}",
+      request,
+      idempotency_key,
+      {"if_match": if_match, **product_data.model_dump()},
+      status.HTTP_201_CREATED,
+      lambda: apply_product_update(product_id, product_data, if_match, session, response),
+      response
+    )
+
+  data = await apply_product_update(product_id, product_data, if_match, session, response)
+  return trusted_json_response(data, status_code=status.HTTP_201_CREATED, headers={"ETag": format_etag(data["version"])})
+
+async def apply_product_update(product_id: int, product_data: ProductUpdate, if_match: Optional[str], session: AsyncSessionDependency, response: Response):
+  try:
+    expected_version = parse_if_match(if_match)
+  except ValueError as e:
+    raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+
   try: 
-    service = ProductService(session)
-    product = await service.update_product(product_id, product_data)
+    service = get_product_service(session)
+    product = await service.update_product(product_id, product_data, expected_version)
 
-    return ProductResponse.model_validate(product).model_dump(exclude_unset=True)
+    response.headers["ETag"] = format_etag(product.version)
+    return trusted_dump(product, ProductResponse)
   
   except ProductNotFoundError as e:
     raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=str(e))
@@ -65,12 +372,16 @@ async def update_product_handler(product_id: int, product_data: ProductUpdate, s
     raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
   except NoFieldsToUpdateError as e:
     raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+  except ProductVersionConflictError as e:
+    raise HTTPException(status_code=status.HTTP_412_PRECONDITION_FAILED, detail=str(e))
   except Exception as e:
     raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Unexpected error ocurred")
+  finally:
+    await release_session(session)
   
 async def delete_product_handler(product_id: int, session: AsyncSessionDependency):
   try: 
-    service = ProductService(session)
+    service = get_product_service(session)
     await service.delete_product(product_id)
   
     return JSONResponse(
@@ -85,5 +396,7 @@ async def delete_product_handler(product_id: int, session: AsyncSessionDependenc
     raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=str(e))
   except Exception as e:
     raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Unexpected error ocurred")
+  finally:
+    await release_session(session)
   
   
\ No newline at end of file
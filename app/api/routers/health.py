@@ -0,0 +1,18 @@
+# ✅ RESPONSABILITIES OF ROUTER : 
+# 1. Define the liveness and readiness probes for the load balancer / orchestrator
+# 2. Only define routes (endpoints) 
+
+from fastapi import APIRouter, status
+from app.api.handlers.health_handler import liveness_handler, readiness_handler
+
+router = APIRouter()
+
+# Restart the worker when this fails
+@router.get("/live", status_code=status.HTTP_200_OK)
+async def liveness():
+  return await liveness_handler()
+
+# Stop routing traffic to the worker while this returns 503
+@router.get("/ready", status_code=status.HTTP_200_OK, responses={503: {"description": "Database unreachable, pool saturated, event loop lagging or shutting down"}})
+async def readiness():
+  return await readiness_handler()
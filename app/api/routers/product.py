@@ -8,28 +8,85 @@
 # 7. Only define routes (endpoints) 
 # 8. Here is where we define the routes for the product router
 
-from fastapi import APIRouter, status
-from app.api.handlers.product_handler import create_product, get_products_handler, get_product_by_id_handler, update_product_handler, delete_product_handler
+from typing import Optional
+from fastapi import APIRouter, Header, Query, Request, Response, status
+from app.api.handlers.product_handler import create_product, get_products_handler, get_product_stats_handler, get_product_changes_handler, stream_product_changes_handler, get_products_batch_handler, post_products_batch_handler, get_product_by_id_handler, update_product_handler, delete_product_handler
+from app.core.config import settings
 from app.core.db import AsyncSessionDependency
-from app.schemas.product import ProductCreate, ProductResponse, ProductUpdate
+from app.schemas.product import ProductCreate, ProductResponse, ProductUpdate, ProductChangesResponse, ProductBatchRequest, ProductBatchResponse, ProductStatsResponse
 
 router = APIRouter()
 
 @router.post("/", status_code=status.HTTP_201_CREATED)
-async def create_product_route(product_data: ProductCreate, session: AsyncSessionDependency):
-  return await create_product(product_data, session)
+async def create_product_route(
+  product_data: ProductCreate,
+  session: AsyncSessionDependency,
+  request: Request,
+  idempotency_key: Optional[str] = Header(default=None, alias="Idempotency-Key", description="Retries with the same key replay the first response"),
+):
+  return await create_product(product_data, session, request, idempotency_key)
 
 @router.get("/", response_model=list[ProductResponse], status_code=status.HTTP_200_OK)
-async def get_products(session: AsyncSessionDependency):
-  return await get_products_handler(session) 
+async def get_products(
+  session: AsyncSessionDependency,
+  fields: Optional[str] = Query(default=None, description="Comma separated fields to return, e.g. id,price,available"),
+  accept: Optional[str] = Header(default=None, description="application/json, application/x-msgpack or application/vnd.apache.arrow.stream"),
+):
+  return await get_products_handler(session, fields, accept)
+
+# Must be declared before "/{product_id}" so "stats", "changes", ... are not parsed as ids
+@router.get("/stats", response_model=ProductStatsResponse, status_code=status.HTTP_200_OK)
+async def get_product_stats(session: AsyncSessionDependency):
+  return await get_product_stats_handler(session)
+
+@router.get("/changes", response_model=ProductChangesResponse, status_code=status.HTTP_200_OK)
+async def get_product_changes(
+  session: AsyncSessionDependency,
+  since: str = Query(default="0", pattern=r"^\d+(\.\d+)*$", description="last_seq of the previous page: a sequence number, or one per shard (\"12.7\") in sharded mode"),
+  limit: int = Query(default=settings.CHANGES_PAGE_SIZE, ge=1, le=1000),
+  wait: float = Query(default=0, ge=0, le=settings.CHANGES_MAX_WAIT_SECONDS, description="Seconds to long-poll when there are no new changes"),
+):
+  return await get_product_changes_handler(since, limit, wait, session)
+
+@router.get("/stream", status_code=status.HTTP_200_OK)
+async def stream_product_changes(
+  session: AsyncSessionDependency,
+  ids: Optional[str] = Query(default=None, description="Comma separated product ids to filter the stream"),
+  last_event_id: Optional[str] = Header(default=None, alias="Last-Event-ID"),
+):
+  return await stream_product_changes_handler(ids, last_event_id, session)
+
+@router.get("/batch", response_model=ProductBatchResponse, status_code=status.HTTP_200_OK)
+async def get_products_batch(
+  session: AsyncSessionDependency,
+  ids: str = Query(description="Comma separated product ids, e.g. 1,2,3"),
+):
+  return await get_products_batch_handler(ids, session)
+
+# Same as GET /batch for id lists too long for a query string
+@router.post("/batch", response_model=ProductBatchResponse, status_code=status.HTTP_200_OK)
+async def post_products_batch(batch: ProductBatchRequest, session: AsyncSessionDependency):
+  return await post_products_batch_handler(batch, session)
 
 @router.get("/{product_id}", response_model=ProductResponse, status_code=status.HTTP_200_OK)
-async def get_product_by_id(product_id: int, session: AsyncSessionDependency):
-  return await get_product_by_id_handler(product_id, session)
+async def get_product_by_id(
+  product_id: int,
+  session: AsyncSessionDependency,
+  fields: Optional[str] = Query(default=None, description="Comma separated fields to return, e.g. id,price,available"),
+):
+  return await get_product_by_id_handler(product_id, session, fields)
 
 @router.patch("/{product_id}", response_model=ProductResponse, status_code=status.HTTP_201_CREATED)
-async def update_product(product_id: int, product: ProductUpdate, session: AsyncSessionDependency):
-  return await update_product_handler(product_id, product, session)
+async def update_product(
+  product_id: int,
+  product: ProductUpdate,
+  session: AsyncSessionDependency,
+  request: Request,
+  response: Response,
+  if_match: Optional[str] = Header(default=None, description="ETag of the version being updated, 412 if it is stale"),
+  idempotency_key: Optional[str] = Header(default=None, alias="Idempotency-Key", description="Retries with the same key replay the first response"),
+):
+  return await update_product_handler(product_id, product, if_match, session, request, response, idempotency_key)
 
 @router.delete("/{product_id}", status_code=status.HTTP_204_NO_CONTENT)
 async def delete_product(product_id: int, session: AsyncSessionDependency): 
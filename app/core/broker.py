@@ -0,0 +1,92 @@
+# In-process async pub/sub broker for product change events
+import asyncio
+from typing import Iterable, Optional
+from app.core.config import settings
+from app.errors.broker_errors import TooManySubscribersError
+
+class Subscription:
+  # Slots keep each idle subscriber down to a queue and a few references
+  __slots__ = ("product_ids", "queue", "evicted")
+
+  def __init__(self, product_ids: Optional[frozenset], buffer_size: int):
+    self.product_ids = product_ids
+    self.queue: asyncio.Queue = asyncio.Queue(maxsize=buffer_size)
+    self.evicted = False
+
+  async def get(self, timeout: float) -> Optional[dict]:
+    # Returns the next event, or None when the timeout expires or the subscriber was evicted
+    try:
+      return await asyncio.wait_for(self.queue.get(), timeout)
+    except asyncio.TimeoutError:
+      return None
+
+class ProductChangeBroker:
+  def __init__(self, buffer_size: int, max_subscribers: int):
+    self.buffer_size = buffer_size
+    self.max_subscribers = max_subscribers
+    # Subscribers without a filter receive every event
+    self._wildcard: set[Subscription] = set()
+    # Filtered subscribers indexed by product id, so publish only touches interested ones
+    self._by_product: dict[int, set[Subscription]] = {}
+    self._count = 0
+
+  @property
+  def subscriber_count(self) -> int:
+    return self._count
+
+  def subscribe(self, product_ids: Optional[Iterable[int]] = None) -> Subscription:
+    if self._count >= self.max_subscribers:
+      raise TooManySubscribersError("Too many open change streams, try again later")
+
+    subscription = Subscription(frozenset(product_ids) if product_ids else None, self.buffer_size)
+    if subscription.product_ids is None:
+      self._wildcard.add(subscription)
+    else:
+      for product_id in subscription.product_ids:
+        self._by_product.setdefault(product_id, set()).add(subscription)
+    self._count += 1
+
+    return subscription
+
+  def unsubscribe(self, subscription: Subscription):
+    if subscription.product_ids is None:
+      if subscription not in self._wildcard:
+        return
+      self._wildcard.discard(subscription)
+    else:
+      removed = False
+      for product_id in subscription.product_ids:
+        subscribers = self._by_product.get(product_id)
+        if subscribers and subscription in subscribers:
+          subscribers.discard(subscription)
+          removed = True
+          if not subscribers:
+            del self._by_product[product_id]
+      if not removed:
+        return
+    self._count -= 1
+
+  def publish(self, event: dict):
+    # Never blocks the writer: a subscriber whose buffer is full is evicted instead
+    targets = list(self._wildcard)
+    targets.extend(self._by_product.get(event["product_id"], ()))
+    for subscription in targets:
+      try:
+        subscription.queue.put_nowait(event)
+      except asyncio.QueueFull:
+        self._evict(subscription)
+
+  def close(self):
+    # Wake every subscriber up so open streams finish
+    for subscription in self._wildcard.union(*self._by_product.values()):
+      self._evict(subscription)
+
+  def _evict(self, subscription: Subscription):
+    self.unsubscribe(subscription)
+    subscription.evicted = True
+    # Drop the backlog and leave a sentinel so the consumer stops right away
+    while not subscription.queue.empty():
+      subscription.queue.get_nowait()
+    subscription.queue.put_nowait(None)
+
+product_broker = ProductChangeBroker(settings.STREAM_BUFFER_SIZE, settings.STREAM_MAX_SUBSCRIBERS)
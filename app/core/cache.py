@@ -0,0 +1,68 @@
+# In-process read-through cache of serialized products, keyed by id, used by the batch lookup
+import time
+from collections import OrderedDict
+from typing import Iterable, Optional
+from app.core.config import settings
+
+class ProductCache:
+  def __init__(self, max_entries: int, ttl_seconds: float, enabled: bool = True):
+    self.max_entries = max_entries
+    self.ttl_seconds = ttl_seconds
+    self.enabled = enabled
+    # product id -> (expires_at, ProductResponse as JSON compatible dict)
+    self._entries: OrderedDict[int, tuple[float, dict]] = OrderedDict()
+    self.hits = 0
+    self.misses = 0
+    # Bumped by every invalidation, a fill that started before one may carry the old row
+    self.generation = 0
+
+  def __len__(self):
+    return len(self._entries)
+
+  def get(self, product_id: int) -> Optional[dict]:
+    if not self.enabled:
+      return None
+
+    entry = self._entries.get(product_id)
+    if entry is None or entry[0] <= time.monotonic():
+      if entry is not None:
+        del self._entries[product_id]
+      self.misses += 1
+      return None
+
+    self._entries.move_to_end(product_id)
+    self.hits += 1
+    return entry[1]
+
+  def get_many(self, product_ids: Iterable[int]) -> dict[int, dict]:
+    found = {}
+    for product_id in product_ids:
+      data = self.get(product_id)
+      if data is not None:
+        found[product_id] = data
+    return found
+
+  def set(self, product_id: int, data: dict, generation: Optional[int] = None):
+    if not self.enabled:
+      return
+    # Read before a write committed, storing it would outlive the invalidation
+    if generation is not None and generation != self.generation:
+      return
+    entry = self._entries.get(product_id)
+    if entry is not None and entry[1]["version"] > data["version"]:
+      return
+    self._entries[product_id] = (time.monotonic() + self.ttl_seconds, data)
+    self._entries.move_to_end(product_id)
+    while len(self._entries) > self.max_entries:
+      self._entries.popitem(last=False)
+
+  def invalidate(self, product_id: int):
+    self.generation += 1
+    self._entries.pop(product_id, None)
+
+  def clear(self):
+    self._entries.clear()
+    self.hits = 0
+    self.misses = 0
+
+product_cache = ProductCache(settings.PRODUCT_CACHE_MAX_ENTRIES, settings.PRODUCT_CACHE_TTL_SECONDS, settings.PRODUCT_CACHE_ENABLED)
@@ -1,6 +1,7 @@
 # Database config
 from pydantic_settings import BaseSettings
 from pydantic import ConfigDict
+from typing import Optional
 
 class Settings(BaseSettings):
     POSTGRES_SERVER: str
@@ -9,6 +10,147 @@ class Settings(BaseSettings):
     POSTGRES_PASSWORD: str 
     POSTGRES_DB: str
 
+    # Connection pool
+    DB_POOL_SIZE: int = 5
+    DB_MAX_OVERFLOW: int = 10
+    DB_POOL_TIMEOUT: float = 30.0
+    # Upper bound for any single asyncpg command, request deadlines are usually shorter
+    DB_COMMAND_TIMEOUT_SECONDS: float = 30.0
+    # Connection budget of the whole instance, split evenly between the workers' pools.
+    # Unset: every worker gets DB_POOL_SIZE + DB_MAX_OVERFLOW
+    DB_MAX_CONNECTIONS: Optional[int] = None
+
+    # Workers (python -m app.server): one per core unless set, exported to the workers by the supervisor
+    WEB_CONCURRENCY: Optional[int] = None
+    # How long a stopping worker waits for in-flight requests before closing them
+    WORKER_GRACEFUL_TIMEOUT_SECONDS: float = 30.0
+    # Lifespan shutdown: how long in-flight requests may still run before the pools are closed
+    SHUTDOWN_DRAIN_TIMEOUT_SECONDS: float = 25.0
+
+    # Statement caches: compiled SQL per engine (SQLAlchemy) and prepared statements per connection (asyncpg).
+    # Both only need to hold the app's distinct statements, which is a few dozen
+    DB_QUERY_CACHE_SIZE: int = 500
+    DB_PREPARED_STATEMENT_CACHE_SIZE: int = 256
+
+    # Sharding: more than one URI routes products by id across these databases
+    SHARD_DATABASE_URIS: list[str] = []
+
+    # Startup: schema is managed by migrations, create_all is opt-in for local development
+    DB_CREATE_ALL: bool = False
+    STARTUP_PROFILE: bool = False
+
+    # Batch lookup cache (per process, invalidated by local writes, bounded by TTL across workers)
+    PRODUCT_CACHE_ENABLED: bool = True
+    PRODUCT_CACHE_TTL_SECONDS: float = 30.0
+    PRODUCT_CACHE_MAX_ENTRIES: int = 10000
+
+    # Read fast path: list responses are built from Core rows (json_agg on PostgreSQL) without ORM hydration
+    READ_FAST_PATH_ENABLED: bool = True
+
+    # Optimistic concurrency: a PATCH without If-Match that loses a race re-reads the product and retries
+    UPDATE_MAX_ATTEMPTS: int = 3
+
+    # Batch reads
+    BATCH_MAX_IDS: int = 500
+
+    # Change feed (long polling)
+    CHANGES_PAGE_SIZE: int = 100
+    CHANGES_MAX_WAIT_SECONDS: float = 30.0
+    CHANGES_POLL_INTERVAL_SECONDS: float = 0.5
+    # The compaction loop prunes older changes, a cursor from before the last pruned one gets a 410.
+    # since=0 reads from the oldest change still kept
+    CHANGES_RETENTION_SECONDS: float = 7 * 24 * 3600.0
+
+    # Change stream (SSE)
+    STREAM_BUFFER_SIZE: int = 100
+    STREAM_MAX_SUBSCRIBERS: int = 10000
+    STREAM_HEARTBEAT_SECONDS: float = 15.0
+    # Every worker tails the outbox to feed its own streams and invalidate its own cache, so writes made
+    # by the other workers reach them too. Always on with PostgreSQL, where only the outbox delivers
+    # changes in seq order. Unset: on as soon as WEB_CONCURRENCY > 1, a single worker on another
+    # database publishes its own writes right after commit
+    CHANGE_FANOUT_FROM_OUTBOX: Optional[bool] = None
+
+    # Soft delete compaction
+    COMPACTION_ENABLED: bool = True
+    COMPACTION_INTERVAL_SECONDS: float = 300.0
+    COMPACTION_RETENTION_SECONDS: float = 3600.0
+    COMPACTION_BATCH_SIZE: int = 500
+    COMPACTION_MAX_BATCHES: int = 100
+    COMPACTION_BATCH_PAUSE_SECONDS: float = 0.1
+
+    # Client identity (idempotency keys, rate limits): the peer address, or X-Forwarded-For when the peer is one of these
+    TRUSTED_PROXIES: list[str] = []
+
+    # Idempotency-Key result store, kept in process memory: python -m app.server refuses several workers while it is
+    # enabled. Disabled, the header is ignored and every request is executed
+    IDEMPOTENCY_ENABLED: bool = True
+    IDEMPOTENCY_MAX_KEYS: int = 10000
+    IDEMPOTENCY_TTL_SECONDS: float = 86400.0
+    IDEMPOTENCY_KEY_MAX_LENGTH: int = 255
+
+    # Rate limiting (token bucket per client and route), buckets are per process like the idempotency store
+    RATE_LIMIT_ENABLED: bool = True
+    RATE_LIMIT_PER_SECOND: float = 50.0
+    RATE_LIMIT_BURST: int = 100
+    # "METHOD /path" -> (rate per second, burst), ids in paths are written as {id}
+    RATE_LIMIT_ROUTES: dict[str, tuple[float, int]] = {"GET /api/v1/products/": (20.0, 40)}
+    RATE_LIMIT_MAX_BUCKETS: int = 100000
+    RATE_LIMIT_EXEMPT_PATHS: list[str] = ["/", "/health/live", "/health/ready"]
+
+    # Admission control, defaults to the number of connections the pool can hand out
+    ADMISSION_CONTROL_ENABLED: bool = True
+    ADMISSION_MAX_CONCURRENCY: Optional[int] = None
+    # Streams don't hold a DB connection once they are open, probes must answer even when the worker is saturated
+    ADMISSION_EXEMPT_PATHS: list[str] = ["/", "/api/v1/products/stream", "/health/live", "/health/ready"]
+
+    # Health probes: /health/live and /health/ready
+    HEALTH_DB_PING_TTL_SECONDS: float = 2.0
+    HEALTH_DB_PING_TIMEOUT_SECONDS: float = 1.0
+    HEALTH_LOOP_LAG_INTERVAL_SECONDS: float = 0.5
+    # Not ready above these, so the load balancer moves traffic away before latency collapses
+    READINESS_MAX_POOL_UTILIZATION: float = 0.9
+    READINESS_MAX_LOOP_LAG_SECONDS: float = 0.2
+
+    # Request deadlines, clients may send X-Request-Timeout (seconds)
+    REQUEST_TIMEOUT_ENABLED: bool = True
+    REQUEST_TIMEOUT_SECONDS: float = 10.0
+    REQUEST_TIMEOUT_MAX_SECONDS: float = 60.0
+    # Long polling waits up to CHANGES_MAX_WAIT_SECONDS
+    REQUEST_TIMEOUT_ROUTES: dict[str, float] = {"GET /api/v1/products/changes": 35.0}
+    REQUEST_TIMEOUT_EXEMPT_PATHS: list[str] = ["/api/v1/products/stream"]
+
+    @property
+    def DB_WORKER_CONNECTIONS(self) -> int:
+        if self.DB_MAX_CONNECTIONS is None:
+            return self.DB_POOL_SIZE + self.DB_MAX_OVERFLOW
+        return max(1, self.DB_MAX_CONNECTIONS // (self.WEB_CONCURRENCY or 1))
+
+    # Pool of one worker: the steady part stays at most DB_POOL_SIZE, the rest of its share is overflow
+    @property
+    def DB_WORKER_POOL_SIZE(self) -> int:
+        return min(self.DB_POOL_SIZE, self.DB_WORKER_CONNECTIONS)
+
+    @property
+    def DB_WORKER_MAX_OVERFLOW(self) -> int:
+        return self.DB_WORKER_CONNECTIONS - self.DB_WORKER_POOL_SIZE
+
+    @property
+    def ADMISSION_CONCURRENCY_LIMIT(self) -> int:
+        return self.ADMISSION_MAX_CONCURRENCY or self.DB_WORKER_CONNECTIONS
+
+    @property
+    def CHANGE_FANOUT_OUTBOX_ENABLED(self) -> bool:
+        if self.CHANGE_FANOUT_FROM_OUTBOX is not None:
+            return self.CHANGE_FANOUT_FROM_OUTBOX
+        return (self.WEB_CONCURRENCY or 1) > 1
+
+    # State kept in each worker's memory that other workers can't see
+    @property
+    def PROCESS_LOCAL_FEATURES(self) -> list[str]:
+        enabled = {"RATE_LIMIT_ENABLED": self.RATE_LIMIT_ENABLED, "IDEMPOTENCY_ENABLED": self.IDEMPOTENCY_ENABLED}
+        return [name for name, on in enabled.items() if on]
+
     # @property
     # def SQLALCHEMY_DATABASE_URI(self) -> str:
     #     return (
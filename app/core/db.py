@@ -1,43 +1,173 @@
 # Database async connection
+import asyncio
+import os
 from sqlmodel import SQLModel
-from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession, async_sessionmaker
+from sqlalchemy import bindparam, event, func, select
+from sqlalchemy.ext.asyncio import create_async_engine, AsyncEngine, AsyncSession, async_sessionmaker
+from sqlalchemy.orm import Session
 from app.core.config import settings  
+from app.core.deadline import statement_timeout_ms
+from app.core.health import event_loop_monitor
+from app.core.pool import ShieldedCheckoutQueuePool
+from app.core.shutdown import begin_shutdown, request_drain
+from app.core.startup import startup_profiler
+from app.core.statement_cache import statement_cache_stats
 from fastapi import Depends
-from contextlib import asynccontextmanager
-from typing import Annotated, AsyncGenerator
+from contextlib import asynccontextmanager, suppress
+from typing import Annotated, AsyncGenerator, Optional
 from colorama import Fore, Style
 
 from app.models import *
+from app.services.compaction_service import run_compaction
 
-# Create async engine
-async_engine = create_async_engine(
-  settings.SQLALCHEMY_ASYNC_DATABASE_URI,
-  echo=True,
-  future=True,
-)
+# Engine and session factory are created on first use, not at import time
+_async_engine: Optional[AsyncEngine] = None
+_session_factory: Optional[async_sessionmaker] = None
 
-# Create async session 
-AsyncSessionLocal = async_sessionmaker(
-  async_engine,
-  class_=AsyncSession,
-  expire_on_commit=False,
-)
+def engine_options() -> dict:
+  # Shared by the default engine and every shard engine (app.core.sharding)
+  return {
+    "echo": True,
+    "future": True,
+    "poolclass": ShieldedCheckoutQueuePool,
+    "pool_size": settings.DB_WORKER_POOL_SIZE,
+    "max_overflow": settings.DB_WORKER_MAX_OVERFLOW,
+    "pool_timeout": settings.DB_POOL_TIMEOUT,
+    "query_cache_size": settings.DB_QUERY_CACHE_SIZE,
+    "connect_args": {
+      "command_timeout": settings.DB_COMMAND_TIMEOUT_SECONDS,
+      "prepared_statement_cache_size": settings.DB_PREPARED_STATEMENT_CACHE_SIZE,
+    },
+  }
+
+def get_engine() -> AsyncEngine:
+  global _async_engine
+  if _async_engine is None:
+    _async_engine = create_async_engine(settings.SQLALCHEMY_ASYNC_DATABASE_URI, **engine_options())
+    statement_cache_stats.track(_async_engine)
+  return _async_engine
+
+def _forget_engine_after_fork():
+  # A forked worker must never reuse the parent's pooled connections (the sockets are shared).
+  # close=False drops them without sending anything on the parent's behalf, the child builds its own engine
+  global _async_engine, _session_factory
+  if _async_engine is not None:
+    _async_engine.sync_engine.dispose(close=False)
+  _async_engine = None
+  _session_factory = None
+
+os.register_at_fork(after_in_child=_forget_engine_after_fork)
+
+class DeadlineAwareSession(Session):
+  pass
+
+# Same SQL on every request, the timeout is a bound parameter: one prepared statement per connection
+# instead of a new SET LOCAL text (and a Parse) for every distinct number of milliseconds
+SET_LOCAL_STATEMENT_TIMEOUT = select(func.set_config("statement_timeout", bindparam("timeout_ms"), True))
+
+@event.listens_for(DeadlineAwareSession, "after_begin")
+def apply_request_deadline(session, transaction, connection):
+  # Let PostgreSQL cancel statements that would outlive the request deadline.
+  # is_local=true only lasts for this transaction, so pooled connections are not affected
+  timeout_ms = statement_timeout_ms()
+  if timeout_ms is not None and connection.dialect.name == "postgresql":
+    connection.execute(SET_LOCAL_STATEMENT_TIMEOUT, {"timeout_ms": str(timeout_ms)})
+
+def get_session_factory() -> async_sessionmaker:
+  global _session_factory
+  if _session_factory is None:
+    _session_factory = async_sessionmaker(
+      get_engine(),
+      class_=AsyncSession,
+      sync_session_class=DeadlineAwareSession,
+      expire_on_commit=False,
+    )
+  return _session_factory
+
+def compaction_session_factories() -> list[async_sessionmaker]:
+  # Imported here, sharding builds on this module
+  from app.core.sharding import get_shard_router
+  router = get_shard_router()
+  return router.session_factories if router is not None else [get_session_factory()]
 
 async def create_db_and_tables():
-  async with async_engine.begin() as connection: 
+  async with get_engine().begin() as connection: 
     await connection.run_sync(SQLModel.metadata.create_all)
     print(Fore.GREEN + "Connected to database and created tables ✅" + Style.RESET_ALL)
 
+async def dispose_engines():
+  # Closes every pooled connection so PostgreSQL is not left with sessions of a dead worker
+  global _async_engine, _session_factory
+  if _async_engine is not None:
+    statement_cache_stats.untrack(_async_engine)
+    await _async_engine.dispose()
+  _async_engine = None
+  _session_factory = None
+
+  # Imported here, sharding builds on this module
+  from app.core.sharding import dispose_shard_router
+  await dispose_shard_router()
+
 @asynccontextmanager
 async def lifespan(app): 
-  await create_db_and_tables()
-  yield
+  # Schema changes go through migrations, create_all is only meant for local development
+  if settings.DB_CREATE_ALL:
+    with startup_profiler.phase("create_all"):
+      await create_db_and_tables()
 
+  # Purge soft deleted products in the background
+  compaction_task = None
+  if settings.COMPACTION_ENABLED:
+    compaction_task = asyncio.create_task(run_compaction(compaction_session_factories))
+
+  # Feed streams and the cache from the outbox in seq order, with several workers it also brings the others' writes
+  # Imported here, services build on this module
+  from app.services.change_fanout_service import run_change_fanout
+  fanout_task = asyncio.create_task(run_change_fanout(get_session_factory))
+
+  # Event loop lag sampling for the readiness probe
+  lag_monitor_task = asyncio.create_task(event_loop_monitor.run())
+
+  startup_profiler.mark("ready")
+  if settings.STARTUP_PROFILE:
+    startup_profiler.print_report()
+
+  try:
+    yield
+  finally:
+    # Already started when the server ran it on its way down (app.server), a second call is harmless
+    begin_shutdown()
+
+    # Background work would hold the drain until the timeout
+    for task in (compaction_task, fanout_task):
+      if task:
+        task.cancel()
+        with suppress(asyncio.CancelledError):
+          await task
+    lag_monitor_task.cancel()
+    with suppress(asyncio.CancelledError):
+      await lag_monitor_task
+    event_loop_monitor.reset()
+
+    if not await request_drain.wait(settings.SHUTDOWN_DRAIN_TIMEOUT_SECONDS):
+      print(Fore.YELLOW + f"Shutdown: {request_drain.in_flight} requests still running after {settings.SHUTDOWN_DRAIN_TIMEOUT_SECONDS}s" + Style.RESET_ALL)
+
+    await dispose_engines()
+    # The same app object can be started again (tests, in-process restarts)
+    request_drain.reset()
+
+# The session only checks out a connection on its first query, so requests served from
+# the cache or rejected by validation never touch the pool
 async def get_async_session() -> AsyncGenerator[AsyncSession, None]: 
-  async with AsyncSessionLocal() as session: 
+  async with get_session_factory()() as session: 
     try: 
       yield session
     finally: 
       await session.close()
 
+async def release_session(session: AsyncSession):
+  # Ends the transaction and returns the connection to the pool. The session stays usable,
+  # the next query (if any) checks out a connection again
+  await session.close()
+
 AsyncSessionDependency = Annotated[AsyncSession, Depends(get_async_session)]
@@ -0,0 +1,20 @@
+# Per-request deadline shared with the database layer
+import time
+from contextvars import ContextVar
+from typing import Optional
+
+# Absolute time.monotonic() value, None outside of a request with a deadline
+request_deadline: ContextVar[Optional[float]] = ContextVar("request_deadline", default=None)
+
+def remaining_time() -> Optional[float]:
+  deadline = request_deadline.get()
+  if deadline is None:
+    return None
+  return max(0.0, deadline - time.monotonic())
+
+def statement_timeout_ms() -> Optional[int]:
+  # PostgreSQL treats 0 as "no timeout", so an expired deadline still sends 1ms
+  remaining = remaining_time()
+  if remaining is None:
+    return None
+  return max(1, int(remaining * 1000))
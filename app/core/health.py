@@ -0,0 +1,75 @@
+# Readiness signals: event loop lag and a cached database ping
+import asyncio
+import time
+import weakref
+from collections import deque
+from typing import Optional
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncEngine
+from app.core.config import settings
+
+class EventLoopLagMonitor:
+  def __init__(self, interval_seconds: float, window: int = 10):
+    self.interval_seconds = interval_seconds
+    # Worst of the last few samples, one stall stays visible to the next probes
+    self.samples: deque[float] = deque(maxlen=window)
+
+  @property
+  def lag(self) -> Optional[float]:
+    # None while the monitor is not running
+    return max(self.samples) if self.samples else None
+
+  async def run(self):
+    # A sleep that wakes up late means every callback waited that long for the loop
+    loop = asyncio.get_running_loop()
+    while True:
+      started = loop.time()
+      await asyncio.sleep(self.interval_seconds)
+      self.samples.append(max(0.0, loop.time() - started - self.interval_seconds))
+
+  def reset(self):
+    self.samples.clear()
+
+class DatabasePing:
+  def __init__(self, ttl_seconds: float, timeout_seconds: float):
+    self.ttl_seconds = ttl_seconds
+    self.timeout_seconds = timeout_seconds
+    # Per engine: (checked_at, result). Probes hit every worker every few seconds, the database only sees one ping per TTL
+    self._results: weakref.WeakKeyDictionary = weakref.WeakKeyDictionary()
+    self._pending: weakref.WeakKeyDictionary = weakref.WeakKeyDictionary()
+
+  async def check(self, engine: AsyncEngine) -> dict:
+    key = engine.sync_engine
+    cached = self._results.get(key)
+    if cached is not None and time.monotonic() - cached[0] < self.ttl_seconds:
+      return cached[1]
+
+    # Concurrent probes share the ping already running
+    pending = self._pending.get(key)
+    if pending is None:
+      pending = asyncio.ensure_future(self._ping(engine))
+      self._pending[key] = pending
+      pending.add_done_callback(lambda _: self._pending.pop(key, None))
+    # A cancelled probe must not cancel the ping the others are waiting for
+    return await asyncio.shield(pending)
+
+  def clear(self):
+    self._results.clear()
+
+  async def _ping(self, engine: AsyncEngine) -> dict:
+    started = time.monotonic()
+    try:
+      # Also times out when the pool is exhausted, which is just as much a reason to take no traffic
+      await asyncio.wait_for(self._select_one(engine), self.timeout_seconds)
+      result = {"ok": True, "latency_ms": round((time.monotonic() - started) * 1000, 2)}
+    except Exception as e:
+      result = {"ok": False, "error": type(e).__name__}
+    self._results[engine.sync_engine] = (time.monotonic(), result)
+    return result
+
+  async def _select_one(self, engine: AsyncEngine):
+    async with engine.connect() as connection:
+      await connection.execute(text("SELECT 1"))
+
+event_loop_monitor = EventLoopLagMonitor(settings.HEALTH_LOOP_LAG_INTERVAL_SECONDS)
+database_ping = DatabasePing(settings.HEALTH_DB_PING_TTL_SECONDS, settings.HEALTH_DB_PING_TIMEOUT_SECONDS)
@@ -0,0 +1,79 @@
+# In-process store of write results keyed by Idempotency-Key
+import asyncio
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Awaitable, Callable
+from app.core.config import settings
+from app.errors.idempotency_errors import IdempotencyKeyReusedError
+
+@dataclass
+class StoredResponse:
+  status_code: int
+  content: object
+  headers: dict = field(default_factory=dict)
+
+@dataclass
+class _Entry:
+  fingerprint: str
+  result: asyncio.Future
+  expires_at: float
+
+class IdempotencyStore:
+  def __init__(self, max_keys: int, ttl_seconds: float):
+    self.max_keys = max_keys
+    self.ttl_seconds = ttl_seconds
+    # Ordered by last use, the oldest entry is evicted first
+    self._entries: OrderedDict[str, _Entry] = OrderedDict()
+
+  def __len__(self):
+    return len(self._entries)
+
+  async def run(self, key: str, fingerprint: str, producer: Callable[[], Awaitable[StoredResponse]]) -> tuple[StoredResponse, bool]:
+    # Returns the response and whether it was replayed from the store
+    entry = self._get(key)
+    if entry is not None:
+      if entry.fingerprint != fingerprint:
+        raise IdempotencyKeyReusedError("Idempotency-Key was already used with a different request")
+      # Either replays a finished request or coalesces with the one still running
+      return await asyncio.shield(entry.result), True
+
+    entry = _Entry(fingerprint, asyncio.get_running_loop().create_future(), time.monotonic() + self.ttl_seconds)
+    self._entries[key] = entry
+    self._evict()
+
+    try:
+      response = await producer()
+    except BaseException as e:
+      # Failed requests are not stored so the client can retry them
+      if self._entries.get(key) is entry:
+        del self._entries[key]
+      if isinstance(e, asyncio.CancelledError):
+        entry.result.cancel()
+      else:
+        entry.result.set_exception(e)
+        # Mark the exception as retrieved when nobody was waiting on it
+        entry.result.exception()
+      raise
+
+    entry.result.set_result(response)
+    return response, False
+
+  def clear(self):
+    self._entries.clear()
+
+  def _get(self, key: str):
+    entry = self._entries.get(key)
+    if entry is None:
+      return None
+    if entry.expires_at <= time.monotonic():
+      del self._entries[key]
+      return None
+    self._entries.move_to_end(key)
+    return entry
+
+  def _evict(self):
+    while len(self._entries) > self.max_keys:
+      self._entries.popitem(last=False)
+
+idempotency_store = IdempotencyStore(settings.IDEMPOTENCY_MAX_KEYS, settings.IDEMPOTENCY_TTL_SECONDS)
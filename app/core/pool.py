@@ -0,0 +1,35 @@
+# Connection pool whose checkout never swallows a cancellation
+import asyncio
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+from sqlalchemy.util.concurrency import await_only
+from sqlalchemy.util.queue import AsyncAdaptedQueue, Empty
+
+class ShieldedCheckoutQueue(AsyncAdaptedQueue):
+  # SQLAlchemy waits for a free connection with asyncio.wait_for, which (before Python 3.12) returns the
+  # connection instead of raising when the request is cancelled right as one is released: the request
+  # then runs past its deadline. The wait runs in its own task behind a shield instead, a cancelled
+  # request stops right away and a connection that shows up afterwards goes back to the queue
+  def get(self, block: bool = True, timeout=None):
+    if not block or timeout is None:
+      return super().get(block, timeout)
+    try:
+      return self.get_nowait()
+    except Empty:
+      return await_only(self._wait_for_connection(timeout))
+
+  async def _wait_for_connection(self, timeout: float):
+    waiter = asyncio.ensure_future(asyncio.wait_for(self._queue.get(), timeout))
+    try:
+      return await asyncio.shield(waiter)
+    except asyncio.TimeoutError as e:
+      raise Empty() from e
+    except asyncio.CancelledError:
+      waiter.add_done_callback(self._give_back)
+      raise
+
+  def _give_back(self, waiter: asyncio.Future):
+    if not waiter.cancelled() and waiter.exception() is None:
+      self._queue.put_nowait(waiter.result())
+
+class ShieldedCheckoutQueuePool(AsyncAdaptedQueuePool):
+  _queue_class = ShieldedCheckoutQueue
@@ -0,0 +1,81 @@
+# Application level sharding of products across several databases
+import os
+import zlib
+from typing import Optional
+from sqlalchemy.ext.asyncio import create_async_engine, AsyncEngine, AsyncSession, async_sessionmaker
+from app.core.config import settings
+from app.core.db import DeadlineAwareSession, engine_options
+from app.core.statement_cache import statement_cache_stats
+
+class ShardRouter:
+  def __init__(self, engines: list[AsyncEngine]):
+    self.engines = engines
+    self.session_factories = [
+      async_sessionmaker(engine, class_=AsyncSession, sync_session_class=DeadlineAwareSession, expire_on_commit=False)
+      for engine in engines
+    ]
+
+  @property
+  def count(self) -> int:
+    return len(self.engines)
+
+  def shard_for_id(self, product_id: int) -> int:
+    # Shard k hands out ids k+1, k+1+N, k+1+2N... so the id alone tells where a product lives
+    return (product_id - 1) % self.count
+
+  def shard_for_name(self, name: str) -> int:
+    # Stable across processes, unlike hash()
+    return zlib.crc32(name.encode()) % self.count
+
+  def session(self, shard: int) -> AsyncSession:
+    return self.session_factories[shard]()
+
+  def next_id_for_shard(self, shard: int, max_id: Optional[int]) -> int:
+    # Smallest id above max_id that belongs to this shard
+    candidate = (max_id or 0) + 1
+    return candidate + (shard - (candidate - 1)) % self.count
+
+  async def configure_id_sequences(self):
+    # PostgreSQL: make each shard's sequence step by N from its own offset, so ids never collide
+    for shard, engine in enumerate(self.engines):
+      if engine.dialect.name != "postgresql":
+        continue
+      async with engine.begin() as connection:
+        result = await connection.exec_driver_sql("SELECT COALESCE(MAX(id), 0) FROM product")
+        start = self.next_id_for_shard(shard, result.scalar())
+        await connection.exec_driver_sql(
+          f"ALTER SEQUENCE product_id_seq INCREMENT BY {self.count} RESTART WITH {start}"
+        )
+
+  async def dispose(self):
+    for engine in self.engines:
+      statement_cache_stats.untrack(engine)
+      await engine.dispose()
+
+_shard_router: Optional[ShardRouter] = None
+
+def get_shard_router() -> Optional[ShardRouter]:
+  # None unless SHARD_DATABASE_URIS lists more than one database
+  global _shard_router
+  if _shard_router is None and len(settings.SHARD_DATABASE_URIS) > 1:
+    # Same pool, timeouts and statement caches as the default engine
+    _shard_router = ShardRouter([create_async_engine(uri, **engine_options()) for uri in settings.SHARD_DATABASE_URIS])
+    for engine in _shard_router.engines:
+      statement_cache_stats.track(engine)
+  return _shard_router
+
+async def dispose_shard_router():
+  global _shard_router
+  if _shard_router is not None:
+    await _shard_router.dispose()
+  _shard_router = None
+
+def _forget_shard_router_after_fork():
+  # Same as the main engine (see app.core.db): a forked worker opens its own shard connections
+  global _shard_router
+  if _shard_router is not None:
+    for engine in _shard_router.engines:
+      engine.sync_engine.dispose(close=False)
+  _shard_router = None
+
+os.register_at_fork(after_in_child=_forget_shard_router_after_fork)
@@ -0,0 +1,46 @@
+# Graceful shutdown: refuse new requests, wait for the in-flight ones, then release resources
+import asyncio
+from typing import Optional
+from app.core.broker import product_broker
+
+class RequestDrain:
+  def __init__(self):
+    self.in_flight = 0
+    self.draining = False
+    # Only created once draining starts, so it belongs to the loop that runs the shutdown
+    self._idle: Optional[asyncio.Event] = None
+
+  def enter(self):
+    self.in_flight += 1
+
+  def exit(self):
+    self.in_flight -= 1
+    if self.in_flight == 0 and self._idle is not None:
+      self._idle.set()
+
+  def start(self):
+    self.draining = True
+
+  async def wait(self, timeout: float) -> bool:
+    # True if every in-flight request finished before the timeout
+    if self.in_flight == 0:
+      return True
+    self._idle = asyncio.Event()
+    try:
+      await asyncio.wait_for(self._idle.wait(), timeout)
+      return True
+    except asyncio.TimeoutError:
+      return False
+
+  def reset(self):
+    # A new lifespan accepts requests again
+    self.draining = False
+    self._idle = None
+
+request_drain = RequestDrain()
+
+def begin_shutdown():
+  # New requests get a 503 from here on, long polls answer and open streams end instead of holding the drain.
+  # Run by the lifespan shutdown, and earlier by app.server as soon as the server stops accepting
+  request_drain.start()
+  product_broker.close()
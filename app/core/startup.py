@@ -0,0 +1,36 @@
+# Startup time profiling
+import time
+from contextlib import contextmanager
+from colorama import Fore, Style
+
+class StartupProfiler:
+  def __init__(self):
+    # This module is imported first by app.main, so this is close to the start of the process
+    self.started_at = time.perf_counter()
+    self.phases: dict[str, float] = {}
+    self.marks: dict[str, float] = {}
+
+  @contextmanager
+  def phase(self, name: str):
+    started = time.perf_counter()
+    try:
+      yield
+    finally:
+      self.phases[name] = time.perf_counter() - started
+
+  def mark(self, name: str):
+    # Seconds since the profiler was created
+    self.marks[name] = time.perf_counter() - self.started_at
+
+  def report(self) -> dict:
+    return {
+      "marks": {name: round(value, 4) for name, value in self.marks.items()},
+      "phases": {name: round(value, 4) for name, value in self.phases.items()},
+    }
+
+  def print_report(self):
+    lines = [f"  {name}: {value * 1000:.1f} ms since start" for name, value in self.marks.items()]
+    lines += [f"  {name}: {value * 1000:.1f} ms" for name, value in self.phases.items()]
+    print(Fore.CYAN + "Startup profile ⏱️\n" + "\n".join(lines) + Style.RESET_ALL)
+
+startup_profiler = StartupProfiler()
@@ -0,0 +1,45 @@
+# Hit rate of SQLAlchemy's compiled statement cache, as seen by every statement the engine runs.
+# A hit also means the SQL string is one asyncpg has already prepared on that connection
+# (as long as DB_PREPARED_STATEMENT_CACHE_SIZE is large enough), so PostgreSQL skips parse/plan too.
+from sqlalchemy import event
+from sqlalchemy.engine.interfaces import CacheStats
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+class StatementCacheStats:
+  def __init__(self):
+    self.hits = 0
+    self.misses = 0
+    # Statements that can't be cached at all (raw driver SQL, caching disabled)
+    self.uncached = 0
+
+  def record(self, conn, cursor, statement, parameters, context, executemany):
+    if context is None:
+      return
+    if context.cache_hit == CacheStats.CACHE_HIT:
+      self.hits += 1
+    elif context.cache_hit == CacheStats.CACHE_MISS:
+      self.misses += 1
+    else:
+      self.uncached += 1
+
+  def track(self, engine: AsyncEngine):
+    event.listen(engine.sync_engine, "after_cursor_execute", self.record)
+
+  def untrack(self, engine: AsyncEngine):
+    # Engines built outside get_engine / get_shard_router (tests, CLI) were never tracked
+    if event.contains(engine.sync_engine, "after_cursor_execute", self.record):
+      event.remove(engine.sync_engine, "after_cursor_execute", self.record)
+
+  def report(self) -> dict:
+    cacheable = self.hits + self.misses
+    return {
+      "hits": self.hits,
+      "misses": self.misses,
+      "uncached": self.uncached,
+      "hit_rate": round(self.hits / cacheable, 4) if cacheable else None,
+    }
+
+  def reset(self):
+    self.hits = self.misses = self.uncached = 0
+
+statement_cache_stats = StatementCacheStats()
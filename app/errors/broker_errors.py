@@ -0,0 +1,2 @@
+class TooManySubscribersError(Exception):
+    pass
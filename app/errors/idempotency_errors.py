@@ -0,0 +1,2 @@
+class IdempotencyKeyReusedError(Exception):
+    pass
@@ -0,0 +1,2 @@
+class UnknownRevisionError(Exception):
+    pass
@@ -5,4 +5,9 @@ class DuplicateProductNameError(Exception):
     pass
 
 class NoFieldsToUpdateError(Exception):
-    pass
\ No newline at end of file
+    pass
+
+class ProductVersionConflictError(Exception):
+    pass
+class ChangeCursorExpiredError(Exception):
+    pass
@@ -0,0 +1,85 @@
+# Binary encodings for bulk reads, negotiated through the Accept header.
+# msgpack and pyarrow are in requirements.txt, an image built without one simply never offers that format.
+from datetime import datetime
+from typing import Optional
+from pydantic import BaseModel
+from app.errors.format_errors import NotAcceptableError
+
+try:
+  import msgpack
+except ImportError:
+  msgpack = None
+
+try:
+  import pyarrow
+  import pyarrow.ipc
+except ImportError:
+  pyarrow = None
+
+JSON = "application/json"
+MSGPACK = "application/x-msgpack"
+ARROW_STREAM = "application/vnd.apache.arrow.stream"
+
+MSGPACK_ALIASES = {MSGPACK, "application/msgpack", "application/vnd.msgpack"}
+JSON_ALIASES = {JSON, "application/*", "*/*"}
+
+# Rows per Arrow record batch, consumers can start reading before the whole stream arrives
+ARROW_BATCH_SIZE = 65536
+
+ARROW_TYPES = {int: "int64", float: "float64", str: "string", bool: "bool", datetime: "timestamp[us]"}
+
+def available_media_types() -> list[str]:
+  media_types = [JSON]
+  if msgpack is not None:
+    media_types.append(MSGPACK)
+  if pyarrow is not None:
+    media_types.append(ARROW_STREAM)
+  return media_types
+
+def negotiate_media_type(accept: Optional[str]) -> str:
+  if not accept:
+    return JSON
+
+  offers = []
+  for position, part in enumerate(accept.split(",")):
+    media_type, *params = [value.strip() for value in part.split(";")]
+    quality = 1.0
+    for param in params:
+      if param.startswith("q="):
+        try:
+          quality = float(param[2:])
+        except ValueError:
+          quality = 0.0
+    if quality > 0:
+      offers.append((-quality, position, media_type.lower()))
+
+  # Highest quality first, ties keep the client's order
+  for _, _, media_type in sorted(offers):
+    if media_type in JSON_ALIASES:
+      return JSON
+    if media_type in MSGPACK_ALIASES and msgpack is not None:
+      return MSGPACK
+    if media_type == ARROW_STREAM and pyarrow is not None:
+      return ARROW_STREAM
+
+  raise NotAcceptableError(f"Supported media types are: {', '.join(available_media_types())}")
+
+def _msgpack_default(value):
+  if isinstance(value, datetime):
+    return value.isoformat()
+  raise TypeError(f"Object of type {type(value).__name__} is not MessagePack serializable")
+
+def encode_msgpack(rows: list[dict]) -> bytes:
+  return msgpack.packb(rows, default=_msgpack_default)
+
+def encode_arrow_stream(rows: list[dict], model: type[BaseModel], columns: list[str]) -> bytes:
+  # Column-wise: one Arrow array per field instead of one object per row
+  schema = pyarrow.schema([
+    (column, pyarrow.type_for_alias(ARROW_TYPES[model.model_fields[column].annotation])) for column in columns
+  ])
+  sink = pyarrow.BufferOutputStream()
+  with pyarrow.ipc.new_stream(sink, schema) as writer:
+    for start in range(0, max(len(rows), 1), ARROW_BATCH_SIZE):
+      chunk = rows[start:start + ARROW_BATCH_SIZE]
+      writer.write_batch(pyarrow.record_batch([[row[column] for row in chunk] for column in columns], schema=schema))
+  return sink.getvalue().to_pybytes()
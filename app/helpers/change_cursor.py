@@ -0,0 +1,24 @@
+from typing import Optional, Union
+
+def parse_change_cursor(value: Optional[Union[int, str]], shards: int) -> list[int]:
+  # One seq per shard: "12" with a single database, "12.7.30" with three shards.
+  # Nothing or "0" starts from the beginning on every shard
+  if value is None:
+    return [0] * shards
+
+  parts = str(value).strip().split(".")
+  if not all(part.isdigit() for part in parts):
+    raise ValueError(f"Invalid change cursor: {value}")
+
+  seqs = [int(part) for part in parts]
+  if seqs == [0]:
+    return [0] * shards
+  if len(seqs) != shards:
+    raise ValueError(f"Change cursor must have one seq per shard ({shards}), send back the last one returned")
+  return seqs
+
+def format_change_cursor(seqs: list[int]) -> Union[int, str]:
+  # A single database keeps the plain seq, clients of an unsharded API still get an int
+  if len(seqs) == 1:
+    return seqs[0]
+  return ".".join(str(seq) for seq in seqs)
@@ -0,0 +1,18 @@
+from typing import Iterable
+
+def client_identity(scope: dict, trusted_proxies: Iterable[str]) -> str:
+  # The peer address, or the client our own proxy forwarded for. Headers the client can set
+  # freely (X-Client-Id, a forged X-Forwarded-For) are never trusted on their own
+  client = scope.get("client")
+  peer = client[0] if client else "unknown"
+  trusted = set(trusted_proxies)
+  if peer not in trusted:
+    return peer
+
+  forwarded = ",".join(value.decode("latin-1") for name, value in scope["headers"] if name == b"x-forwarded-for")
+  # Proxies append the address they received from, the rightmost one we didn't add is the client
+  for address in reversed(forwarded.split(",")):
+    address = address.strip()
+    if address and address not in trusted:
+      return address
+  return peer
@@ -0,0 +1,20 @@
+from typing import Optional
+
+def format_etag(version: int) -> str:
+  return f'"{version}"'
+
+def parse_if_match(value: Optional[str]) -> Optional[int]:
+  # Returns the expected version, or None when any version is accepted ("*" or no header)
+  if value is None or value.strip() == "*":
+    return None
+
+  tag = value.strip()
+  # Weak and strong validators carry the same version number
+  if tag.startswith("W/"):
+    tag = tag[2:]
+  tag = tag.strip('"')
+
+  if not tag.isdigit():
+    raise ValueError("If-Match must contain a single ETag returned by this API")
+
+  return int(tag)
@@ -0,0 +1,21 @@
+import json
+from datetime import datetime
+from pydantic import BaseModel
+
+def _default(value):
+  if isinstance(value, datetime):
+    return value.isoformat()
+  raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+def _json_value(value):
+  return value.isoformat() if isinstance(value, datetime) else value
+
+def dump_rows(rows: list[dict]) -> str:
+  # Same output as ProductResponse.model_dump(mode="json") for the plain column types we read
+  return json.dumps(rows, default=_default)
+
+def trusted_dump(obj, model: type[BaseModel]) -> dict:
+  # Trusted path for objects read back from our own database: their columns already satisfy the
+  # response model, so they are copied instead of validated. Same output as
+  # model.model_validate(obj).model_dump(mode="json")
+  return {field: _json_value(getattr(obj, field)) for field in model.model_fields}
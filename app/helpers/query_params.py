@@ -0,0 +1,31 @@
+from typing import Iterable
+
+def parse_id_list(value: str) -> list[int]:
+  # Parse a comma separated list of ids ("1,2,3") keeping the order and dropping duplicates
+  ids = []
+  for raw_id in value.split(","):
+    raw_id = raw_id.strip()
+    if not raw_id:
+      continue
+    if not raw_id.isdigit():
+      raise ValueError(f"Invalid product id: {raw_id}")
+    ids.append(int(raw_id))
+
+  if not ids:
+    raise ValueError("At least one product id must be provided")
+
+  return list(dict.fromkeys(ids))
+
+
+def parse_field_list(value: str, allowed: Iterable[str]) -> list[str]:
+  # Parse a sparse fieldset ("id,price") keeping the order of `allowed` so responses are stable
+  requested = {field.strip() for field in value.split(",") if field.strip()}
+  if not requested:
+    raise ValueError("At least one field must be provided")
+
+  allowed = list(allowed)
+  unknown = requested.difference(allowed)
+  if unknown:
+    raise ValueError(f"Unknown fields: {', '.join(sorted(unknown))}")
+
+  return [field for field in allowed if field in requested]
@@ -1,17 +1,69 @@
 # FastAPI application
 
+from app.core.startup import startup_profiler
 from fastapi import FastAPI
 from app.api.main import api_router
+from app.api.routers import health
+from app.core.config import settings
+from app.core.cache import product_cache
 from app.core.db import lifespan
+from app.core.shutdown import request_drain
+from app.core.statement_cache import statement_cache_stats
+from app.middlewares.admission import AdmissionControlMiddleware
+from app.middlewares.deadline import DeadlineMiddleware
+from app.middlewares.rate_limit import RateLimitMiddleware
+from app.middlewares.shutdown import GracefulShutdownMiddleware
+
+startup_profiler.mark("imports")
 
 app = FastAPI(lifespan=lifespan)
 
+# The last middleware added runs first: rate limits are checked before taking an admission slot,
+# and the deadline only starts counting once the request was admitted
+app.add_middleware(
+    DeadlineMiddleware,
+    default_timeout=settings.REQUEST_TIMEOUT_SECONDS,
+    max_timeout=settings.REQUEST_TIMEOUT_MAX_SECONDS,
+    route_timeouts=settings.REQUEST_TIMEOUT_ROUTES,
+    exempt_paths=settings.REQUEST_TIMEOUT_EXEMPT_PATHS,
+    enabled=settings.REQUEST_TIMEOUT_ENABLED,
+)
+app.add_middleware(
+    AdmissionControlMiddleware,
+    max_concurrency=settings.ADMISSION_CONCURRENCY_LIMIT,
+    exempt_paths=settings.ADMISSION_EXEMPT_PATHS,
+    enabled=settings.ADMISSION_CONTROL_ENABLED,
+)
+app.add_middleware(
+    RateLimitMiddleware,
+    rate=settings.RATE_LIMIT_PER_SECOND,
+    burst=settings.RATE_LIMIT_BURST,
+    route_limits=settings.RATE_LIMIT_ROUTES,
+    exempt_paths=settings.RATE_LIMIT_EXEMPT_PATHS,
+    max_buckets=settings.RATE_LIMIT_MAX_BUCKETS,
+    enabled=settings.RATE_LIMIT_ENABLED,
+    trusted_proxies=settings.TRUSTED_PROXIES,
+)
+# Outermost: during shutdown requests are refused before they take a rate limit token or a slot
+app.add_middleware(GracefulShutdownMiddleware, drain=request_drain)
+
 app.include_router(api_router, prefix="/api/v1")
+# Outside /api/v1: probes are configured once in the load balancer and must not move with API versions
+app.include_router(health.router, prefix="/health", tags=["Health"])
 
 @app.get("/")
 async def root():
     return {"message": "Welcome to Product Manager API", "status": "running"}
 
+# Cache effectiveness of this worker, to verify statement reuse and product cache sizing
+@app.get("/metrics/cache")
+async def cache_metrics():
+    return {
+        "statements": statement_cache_stats.report(),
+        "products": {"hits": product_cache.hits, "misses": product_cache.misses, "entries": len(product_cache)},
+    }
+
+# Single process for local development, production runs the pre-forking supervisor (python -m app.server)
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(app, host="0.0.0.0", port=8000)
\ No newline at end of file
@@ -0,0 +1,30 @@
+# Global concurrency admission control, sized from the DB pool
+from fastapi import status
+from app.middlewares.responses import send_json_error
+
+class AdmissionControlMiddleware:
+  def __init__(self, app, max_concurrency: int, exempt_paths: list[str], enabled: bool = True):
+    self.app = app
+    self.max_concurrency = max_concurrency
+    self.exempt_paths = set(exempt_paths)
+    self.enabled = enabled
+    self.in_flight = 0
+
+  async def __call__(self, scope, receive, send):
+    if not self.enabled or scope["type"] != "http" or scope["path"] in self.exempt_paths:
+      return await self.app(scope, receive, send)
+
+    # Fail fast instead of queuing on the pool until the checkout times out
+    if self.in_flight >= self.max_concurrency:
+      return await send_json_error(
+        send,
+        status.HTTP_503_SERVICE_UNAVAILABLE,
+        "Server is busy, try again later",
+        {"Retry-After": 1}
+      )
+
+    self.in_flight += 1
+    try:
+      await self.app(scope, receive, send)
+    finally:
+      self.in_flight -= 1
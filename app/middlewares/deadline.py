@@ -0,0 +1,63 @@
+# Request deadlines: 504 instead of hanging on a slow database
+import asyncio
+import math
+import time
+from fastapi import status
+from app.core.deadline import request_deadline
+from app.middlewares.rate_limit import route_key
+from app.middlewares.responses import send_json_error
+
+class DeadlineMiddleware:
+  def __init__(
+    self,
+    app,
+    default_timeout: float,
+    max_timeout: float,
+    route_timeouts: dict[str, float],
+    exempt_paths: list[str],
+    enabled: bool = True,
+  ):
+    self.app = app
+    self.default_timeout = default_timeout
+    self.max_timeout = max_timeout
+    self.route_timeouts = route_timeouts
+    self.exempt_paths = set(exempt_paths)
+    self.enabled = enabled
+
+  async def __call__(self, scope, receive, send):
+    if not self.enabled or scope["type"] != "http" or scope["path"] in self.exempt_paths:
+      return await self.app(scope, receive, send)
+
+    timeout = self._timeout(scope)
+    token = request_deadline.set(time.monotonic() + timeout)
+    response_started = False
+
+    async def send_wrapper(message):
+      nonlocal response_started
+      if message["type"] == "http.response.start":
+        response_started = True
+      await send(message)
+
+    try:
+      # Cancelling the request also unwinds its session dependency, giving the connection back
+      await asyncio.wait_for(self.app(scope, receive, send_wrapper), timeout)
+    except asyncio.TimeoutError:
+      if not response_started:
+        await send_json_error(send, status.HTTP_504_GATEWAY_TIMEOUT, "Request deadline exceeded")
+    finally:
+      request_deadline.reset(token)
+
+  def _timeout(self, scope) -> float:
+    timeout = self.route_timeouts.get(route_key(scope["method"], scope["path"]), self.default_timeout)
+    # Clients can ask for a shorter (or longer, up to the max) deadline
+    for name, value in scope["headers"]:
+      if name == b"x-request-timeout":
+        try:
+          requested = float(value)
+        except ValueError:
+          break
+        # nan would slip through min/max below, inf is no deadline at all
+        if math.isfinite(requested):
+          timeout = requested
+        break
+    return min(max(timeout, 0.001), self.max_timeout)
@@ -0,0 +1,83 @@
+# Per client and per route token bucket rate limiting
+import math
+import time
+from collections import OrderedDict
+from fastapi import status
+from app.helpers.client_identity import client_identity
+from app.middlewares.responses import send_json_error
+
+class TokenBucket:
+  __slots__ = ("rate", "capacity", "tokens", "updated_at")
+
+  def __init__(self, rate: float, capacity: int):
+    self.rate = rate
+    self.capacity = capacity
+    self.tokens = float(capacity)
+    self.updated_at = time.monotonic()
+
+  def take(self) -> float:
+    # Returns 0 when a token was taken, otherwise the seconds until the next one is available
+    now = time.monotonic()
+    self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.rate)
+    self.updated_at = now
+
+    if self.tokens >= 1:
+      self.tokens -= 1
+      return 0.0
+    return (1 - self.tokens) / self.rate
+
+def route_key(method: str, path: str) -> str:
+  # Collapse ids so /products/1 and /products/2 share the same limit
+  segments = ["{id}" if segment.isdigit() else segment for segment in path.split("/")]
+  return f"{method} {'/'.join(segments)}"
+
+class RateLimitMiddleware:
+  def __init__(
+    self,
+    app,
+    rate: float,
+    burst: int,
+    route_limits: dict[str, tuple[float, int]],
+    exempt_paths: list[str],
+    max_buckets: int,
+    enabled: bool = True,
+    trusted_proxies: list[str] = [],
+  ):
+    self.app = app
+    self.rate = rate
+    self.burst = burst
+    self.route_limits = route_limits
+    self.exempt_paths = set(exempt_paths)
+    self.max_buckets = max_buckets
+    self.enabled = enabled
+    self.trusted_proxies = set(trusted_proxies)
+    # LRU bounded so a flood of distinct clients can't grow memory without limit
+    self.buckets: OrderedDict[tuple[str, str], TokenBucket] = OrderedDict()
+
+  async def __call__(self, scope, receive, send):
+    if not self.enabled or scope["type"] != "http" or scope["path"] in self.exempt_paths:
+      return await self.app(scope, receive, send)
+
+    route = route_key(scope["method"], scope["path"])
+    retry_after = self._bucket(client_identity(scope, self.trusted_proxies), route).take()
+    if retry_after > 0:
+      return await send_json_error(
+        send,
+        status.HTTP_429_TOO_MANY_REQUESTS,
+        "Too many requests, slow down",
+        {"Retry-After": math.ceil(retry_after)}
+      )
+
+    await self.app(scope, receive, send)
+
+  def _bucket(self, client_id: str, route: str) -> TokenBucket:
+    key = (client_id, route)
+    bucket = self.buckets.get(key)
+    if bucket is None:
+      rate, burst = self.route_limits.get(route, (self.rate, self.burst))
+      bucket = self.buckets[key] = TokenBucket(rate, burst)
+      if len(self.buckets) > self.max_buckets:
+        self.buckets.popitem(last=False)
+    else:
+      self.buckets.move_to_end(key)
+    return bucket
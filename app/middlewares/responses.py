@@ -0,0 +1,12 @@
+import json
+from typing import Optional
+
+async def send_json_error(send, status_code: int, detail: str, headers: Optional[dict] = None):
+  # Answer straight from the middleware, same body shape as FastAPI's HTTPException
+  body = json.dumps({"detail": detail}).encode()
+  raw_headers = [(b"content-type", b"application/json"), (b"content-length", str(len(body)).encode())]
+  for name, value in (headers or {}).items():
+    raw_headers.append((name.lower().encode(), str(value).encode()))
+
+  await send({"type": "http.response.start", "status": status_code, "headers": raw_headers})
+  await send({"type": "http.response.body", "body": body})
@@ -0,0 +1,28 @@
+# Counts in-flight requests for the graceful shutdown and turns new ones away once it started
+from fastapi import status
+from app.core.shutdown import RequestDrain
+from app.middlewares.responses import send_json_error
+
+class GracefulShutdownMiddleware:
+  def __init__(self, app, drain: RequestDrain):
+    self.app = app
+    self.drain = drain
+
+  async def __call__(self, scope, receive, send):
+    if scope["type"] != "http":
+      return await self.app(scope, receive, send)
+
+    # The load balancer retries elsewhere, closing the connection moves the client off this worker
+    if self.drain.draining:
+      return await send_json_error(
+        send,
+        status.HTTP_503_SERVICE_UNAVAILABLE,
+        "Server is shutting down, try again later",
+        {"Retry-After": 1, "Connection": "close"}
+      )
+
+    self.drain.enter()
+    try:
+      await self.app(scope, receive, send)
+    finally:
+      self.drain.exit()
@@ -0,0 +1,3 @@
+from .runner import MigrationRunner, Operations, load_migrations
+
+__all__ = ["MigrationRunner", "Operations", "load_migrations"]
@@ -0,0 +1,70 @@
+# Migrations CLI
+#
+#   python -m app.migrations upgrade [--to REVISION]
+#   python -m app.migrations downgrade --to REVISION|base
+#   python -m app.migrations current
+#   python -m app.migrations history
+#   python -m app.migrations configure-shards
+import argparse
+import asyncio
+from colorama import Fore, Style
+from app.core.db import get_engine
+from app.core.sharding import get_shard_router
+from app.errors.migration_errors import UnknownRevisionError
+from app.migrations.runner import MigrationRunner, load_migrations
+
+async def configure_shards():
+  router = get_shard_router()
+  if router is None:
+    print(Fore.YELLOW + "Sharding is disabled, set SHARD_DATABASE_URIS to more than one database" + Style.RESET_ALL)
+    return
+  try:
+    # Every shard needs the schema before its id sequence can be stepped
+    for engine in router.engines:
+      await MigrationRunner(engine).upgrade()
+    await router.configure_id_sequences()
+    print(Fore.GREEN + f"Configured {router.count} shards ✅" + Style.RESET_ALL)
+  finally:
+    await router.dispose()
+
+async def run(args):
+  if args.command == "configure-shards":
+    return await configure_shards()
+
+  engine = get_engine()
+  runner = MigrationRunner(engine)
+  try:
+    if args.command == "upgrade":
+      done = await runner.upgrade(args.to)
+      print(Fore.GREEN + f"Applied: {', '.join(done) or 'nothing to do'} ✅" + Style.RESET_ALL)
+    elif args.command == "downgrade":
+      done = await runner.downgrade(args.to)
+      print(Fore.GREEN + f"Reverted: {', '.join(done) or 'nothing to do'} ✅" + Style.RESET_ALL)
+    elif args.command == "current":
+      print(await runner.current() or "base")
+    elif args.command == "history":
+      applied = set(await runner.applied())
+      for migration in runner.migrations:
+        marker = "x" if migration.revision in applied else " "
+        print(f"[{marker}] {migration.revision} {migration.description}")
+  except UnknownRevisionError as e:
+    print(Fore.RED + str(e) + Style.RESET_ALL)
+    raise SystemExit(1)
+  finally:
+    await engine.dispose()
+
+def main():
+  parser = argparse.ArgumentParser(prog="python -m app.migrations", description="Run database migrations")
+  subparsers = parser.add_subparsers(dest="command", required=True)
+  upgrade = subparsers.add_parser("upgrade", help="Apply pending migrations")
+  upgrade.add_argument("--to", default="head")
+  downgrade = subparsers.add_parser("downgrade", help="Revert migrations after the given revision")
+  downgrade.add_argument("--to", required=True)
+  subparsers.add_parser("current", help="Show the current revision")
+  subparsers.add_parser("history", help="List migrations and whether they are applied")
+  subparsers.add_parser("configure-shards", help="Migrate every shard and step its product id sequence")
+
+  asyncio.run(run(parser.parse_args()))
+
+if __name__ == "__main__":
+  main()
@@ -0,0 +1,94 @@
+# Schema operations available to migration scripts
+import asyncio
+from typing import Optional
+from sqlalchemy import Column, Table, inspect, text
+from sqlalchemy.ext.asyncio import AsyncConnection
+from sqlalchemy.schema import CreateColumn
+
+class Operations:
+  def __init__(self, connection: AsyncConnection):
+    self.connection = connection
+    self.dialect = connection.dialect.name
+
+  @property
+  def is_postgresql(self) -> bool:
+    return self.dialect == "postgresql"
+
+  async def execute(self, sql: str, params: Optional[dict] = None):
+    return await self.connection.execute(text(sql), params or {})
+
+  async def has_table(self, table_name: str) -> bool:
+    return await self.connection.run_sync(lambda conn: inspect(conn).has_table(table_name))
+
+  async def has_column(self, table_name: str, column_name: str) -> bool:
+    columns = await self.connection.run_sync(lambda conn: inspect(conn).get_columns(table_name))
+    return any(column["name"] == column_name for column in columns)
+
+  async def create_table(self, table: Table):
+    # checkfirst keeps migrations safe on databases created earlier with create_all
+    await self.connection.run_sync(lambda conn: table.create(conn, checkfirst=True))
+
+  async def drop_table(self, table_name: str):
+    await self.execute(f"DROP TABLE IF EXISTS {table_name}")
+
+  async def add_column(self, table_name: str, column: Column):
+    # Nullable columns, or NOT NULL with a constant default, are metadata only changes on PostgreSQL 11+
+    if await self.has_column(table_name, column.name):
+      return
+    column_ddl = CreateColumn(column).compile(dialect=self.connection.dialect)
+    await self.execute(f"ALTER TABLE {table_name} ADD COLUMN {column_ddl}")
+
+  async def drop_column(self, table_name: str, column_name: str):
+    if await self.has_column(table_name, column_name):
+      await self.execute(f"ALTER TABLE {table_name} DROP COLUMN {column_name}")
+
+  async def create_index(
+    self,
+    index_name: str,
+    table_name: str,
+    columns: list[str],
+    where: Optional[str] = None,
+    unique: bool = False,
+    concurrently: bool = True,
+  ):
+    # CONCURRENTLY builds the index without blocking writes, the migration must set `transactional = False`
+    concurrent = concurrently and self.is_postgresql
+    if concurrent:
+      await self._drop_invalid_index(index_name)
+
+    sql = (
+      f"CREATE {'UNIQUE ' if unique else ''}INDEX {'CONCURRENTLY ' if concurrent else ''}"
+      f"IF NOT EXISTS {index_name} ON {table_name} ({', '.join(columns)})"
+    )
+    if where:
+      sql += f" WHERE {where}"
+    await self.execute(sql)
+
+  async def drop_index(self, index_name: str, concurrently: bool = True):
+    concurrent = concurrently and self.is_postgresql
+    await self.execute(f"DROP INDEX {'CONCURRENTLY ' if concurrent else ''}IF EXISTS {index_name}")
+
+  async def backfill(self, table_name: str, set_sql: str, where_sql: str, batch_size: int = 1000, pause_seconds: float = 0.0) -> int:
+    # Small UPDATE batches, each committed on its own when the migration is not transactional,
+    # so a backfill never holds row locks on the whole table
+    total = 0
+    while True:
+      result = await self.execute(
+        f"UPDATE {table_name} SET {set_sql} WHERE id IN "
+        f"(SELECT id FROM {table_name} WHERE {where_sql} LIMIT {int(batch_size)})"
+      )
+      total += result.rowcount
+      if result.rowcount < batch_size:
+        return total
+      if pause_seconds:
+        await asyncio.sleep(pause_seconds)
+
+  async def _drop_invalid_index(self, index_name: str):
+    # A failed CREATE INDEX CONCURRENTLY leaves an INVALID index behind, which IF NOT EXISTS would keep
+    result = await self.execute(
+      "SELECT 1 FROM pg_class c JOIN pg_index i ON i.indexrelid = c.oid "
+      "WHERE c.relname = :name AND NOT i.indisvalid",
+      {"name": index_name},
+    )
+    if result.first():
+      await self.execute(f"DROP INDEX CONCURRENTLY IF EXISTS {index_name}")
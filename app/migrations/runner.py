@@ -0,0 +1,139 @@
+# Versioned migrations, run from the CLI (python -m app.migrations) and never on worker startup
+import importlib
+import pkgutil
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
+from types import ModuleType
+from typing import Optional
+from sqlalchemy import Column, DateTime, MetaData, String, Table, select, insert, delete, text
+from sqlalchemy.ext.asyncio import AsyncConnection, AsyncEngine
+from app.errors.migration_errors import UnknownRevisionError
+from app.helpers.format_date import now_without_microseconds
+from app.migrations import versions
+from app.migrations.operations import Operations
+
+version_table = Table(
+  "schema_migrations",
+  MetaData(),
+  Column("revision", String(32), primary_key=True),
+  Column("applied_at", DateTime, nullable=False),
+)
+
+# pg_advisory_lock(MIGRATION_LOCK, 0): two-int keys, like every other advisory lock of the app
+MIGRATION_LOCK = 7250
+
+@dataclass
+class Migration:
+  revision: str
+  down_revision: Optional[str]
+  description: str
+  # Non transactional migrations run in autocommit mode (CREATE INDEX CONCURRENTLY, batched backfills)
+  transactional: bool
+  module: ModuleType
+
+def load_migrations() -> list[Migration]:
+  migrations = {}
+  for module_info in pkgutil.iter_modules(versions.__path__):
+    module = importlib.import_module(f"{versions.__name__}.{module_info.name}")
+    migrations[module.revision] = Migration(
+      revision=module.revision,
+      down_revision=module.down_revision,
+      description=module.description,
+      transactional=getattr(module, "transactional", True),
+      module=module,
+    )
+
+  # Follow the down_revision chain from the base so the order never depends on file names
+  ordered = []
+  by_parent = {migration.down_revision: migration for migration in migrations.values()}
+  current = by_parent.get(None)
+  while current:
+    ordered.append(current)
+    current = by_parent.get(current.revision)
+
+  if len(ordered) != len(migrations):
+    raise RuntimeError("Migration history is not a single linear chain")
+  return ordered
+
+class MigrationRunner:
+  def __init__(self, engine: AsyncEngine, migrations: Optional[list[Migration]] = None):
+    self.engine = engine
+    self.migrations = migrations if migrations is not None else load_migrations()
+
+  @property
+  def head(self) -> Optional[str]:
+    return self.migrations[-1].revision if self.migrations else None
+
+  async def applied(self) -> list[str]:
+    async with self.engine.begin() as connection:
+      await connection.run_sync(lambda conn: version_table.create(conn, checkfirst=True))
+      result = await connection.execute(select(version_table.c.revision))
+      applied = set(result.scalars().all())
+    return [migration.revision for migration in self.migrations if migration.revision in applied]
+
+  async def current(self) -> Optional[str]:
+    applied = await self.applied()
+    return applied[-1] if applied else None
+
+  async def upgrade(self, target: str = "head") -> list[str]:
+    target = self.head if target == "head" else self._known(target)
+    async with self._exclusive():
+      applied = set(await self.applied())
+      done = []
+      for migration in self.migrations:
+        if migration.revision not in applied:
+          await self._run(migration, "upgrade")
+          done.append(migration.revision)
+        if migration.revision == target:
+          break
+      return done
+
+  async def downgrade(self, target: str = "base") -> list[str]:
+    target = None if target == "base" else self._known(target)
+    async with self._exclusive():
+      applied = await self.applied()
+      done = []
+      for migration in reversed(self.migrations):
+        if migration.revision == target:
+          break
+        if migration.revision in applied:
+          await self._run(migration, "downgrade")
+          done.append(migration.revision)
+      return done
+
+  def _known(self, revision: str) -> str:
+    # A typo must fail, not silently upgrade to head or downgrade to base
+    if not any(migration.revision == revision for migration in self.migrations):
+      raise UnknownRevisionError(f"Unknown revision {revision!r}, expected head, base or one of the migrations")
+    return revision
+
+  @asynccontextmanager
+  async def _exclusive(self):
+    # Two runs at once (a deploy job started on several hosts) would apply the same migrations twice.
+    # A session lock on its own connection, held across the non transactional migrations too
+    if self.engine.dialect.name != "postgresql":
+      yield
+      return
+    async with self.engine.connect() as connection:
+      connection = await connection.execution_options(isolation_level="AUTOCOMMIT")
+      await connection.execute(text("SELECT pg_advisory_lock(:key, 0)"), {"key": MIGRATION_LOCK})
+      try:
+        yield
+      finally:
+        await connection.execute(text("SELECT pg_advisory_unlock(:key, 0)"), {"key": MIGRATION_LOCK})
+
+  async def _run(self, migration: Migration, direction: str):
+    if migration.transactional:
+      async with self.engine.begin() as connection:
+        await self._apply(connection, migration, direction)
+    else:
+      async with self.engine.connect() as connection:
+        connection = await connection.execution_options(isolation_level="AUTOCOMMIT")
+        await self._apply(connection, migration, direction)
+
+  async def _apply(self, connection: AsyncConnection, migration: Migration, direction: str):
+    await getattr(migration.module, direction)(Operations(connection))
+    if direction == "upgrade":
+      await connection.execute(insert(version_table).values(revision=migration.revision, applied_at=now_without_microseconds()))
+    else:
+      await connection.execute(delete(version_table).where(version_table.c.revision == migration.revision))
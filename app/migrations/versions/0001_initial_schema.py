@@ -0,0 +1,26 @@
+# Product table as it was before versioned migrations existed
+from sqlalchemy import Boolean, Column, DateTime, Float, Index, Integer, MetaData, String, Table
+from app.migrations.operations import Operations
+
+revision = "0001"
+down_revision = None
+description = "Initial product table"
+
+# Frozen copy of the schema at this revision, never import the live models here
+product = Table(
+  "product",
+  MetaData(),
+  Column("id", Integer, primary_key=True),
+  Column("name", String(255), nullable=False),
+  Column("price", Float),
+  Column("available", Boolean, nullable=False),
+  Column("created_at", DateTime),
+  Column("updated_at", DateTime),
+  Index("ix_product_name", "name"),
+)
+
+async def upgrade(op: Operations):
+  await op.create_table(product)
+
+async def downgrade(op: Operations):
+  await op.drop_table("product")
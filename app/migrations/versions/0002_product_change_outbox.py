@@ -0,0 +1,24 @@
+# Transactional outbox for the product change feed
+from sqlalchemy import Column, DateTime, Index, Integer, JSON, MetaData, String, Table
+from app.migrations.operations import Operations
+
+revision = "0002"
+down_revision = "0001"
+description = "Product change outbox"
+
+product_change = Table(
+  "productchange",
+  MetaData(),
+  Column("seq", Integer, primary_key=True),
+  Column("product_id", Integer, nullable=False),
+  Column("operation", String(16), nullable=False),
+  Column("payload", JSON),
+  Column("created_at", DateTime),
+  Index("ix_productchange_product_id", "product_id"),
+)
+
+async def upgrade(op: Operations):
+  await op.create_table(product_change)
+
+async def downgrade(op: Operations):
+  await op.drop_table("productchange")
@@ -0,0 +1,23 @@
+# Soft delete column and partial indexes, built without blocking writes
+from sqlalchemy import Column, DateTime
+from app.migrations.operations import Operations
+
+revision = "0003"
+down_revision = "0002"
+description = "Product soft delete with partial indexes"
+transactional = False
+
+async def upgrade(op: Operations):
+  await op.add_column("product", Column("deleted_at", DateTime, nullable=True))
+  await op.create_index("ix_product_live_name", "product", ["name"], where="deleted_at IS NULL")
+  await op.create_index("ix_product_live_id", "product", ["id"], where="deleted_at IS NULL")
+  await op.create_index("ix_product_tombstones", "product", ["deleted_at"], where="deleted_at IS NOT NULL")
+  # Replaced by the partial index on live rows
+  await op.drop_index("ix_product_name")
+
+async def downgrade(op: Operations):
+  await op.create_index("ix_product_name", "product", ["name"])
+  await op.drop_index("ix_product_tombstones")
+  await op.drop_index("ix_product_live_id")
+  await op.drop_index("ix_product_live_name")
+  await op.drop_column("product", "deleted_at")
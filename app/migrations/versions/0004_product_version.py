@@ -0,0 +1,14 @@
+# Version column for optimistic concurrency control
+from sqlalchemy import Column, Integer
+from app.migrations.operations import Operations
+
+revision = "0004"
+down_revision = "0003"
+description = "Product version column"
+
+async def upgrade(op: Operations):
+  # A constant default makes this a metadata only change, existing rows read as version 1
+  await op.add_column("product", Column("version", Integer, nullable=False, server_default="1"))
+
+async def downgrade(op: Operations):
+  await op.drop_column("product", "version")
@@ -0,0 +1,64 @@
+# Hash partitioning of the product table (PostgreSQL)
+#
+# This rewrites the table, so run it before the catalog grows or in a maintenance window.
+# Afterwards every partition has its own indexes and is vacuumed on its own.
+from app.migrations.operations import Operations
+
+revision = "0005"
+down_revision = "0004"
+description = "Hash partitioning of product"
+
+# Part of the revision, never read from the environment: every database at 0005 has the same layout.
+# A different count is a new migration (partition_statements / unpartition_statements)
+PARTITIONS = 8
+
+INDEXES = [
+  "CREATE INDEX IF NOT EXISTS ix_product_live_name ON product (name) WHERE deleted_at IS NULL",
+  "CREATE INDEX IF NOT EXISTS ix_product_live_id ON product (id) WHERE deleted_at IS NULL",
+  "CREATE INDEX IF NOT EXISTS ix_product_tombstones ON product (deleted_at) WHERE deleted_at IS NOT NULL",
+]
+
+def partition_statements(partitions: int) -> list[str]:
+  statements = [
+    "ALTER TABLE product RENAME TO product_unpartitioned",
+    "DROP INDEX IF EXISTS ix_product_live_name, ix_product_live_id, ix_product_tombstones",
+    # The id is the partition key, so the primary key stays (id)
+    "CREATE TABLE product (LIKE product_unpartitioned INCLUDING DEFAULTS INCLUDING CONSTRAINTS) PARTITION BY HASH (id)",
+    "ALTER TABLE product ADD PRIMARY KEY (id)",
+  ]
+  statements += [
+    f"CREATE TABLE product_p{remainder} PARTITION OF product FOR VALUES WITH (MODULUS {partitions}, REMAINDER {remainder})"
+    for remainder in range(partitions)
+  ]
+  statements += [
+    "INSERT INTO product SELECT * FROM product_unpartitioned",
+    "ALTER SEQUENCE product_id_seq OWNED BY product.id",
+    "DROP TABLE product_unpartitioned",
+  ]
+  return statements + INDEXES
+
+def unpartition_statements() -> list[str]:
+  return [
+    "ALTER TABLE product RENAME TO product_partitioned",
+    "CREATE TABLE product (LIKE product_partitioned INCLUDING DEFAULTS INCLUDING CONSTRAINTS)",
+    "ALTER TABLE product ADD PRIMARY KEY (id)",
+    "INSERT INTO product SELECT * FROM product_partitioned",
+    "ALTER SEQUENCE product_id_seq OWNED BY product.id",
+    "DROP TABLE product_partitioned",
+  ] + INDEXES
+
+async def is_partitioned(op: Operations) -> bool:
+  result = await op.execute("SELECT 1 FROM pg_partitioned_table pt JOIN pg_class c ON c.oid = pt.partrelid WHERE c.relname = 'product'")
+  return result.first() is not None
+
+async def upgrade(op: Operations):
+  if not op.is_postgresql or await is_partitioned(op):
+    return
+  for statement in partition_statements(PARTITIONS):
+    await op.execute(statement)
+
+async def downgrade(op: Operations):
+  if not op.is_postgresql or not await is_partitioned(op):
+    return
+  for statement in unpartition_statements():
+    await op.execute(statement)
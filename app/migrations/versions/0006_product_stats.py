@@ -0,0 +1,42 @@
+# Incrementally maintained catalog stats and a partial index for min/max price
+from sqlalchemy import Column, Float, Integer, MetaData, Table
+from app.migrations.operations import Operations
+
+revision = "0006"
+down_revision = "0005"
+description = "Product stats summary table"
+transactional = False
+
+# Frozen copy of the schema at this revision, never import the live models here
+product_stats = Table(
+  "productstats",
+  MetaData(),
+  Column("id", Integer, primary_key=True),
+  Column("total_count", Integer, nullable=False),
+  Column("available_count", Integer, nullable=False),
+  Column("price_sum", Float, nullable=False),
+)
+
+async def is_partitioned(op: Operations) -> bool:
+  if not op.is_postgresql:
+    return False
+  result = await op.execute("SELECT 1 FROM pg_partitioned_table pt JOIN pg_class c ON c.oid = pt.partrelid WHERE c.relname = 'product'")
+  return result.first() is not None
+
+async def upgrade(op: Operations):
+  await op.create_table(product_stats)
+  # Single summary row seeded from the live catalog, unless the table was already created and seeded by create_all
+  await op.execute(
+    "INSERT INTO productstats (id, total_count, available_count, price_sum) "
+    "SELECT * FROM (SELECT 1, COUNT(*), COALESCE(SUM(CASE WHEN available THEN 1 ELSE 0 END), 0), COALESCE(SUM(price), 0) "
+    "FROM product WHERE deleted_at IS NULL) AS totals WHERE NOT EXISTS (SELECT 1 FROM productstats)"
+  )
+  # Partitioned tables can't build indexes concurrently, each partition gets its own index anyway
+  await op.create_index(
+    "ix_product_live_price", "product", ["price"], where="deleted_at IS NULL",
+    concurrently=not await is_partitioned(op)
+  )
+
+async def downgrade(op: Operations):
+  await op.drop_index("ix_product_live_price")
+  await op.drop_table("productstats")
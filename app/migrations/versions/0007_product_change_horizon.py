@@ -0,0 +1,67 @@
+# Commit horizon for the change feed: seq is allocated at INSERT, so a lower seq can commit after a
+# higher one. Every allocated seq stays advisory locked until its transaction ends, readers only
+# return changes below the lowest seq still locked, or below the next seq when none is
+# (PostgreSQL only, SQLite serializes writers)
+from app.migrations.operations import Operations
+
+revision = "0007"
+down_revision = "0006"
+description = "Change feed commit horizon"
+
+# Frozen copy of the functions at this revision, the two-int advisory keys are (namespace, value).
+# Transaction locks only: COMMIT or ROLLBACK releases them whatever interrupted the statement,
+# a cancelled or timed out call never leaves a lock behind on a pooled connection
+NEXT_CHANGE_SEQ = """
+CREATE OR REPLACE FUNCTION next_change_seq() RETURNS integer LANGUAGE plpgsql AS $$
+DECLARE
+  allocated integer;
+BEGIN
+  -- Announce the allocation before nextval: a reader finding this backend without a seq lock looks again
+  PERFORM pg_advisory_xact_lock(7260, pg_backend_pid());
+  allocated := nextval('productchange_seq_seq');
+  PERFORM pg_advisory_xact_lock(7261, allocated);
+  RETURN allocated;
+END $$
+"""
+
+CHANGE_HORIZON = """
+CREATE OR REPLACE FUNCTION change_horizon() RETURNS integer LANGUAGE plpgsql AS $$
+DECLARE
+  horizon integer;
+  allocating boolean;
+BEGIN
+  -- Takes no lock, only reads pg_locks
+  LOOP
+    -- Read before pg_locks: every seq up to here belongs to a backend already announced there
+    SELECT CASE WHEN is_called THEN last_value + 1 ELSE last_value END INTO horizon FROM productchange_seq_seq;
+    WITH held AS (
+      SELECT classid, objid, pid FROM pg_locks
+      WHERE locktype = 'advisory' AND objsubid = 2 AND classid IN (7260, 7261)
+    )
+    SELECT least(horizon, (SELECT min(objid::bigint)::integer FROM held WHERE classid = 7261)),
+      EXISTS (
+        SELECT 1 FROM held announced WHERE announced.classid = 7260
+        AND NOT EXISTS (SELECT 1 FROM held locked WHERE locked.classid = 7261 AND locked.pid = announced.pid)
+      )
+    INTO horizon, allocating;
+    -- A backend between nextval and its seq lock may hold a seq below the horizon
+    EXIT WHEN NOT allocating;
+    PERFORM pg_sleep(0.001);
+  END LOOP;
+  RETURN horizon;
+END $$
+"""
+
+async def upgrade(op: Operations):
+  if not op.is_postgresql:
+    return
+  await op.execute(NEXT_CHANGE_SEQ)
+  await op.execute(CHANGE_HORIZON)
+  await op.execute("ALTER TABLE productchange ALTER COLUMN seq SET DEFAULT next_change_seq()")
+
+async def downgrade(op: Operations):
+  if not op.is_postgresql:
+    return
+  await op.execute("ALTER TABLE productchange ALTER COLUMN seq SET DEFAULT nextval('productchange_seq_seq')")
+  await op.execute("DROP FUNCTION IF EXISTS change_horizon()")
+  await op.execute("DROP FUNCTION IF EXISTS next_change_seq()")
@@ -0,0 +1,30 @@
+# Striped stats counters: every writer used to update the single summary row, so concurrent writes
+# queued on its row lock. The totals are now spread over STRIPES rows and summed on read
+from app.migrations.operations import Operations
+
+revision = "0008"
+down_revision = "0007"
+description = "Striped product stats counters"
+
+# Frozen at this revision, the model's PRODUCT_STATS_STRIPES must match it. Changing it needs a new migration
+STRIPES = 16
+
+async def upgrade(op: Operations):
+  # Row 1 keeps the current totals, the other stripes start at zero
+  for stripe in range(2, STRIPES + 1):
+    await op.execute(
+      "INSERT INTO productstats (id, total_count, available_count, price_sum) "
+      "SELECT :stripe, 0, 0, 0 WHERE NOT EXISTS (SELECT 1 FROM productstats WHERE id = :stripe)",
+      {"stripe": stripe},
+    )
+
+async def downgrade(op: Operations):
+  # Fold every stripe back into the single summary row
+  await op.execute(
+    "UPDATE productstats SET "
+    "total_count = (SELECT SUM(total_count) FROM productstats), "
+    "available_count = (SELECT SUM(available_count) FROM productstats), "
+    "price_sum = (SELECT SUM(price_sum) FROM productstats) "
+    "WHERE id = 1"
+  )
+  await op.execute("DELETE FROM productstats WHERE id <> 1")
@@ -0,0 +1,27 @@
+# Retention of the change feed: the compaction loop prunes old changes and records the last pruned seq,
+# so a consumer resuming from before it gets an error instead of silently skipping changes
+from sqlalchemy import Column, Integer, MetaData, Table
+from app.migrations.operations import Operations
+
+revision = "0009"
+down_revision = "0008"
+description = "Change feed retention watermark"
+
+# Frozen copy of the schema at this revision, never import the live models here
+product_change_retention = Table(
+  "productchangeretention",
+  MetaData(),
+  Column("id", Integer, primary_key=True),
+  Column("pruned_seq", Integer, nullable=False),
+)
+
+async def upgrade(op: Operations):
+  await op.create_table(product_change_retention)
+  # Nothing pruned yet, unless create_all already seeded the row
+  await op.execute(
+    "INSERT INTO productchangeretention (id, pruned_seq) "
+    "SELECT 1, 0 WHERE NOT EXISTS (SELECT 1 FROM productchangeretention)"
+  )
+
+async def downgrade(op: Operations):
+  await op.drop_table("productchangeretention")
@@ -1,3 +1,5 @@
 from .products.product import Product
+from .products.product_change import ProductChange, ProductChangeRetention, ChangeOperation
+from .products.product_stats import ProductStats
 
-__all__ = ["Product"]
\ No newline at end of file
+__all__ = ["Product", "ProductChange", "ProductChangeRetention", "ChangeOperation", "ProductStats"]
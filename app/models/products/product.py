@@ -4,14 +4,32 @@
 # 3. CRUD with the database
 
 from datetime import datetime
+from typing import Optional
 from app.helpers.format_date import now_without_microseconds
-from sqlmodel import Field, SQLModel, Column, Float
-from sqlalchemy import DateTime as SQLAlchemyDateTime
+from sqlmodel import Field, SQLModel, Column, Float, Integer
+from sqlalchemy import DateTime as SQLAlchemyDateTime, Index, text
+
+# Partial indexes only contain live (not soft deleted) rows, which is what every read filters on
+LIVE_ROWS = text("deleted_at IS NULL")
+TOMBSTONES = text("deleted_at IS NOT NULL")
 
 class Product(SQLModel, table=True): 
+  __table_args__ = (
+    Index("ix_product_live_name", "name", postgresql_where=LIVE_ROWS, sqlite_where=LIVE_ROWS),
+    Index("ix_product_live_id", "id", postgresql_where=LIVE_ROWS, sqlite_where=LIVE_ROWS),
+    # Min/max price of the catalog become a single index lookup
+    Index("ix_product_live_price", "price", postgresql_where=LIVE_ROWS, sqlite_where=LIVE_ROWS),
+    # Used by the background compaction to find tombstones to purge
+    Index("ix_product_tombstones", "deleted_at", postgresql_where=TOMBSTONES, sqlite_where=TOMBSTONES),
+  )
+
   id: int = Field(default=None, primary_key=True)
-  name: str = Field(index=True, min_length=3, max_length=255)
+  name: str = Field(min_length=3, max_length=255)
   price: float = Field(ge=0, sa_column=Column(Float))
   available: bool = Field(default=True)
   created_at: datetime = Field(default_factory=now_without_microseconds, sa_column=Column(SQLAlchemyDateTime, default=now_without_microseconds))
-  updated_at: datetime = Field(default_factory=now_without_microseconds, sa_column=Column(SQLAlchemyDateTime, default=now_without_microseconds, onupdate=now_without_microseconds))
\ No newline at end of file
+  updated_at: datetime = Field(default_factory=now_without_microseconds, sa_column=Column(SQLAlchemyDateTime, default=now_without_microseconds, onupdate=now_without_microseconds))
+  # Optimistic concurrency: bumped by every write and checked with a conditional UPDATE
+  version: int = Field(default=1, sa_column=Column(Integer, nullable=False, default=1, server_default="1"))
+  # Soft delete marker, rows are purged later by the compaction task
+  deleted_at: Optional[datetime] = Field(default=None, sa_column=Column(SQLAlchemyDateTime, nullable=True))
@@ -0,0 +1,81 @@
+# ✅ MODELS RESPONSIBILITIES:
+# 1. Define the database schema
+# 2. Define the relationships between tables
+# 3. CRUD with the database
+
+from datetime import datetime
+from enum import Enum
+from typing import Optional
+from app.helpers.format_date import now_without_microseconds
+from sqlmodel import Field, SQLModel, Column, JSON
+from sqlalchemy import DDL, event
+from sqlalchemy import DateTime as SQLAlchemyDateTime
+
+class ChangeOperation(str, Enum):
+  CREATED = "created"
+  UPDATED = "updated"
+  DELETED = "deleted"
+
+# Outbox row written in the same transaction as every product mutation.
+# `seq` is allocated at INSERT, so a lower seq can commit after a higher one. On PostgreSQL every
+# allocated seq stays advisory locked until its transaction ends and readers stop below the lowest
+# one still locked (ProductService.get_changes), so consumers only need to remember the last one they saw.
+class ProductChange(SQLModel, table=True):
+  seq: int = Field(default=None, primary_key=True)
+  product_id: int = Field(index=True)
+  operation: ChangeOperation = Field(max_length=16)
+  payload: Optional[dict] = Field(default=None, sa_column=Column(JSON))
+  created_at: datetime = Field(default_factory=now_without_microseconds, sa_column=Column(SQLAlchemyDateTime, default=now_without_microseconds))
+
+# Single row: every seq up to pruned_seq may have been removed by the retention in CompactionService,
+# a consumer whose cursor is below it has missed changes
+class ProductChangeRetention(SQLModel, table=True):
+  id: int = Field(default=1, primary_key=True)
+  pruned_seq: int = Field(default=0)
+
+# Same functions as migration 0007, for databases built with create_all
+NEXT_CHANGE_SEQ = DDL("""
+CREATE OR REPLACE FUNCTION next_change_seq() RETURNS integer LANGUAGE plpgsql AS $$
+DECLARE
+  allocated integer;
+BEGIN
+  PERFORM pg_advisory_xact_lock(7260, pg_backend_pid());
+  allocated := nextval('productchange_seq_seq');
+  PERFORM pg_advisory_xact_lock(7261, allocated);
+  RETURN allocated;
+END $$
+""")
+
+CHANGE_HORIZON = DDL("""
+CREATE OR REPLACE FUNCTION change_horizon() RETURNS integer LANGUAGE plpgsql AS $$
+DECLARE
+  horizon integer;
+  allocating boolean;
+BEGIN
+  LOOP
+    SELECT CASE WHEN is_called THEN last_value + 1 ELSE last_value END INTO horizon FROM productchange_seq_seq;
+    WITH held AS (
+      SELECT classid, objid, pid FROM pg_locks
+      WHERE locktype = 'advisory' AND objsubid = 2 AND classid IN (7260, 7261)
+    )
+    SELECT least(horizon, (SELECT min(objid::bigint)::integer FROM held WHERE classid = 7261)),
+      EXISTS (
+        SELECT 1 FROM held announced WHERE announced.classid = 7260
+        AND NOT EXISTS (SELECT 1 FROM held locked WHERE locked.classid = 7261 AND locked.pid = announced.pid)
+      )
+    INTO horizon, allocating;
+    EXIT WHEN NOT allocating;
+    PERFORM pg_sleep(0.001);
+  END LOOP;
+  RETURN horizon;
+END $$
+""")
+
+for ddl in (
+  NEXT_CHANGE_SEQ,
+  CHANGE_HORIZON,
+  DDL("ALTER TABLE productchange ALTER COLUMN seq SET DEFAULT next_change_seq()"),
+):
+  event.listen(ProductChange.__table__, "after_create", ddl.execute_if(dialect="postgresql"))
+
+event.listen(ProductChangeRetention.__table__, "after_create", DDL("INSERT INTO productchangeretention (id, pruned_seq) VALUES (1, 0)"))
@@ -0,0 +1,45 @@
+# ✅ MODELS RESPONSIBILITIES:
+# 1. Define the database schema
+# 2. Define the relationships between tables
+# 3. CRUD with the database
+
+from sqlmodel import Field, SQLModel, Column, Float
+from sqlalchemy import DDL, event
+from app.models.products.product import Product
+
+# Summary of the live catalog, kept up to date by ProductService in the same transaction as every
+# write, so the stats endpoint never scans the product table. The counters are striped over
+# PRODUCT_STATS_STRIPES rows (ids 1..N, a product always updates row product_id % N + 1) so concurrent
+# writers don't all queue on one row lock, readers sum the rows. Changing N needs a migration.
+PRODUCT_STATS_STRIPES = 16
+
+def stats_stripe(product_id: int) -> int:
+  return product_id % PRODUCT_STATS_STRIPES + 1
+
+class ProductStats(SQLModel, table=True):
+  id: int = Field(default=1, primary_key=True)
+  total_count: int = Field(default=0)
+  available_count: int = Field(default=0)
+  price_sum: float = Field(default=0, sa_column=Column(Float, nullable=False, default=0))
+
+# Created after product so the seed below can read it
+ProductStats.__table__.add_is_dependent_on(Product.__table__)
+
+# Seed the stripes whenever the table is created with create_all: the first one holds the current catalog
+event.listen(
+  ProductStats.__table__,
+  "after_create",
+  DDL(
+    "INSERT INTO productstats (id, total_count, available_count, price_sum) "
+    "SELECT 1, COUNT(*), COALESCE(SUM(CASE WHEN available THEN 1 ELSE 0 END), 0), COALESCE(SUM(price), 0) "
+    "FROM product WHERE deleted_at IS NULL"
+  ),
+)
+event.listen(
+  ProductStats.__table__,
+  "after_create",
+  DDL(
+    "INSERT INTO productstats (id, total_count, available_count, price_sum) VALUES "
+    + ", ".join(f"({stripe}, 0, 0, 0)" for stripe in range(2, PRODUCT_STATS_STRIPES + 1))
+  ),
+)
@@ -6,8 +6,9 @@
 # 5. MUST NOT interact with the database
 
 from datetime import datetime
-from pydantic import BaseModel, Field, ConfigDict, field_validator
-from typing import Optional
+from functools import lru_cache
+from pydantic import BaseModel, Field, ConfigDict, create_model, field_validator
+from typing import Optional, Union
 
 # Schema for creating a product (req)
 class ProductCreate(BaseModel):
@@ -23,9 +24,20 @@ class ProductResponse(BaseModel):
   available: bool
   created_at: datetime
   updated_at: datetime
+  # Also sent as the ETag header, clients send it back in If-Match to update safely
+  version: int = 1
   # The form_attributes allows the ORM (SQLModel) to convert the data from the database to the data of the response.
   model_config = ConfigDict(from_attributes=True)
 
+# Subset of ProductResponse for sparse fieldsets (?fields=id,price), one model per combination
+@lru_cache(maxsize=128)
+def partial_product_response(fields: tuple[str, ...]) -> type[BaseModel]:
+  return create_model(
+    "ProductPartialResponse",
+    __config__=ConfigDict(from_attributes=True),
+    **{field: (ProductResponse.model_fields[field].annotation, ProductResponse.model_fields[field]) for field in fields}
+  )
+
 class ProductUpdate(BaseModel):
   name: Optional[str] = Field(default=None, min_length=1, max_length=255)
   price: Optional[float] = Field(default=None, gt=0)
@@ -38,4 +50,38 @@ class ProductUpdate(BaseModel):
       if v == "":
         raise ValueError("Name cannot be blank")
       return v
-    return v
\ No newline at end of file
+    return v
+
+# Schema for fetching many products at once (req)
+class ProductBatchRequest(BaseModel):
+  ids: list[int] = Field(min_length=1, description="Product ids to fetch")
+
+# Schema for the result of a batch fetch (res)
+class ProductBatchResponse(BaseModel):
+  data: list[ProductResponse]
+  # Ids that don't exist or were deleted, in request order
+  missing: list[int]
+
+# Schema for a single entry of the change feed (res)
+class ProductChangeResponse(BaseModel):
+  seq: int
+  product_id: int
+  operation: str
+  payload: Optional[dict] = None
+  created_at: datetime
+  model_config = ConfigDict(from_attributes=True)
+
+# Schema for a page of the change feed (res)
+class ProductChangesResponse(BaseModel):
+  changes: list[ProductChangeResponse]
+  # Cursor to send back as `since` on the next call: the last seq, or one per shard ("12.7") in sharded mode
+  last_seq: Union[int, str]
+
+
+# Schema for the catalog stats (res)
+class ProductStatsResponse(BaseModel):
+  total_count: int
+  available_count: int
+  average_price: Optional[float] = None
+  min_price: Optional[float] = None
+  max_price: Optional[float] = None
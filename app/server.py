@@ -0,0 +1,81 @@
+# Production entry point: a supervisor that pre-forks the API workers, one per core by default (see below)
+#
+#   python -m app.server --workers 4 --port 8000
+#
+# Workers are fresh interpreters that import the app themselves. Engines are only created on first
+# use, so each worker opens its own connections and none is ever shared between processes.
+# Each worker's pool gets an equal share of DB_MAX_CONNECTIONS (see Settings.DB_WORKER_CONNECTIONS).
+#
+# Change streams and the batch cache follow the writes of every worker through the outbox
+# (CHANGE_FANOUT_FROM_OUTBOX), compaction is serialized by an advisory lock. Rate limit buckets and the
+# Idempotency-Key store only live in process memory: while either is enabled, several workers are
+# refused and the default is a single one.
+#
+#   kill -HUP <pid>    rolling restart: workers are replaced one at a time. A stopping worker
+#                      stops accepting, drains in-flight requests (up to WORKER_GRACEFUL_TIMEOUT_SECONDS)
+#                      and runs the lifespan shutdown while the others keep serving
+#   kill -TERM <pid>   graceful stop of every worker
+import argparse
+import os
+import socket
+from typing import Optional
+import uvicorn
+from colorama import Fore, Style
+from uvicorn.supervisors import Multiprocess
+from app.core.config import settings
+from app.core.shutdown import begin_shutdown
+
+class DrainingServer(uvicorn.Server):
+    # uvicorn only runs the lifespan shutdown once every connection is closed or timeout_graceful_shutdown
+    # has passed, open streams and long polls would hold the worker that long. Start the drain as soon as
+    # the server is asked to exit (signal or should_exit), before it waits for the connections
+    async def shutdown(self, sockets: Optional[list[socket.socket]] = None) -> None:
+        begin_shutdown()
+        await super().shutdown(sockets)
+
+def worker_count(requested: Optional[int] = None) -> int:
+    explicit = requested or settings.WEB_CONCURRENCY
+    if explicit:
+        return explicit
+    # One per core is only a safe default when no state is kept in process memory
+    if settings.PROCESS_LOCAL_FEATURES:
+        return 1
+    return os.cpu_count() or 1
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the API with one worker process per core")
+    parser.add_argument("--workers", type=int, default=None, help="Defaults to WEB_CONCURRENCY, then the number of cores (1 with rate limits or idempotency keys enabled)")
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=8000)
+    args = parser.parse_args()
+
+    workers = worker_count(args.workers)
+    if workers > 1 and settings.PROCESS_LOCAL_FEATURES:
+        # Each worker would enforce its own limits and forget the keys seen by the others
+        features = ", ".join(settings.PROCESS_LOCAL_FEATURES)
+        print(Fore.RED + f"{workers} workers requested but {features} only work within one process, disable them or run a single worker" + Style.RESET_ALL)
+        raise SystemExit(1)
+    if settings.DB_MAX_CONNECTIONS is not None and settings.DB_MAX_CONNECTIONS < workers:
+        print(Fore.YELLOW + f"DB_MAX_CONNECTIONS={settings.DB_MAX_CONNECTIONS} is less than {workers} workers, each worker still gets 1 connection" + Style.RESET_ALL)
+
+    # Workers inherit the environment, this is how they know which share of the connections is theirs
+    os.environ["WEB_CONCURRENCY"] = str(workers)
+
+    config = uvicorn.Config(
+        "app.main:app",
+        host=args.host,
+        port=args.port,
+        workers=workers,
+        timeout_graceful_shutdown=settings.WORKER_GRACEFUL_TIMEOUT_SECONDS,
+    )
+    # What uvicorn.run does, with the draining server in every worker
+    server = DrainingServer(config)
+    if workers > 1:
+        Multiprocess(config, target=server.run, sockets=[config.bind_socket()]).run()
+    else:
+        server.run()
+        if not server.started:
+            raise SystemExit(3)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,54 @@
+# ✅ RESPONSABILITIES OF SERVICE : 
+# 1. Tail the change outbox of every database, in commit order
+# 2. Publish every committed change to this worker's stream subscribers and invalidate its cache
+# 3. MUST NOT contain HTTP 
+
+import asyncio
+from typing import Callable
+from colorama import Fore, Style
+from sqlalchemy.ext.asyncio import async_sessionmaker
+from app.core.broker import product_broker
+from app.core.cache import product_cache
+from app.core.config import settings
+from app.services.product_service import change_event, publishes_from_outbox
+from app.services.sharded_product_service import get_product_service
+
+class ChangeFanout:
+    def __init__(self, get_session_factory: Callable[[], async_sessionmaker], page_size: int = settings.CHANGES_PAGE_SIZE):
+        self.get_session_factory = get_session_factory
+        self.page_size = page_size
+        # One seq per shard, only set once the outbox was reached
+        self.cursor = None
+
+    async def poll(self) -> int:
+        # Publishes the next page of committed changes, returns how many there were
+        async with self.get_session_factory()() as session:
+            service = get_product_service(session)
+            if self.cursor is None:
+                # Streams replay what happened before they opened from the outbox, only new changes are fanned out
+                self.cursor = await service.get_change_cursor()
+            page = await service.get_change_page(self.cursor, self.page_size)
+
+        sharded = service.shard_count > 1
+        for shard, change in page:
+            self.cursor[shard] = change.seq
+            product_cache.invalidate(change.product_id)
+            product_broker.publish(change_event(change, shard if sharded else None))
+        return len(page)
+
+async def run_change_fanout(get_session_factory: Callable[[], async_sessionmaker], interval_seconds: float = settings.CHANGES_POLL_INTERVAL_SECONDS):
+    # Background loop started from the app lifespan of every worker, it stops right away when writers publish
+    # their own changes. Only looks at the dialect, the database isn't reached before the first poll
+    if not publishes_from_outbox(get_session_factory().kw["bind"].dialect.name):
+        return
+    fanout = ChangeFanout(get_session_factory)
+    while True:
+        try:
+            # A full page means more is waiting, read it right away
+            if await fanout.poll() == fanout.page_size:
+                continue
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            print(Fore.RED + f"Change fan-out failed: {e}" + Style.RESET_ALL)
+        await asyncio.sleep(interval_seconds)
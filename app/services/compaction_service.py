@@ -0,0 +1,128 @@
+# ✅ RESPONSABILITIES OF SERVICE : 
+# 1. Purge soft deleted products (tombstones) in small batches
+# 2. Prune the change feed past its retention, in small batches too
+# 3. Keep purges short so they never hold locks on the product table for long
+# 4. MUST NOT contain HTTP 
+
+import asyncio
+from datetime import timedelta
+from typing import Callable
+from colorama import Fore, Style
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+from sqlalchemy import func
+from sqlmodel import select, delete, update
+from app.core.config import settings
+from app.models.products.product import Product
+from app.models.products.product_change import ProductChange, ProductChangeRetention
+from app.helpers.format_date import now_without_microseconds
+
+# Every worker runs the compaction loop: on PostgreSQL a batch only runs while holding this
+# transaction lock, so workers never purge the same database at the same time
+TRY_COMPACTION_LOCK = select(func.pg_try_advisory_xact_lock(7270, 0))
+
+class CompactionService:
+    def __init__(self, session: AsyncSession):
+        self.session = session
+
+    async def purge_tombstones(self, retention_seconds: float, batch_size: int) -> int:
+        if not await self._try_lock():
+            return 0
+
+        cutoff = now_without_microseconds() - timedelta(seconds=retention_seconds)
+        batch = (
+            select(Product.id)
+            .where(Product.deleted_at.is_not(None), Product.deleted_at <= cutoff)
+            .limit(batch_size)
+        )
+        result = await self.session.execute(
+            delete(Product).where(Product.id.in_(batch)).execution_options(synchronize_session=False)
+        )
+        # Commit every batch so locks are released right away
+        await self.session.commit()
+
+        return result.rowcount
+
+    async def prune_changes(self, retention_seconds: float, batch_size: int) -> int:
+        if not await self._try_lock():
+            return 0
+
+        # Oldest changes first, so what is left is always every change after pruned_seq
+        cutoff = now_without_microseconds() - timedelta(seconds=retention_seconds)
+        batch = (
+            select(ProductChange.seq)
+            .where(ProductChange.created_at <= cutoff)
+            .order_by(ProductChange.seq)
+            .limit(batch_size)
+            .subquery()
+        )
+        pruned_seq = (await self.session.execute(select(func.max(batch.c.seq)))).scalar()
+        if pruned_seq is None:
+            await self.session.rollback()
+            return 0
+
+        result = await self.session.execute(delete(ProductChange).where(ProductChange.seq <= pruned_seq))
+        # Same transaction: a reader never sees the changes gone without the new pruned_seq
+        await self.session.execute(
+            update(ProductChangeRetention).where(ProductChangeRetention.id == 1).values(pruned_seq=pruned_seq)
+        )
+        await self.session.commit()
+
+        return result.rowcount
+
+    async def _try_lock(self) -> bool:
+        if self.session.get_bind().dialect.name == "postgresql":
+            if not (await self.session.execute(TRY_COMPACTION_LOCK)).scalar():
+                # Another worker is purging this database, leave the rest to it
+                await self.session.rollback()
+                return False
+        return True
+
+    async def compact(
+        self,
+        retention_seconds: float = settings.COMPACTION_RETENTION_SECONDS,
+        batch_size: int = settings.COMPACTION_BATCH_SIZE,
+        max_batches: int = settings.COMPACTION_MAX_BATCHES,
+        pause_seconds: float = settings.COMPACTION_BATCH_PAUSE_SECONDS,
+    ) -> int:
+        return await self._in_batches(self.purge_tombstones, retention_seconds, batch_size, max_batches, pause_seconds)
+
+    async def compact_changes(
+        self,
+        retention_seconds: float = settings.CHANGES_RETENTION_SECONDS,
+        batch_size: int = settings.COMPACTION_BATCH_SIZE,
+        max_batches: int = settings.COMPACTION_MAX_BATCHES,
+        pause_seconds: float = settings.COMPACTION_BATCH_PAUSE_SECONDS,
+    ) -> int:
+        return await self._in_batches(self.prune_changes, retention_seconds, batch_size, max_batches, pause_seconds)
+
+    async def _in_batches(self, purge, retention_seconds: float, batch_size: int, max_batches: int, pause_seconds: float) -> int:
+        purged = 0
+        for _ in range(max_batches):
+            deleted = await purge(retention_seconds, batch_size)
+            purged += deleted
+            if deleted < batch_size:
+                break
+            # Leave room for regular traffic between batches
+            await asyncio.sleep(pause_seconds)
+
+        return purged
+
+async def run_compaction(get_session_factories: Callable[[], list[async_sessionmaker]], interval_seconds: float = settings.COMPACTION_INTERVAL_SECONDS):
+    # Background loop started from the app lifespan, the engines are only needed once it wakes up.
+    # One session factory per database: in sharded mode every shard purges its own tombstones
+    while True:
+        await asyncio.sleep(interval_seconds)
+        for session_factory in get_session_factories():
+            try:
+                async with session_factory() as session:
+                    service = CompactionService(session)
+                    purged = await service.compact()
+                    pruned = await service.compact_changes()
+                if purged:
+                    print(Fore.GREEN + f"Compaction purged {purged} deleted products ✅" + Style.RESET_ALL)
+                if pruned:
+                    print(Fore.GREEN + f"Compaction pruned {pruned} changes past retention ✅" + Style.RESET_ALL)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(Fore.RED + f"Compaction failed: {e}" + Style.RESET_ALL)
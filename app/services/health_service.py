@@ -0,0 +1,55 @@
+# ✅ RESPONSABILITIES OF SERVICE : 
+# 1. Decide if this worker should receive traffic (readiness)
+# 2. Check the databases, the connection pools and the event loop
+# 3. MUST NOT contain HTTP 
+
+import asyncio
+from typing import Optional
+from sqlalchemy.ext.asyncio import AsyncEngine
+from app.core.config import settings
+from app.core.db import get_engine
+from app.core.health import database_ping, event_loop_monitor
+from app.core.sharding import get_shard_router
+
+class HealthService:
+    def __init__(self, engines: list[AsyncEngine]):
+        self.engines = engines
+
+    async def readiness(self) -> dict:
+        databases = await asyncio.gather(*[database_ping.check(engine) for engine in self.engines])
+        pools = [self._pool_usage(engine) for engine in self.engines]
+        lag = event_loop_monitor.lag
+
+        failing = []
+        if not all(database["ok"] for database in databases):
+            failing.append("database")
+        if any(pool["utilization"] is not None and pool["utilization"] >= settings.READINESS_MAX_POOL_UTILIZATION for pool in pools):
+            failing.append("pool")
+        if lag is not None and lag > settings.READINESS_MAX_LOOP_LAG_SECONDS:
+            failing.append("event_loop")
+
+        return {
+            "ready": not failing,
+            "failing": failing,
+            "checks": {
+                "databases": databases,
+                "pools": pools,
+                "event_loop": {"lag_seconds": None if lag is None else round(lag, 4)},
+            },
+        }
+
+    def _pool_usage(self, engine: AsyncEngine) -> dict:
+        # Pools without a size (NullPool, StaticPool) can't saturate
+        pool = engine.pool
+        checked_out: Optional[int] = pool.checkedout() if hasattr(pool, "checkedout") else None
+        capacity = settings.DB_WORKER_CONNECTIONS
+        return {
+            "checked_out": checked_out,
+            "capacity": capacity,
+            "utilization": None if checked_out is None else round(checked_out / capacity, 4),
+        }
+
+def get_health_service() -> HealthService:
+    # The shards when sharding is on, requests never use the main engine then
+    router = get_shard_router()
+    return HealthService(router.engines if router is not None else [get_engine()])
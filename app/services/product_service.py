@@ -5,96 +5,377 @@
 # 4. Db operations
 # 5. MUST NOT contain HTTP 
 
+import asyncio
+import time
+from typing import Optional
+from sqlalchemy import Text, bindparam, case, cast, delete, func, lambda_stmt, literal_column
+from sqlalchemy.dialects.postgresql import aggregate_order_by
 from app.core.db import AsyncSessionDependency
+from app.core.config import settings
+from app.core.broker import product_broker
+from app.core.cache import product_cache
+from app.core.shutdown import request_drain
 from app.models.products.product import Product
-from app.schemas.product import ProductCreate, ProductUpdate
-from app.errors.product_errors import ProductNotFoundError, DuplicateProductNameError, NoFieldsToUpdateError
-from sqlmodel import select
+from app.models.products.product_change import ProductChange, ProductChangeRetention, ChangeOperation
+from app.models.products.product_stats import PRODUCT_STATS_STRIPES, ProductStats, stats_stripe
+from app.schemas.product import ProductCreate, ProductUpdate, ProductResponse, ProductChangeResponse
+from app.errors.product_errors import ProductNotFoundError, DuplicateProductNameError, NoFieldsToUpdateError, ProductVersionConflictError, ChangeCursorExpiredError
+from sqlmodel import select, update
 from app.helpers.format_date import now_without_microseconds
+from app.helpers.json_rows import dump_rows, trusted_dump
+
+# Prebuilt statements: constructed once at import, every call only binds its parameters,
+# so the request path skips building the statement and computing its cache key.
+LIVE_PRODUCTS = select(Product).where(Product.deleted_at.is_(None))
+
+LIVE_PRODUCT_ID_BY_NAME = select(Product.id).where(Product.name == bindparam("name"), Product.deleted_at.is_(None))
+
+LIVE_PRICE_RANGE = select(func.min(Product.price), func.max(Product.price)).where(Product.deleted_at.is_(None))
+
+# Sum of the striped counter rows, NULL when the table has no rows
+STATS_SUMMARY = select(func.sum(ProductStats.total_count), func.sum(ProductStats.available_count), func.sum(ProductStats.price_sum))
+
+APPLY_STATS_DELTA = (
+    update(ProductStats)
+    .where(ProductStats.id == bindparam("stripe"))
+    .values(
+        total_count=ProductStats.total_count + bindparam("total"),
+        available_count=ProductStats.available_count + bindparam("available"),
+        price_sum=ProductStats.price_sum + bindparam("price"),
+    )
+)
+
+# Core statement for the read fast path: the ProductResponse columns of every live product
+LIVE_PRODUCT_ROWS = (
+    select(*[Product.__table__.c[field] for field in ProductResponse.model_fields])
+    .where(Product.__table__.c.deleted_at.is_(None))
+    .order_by(Product.__table__.c.id)
+)
+
+CHANGE_HORIZON = select(func.change_horizon())
+
+PRUNED_CHANGE_SEQ = select(ProductChangeRetention.pruned_seq).where(ProductChangeRetention.id == 1)
+
+# Retention and commit horizon in one round trip (PostgreSQL)
+CHANGE_WINDOW = select(PRUNED_CHANGE_SEQ.scalar_subquery(), func.change_horizon())
+
+LAST_CHANGE_SEQ = select(func.coalesce(func.max(ProductChange.seq), 0))
+
+# Full scan of the live catalog: count, available count and price sum
+LIVE_PRODUCT_TOTALS = select(
+    func.count(),
+    func.coalesce(func.sum(case((Product.available, 1), else_=0)), 0),
+    func.coalesce(func.sum(Product.price), 0),
+).where(Product.deleted_at.is_(None))
+
+def summarize_stats(total_count: int, available_count: int, price_sum: float, min_price: Optional[float], max_price: Optional[float]) -> dict:
+    return {
+        "total_count": total_count,
+        "available_count": available_count,
+        "price_sum": price_sum,
+        "average_price": price_sum / total_count if total_count else None,
+        "min_price": min_price,
+        "max_price": max_price,
+    }
+
+def change_event(change: ProductChange, shard: Optional[int] = None) -> dict:
+    # What stream subscribers receive, the shard tells them which part of the cursor the seq belongs to
+    event = ProductChangeResponse.model_validate(change).model_dump(mode="json")
+    if shard is not None:
+        event["shard"] = shard
+    return event
+
+def publishes_from_outbox(dialect: str) -> bool:
+    # PostgreSQL allocates seq at INSERT, so commits can land out of seq order and only the outbox read
+    # below the commit horizon is in order (ChangeFanout). Several workers also need it to see each
+    # other's writes. SQLite serializes writers, a single worker publishes right after commit
+    return dialect == "postgresql" or settings.CHANGE_FANOUT_OUTBOX_ENABLED
 
 class ProductService:
-    def __init__(self, session: AsyncSessionDependency):
+    # A single database is a change feed with one shard
+    shard_count = 1
+
+    def __init__(self, session: AsyncSessionDependency, shard: Optional[int] = None):
         self.session = session
+        # Set by ShardedProductService, published events then say which shard's seq they carry
+        self.shard = shard
 
-    async def create_product(self, product_data: ProductCreate):
+    async def create_product(self, product_data: ProductCreate, product_id: Optional[int] = None):
 
         # Check if a product already exists with the same name
-        existing_product = await self.session.execute(select(Product).where(Product.name == product_data.name))
+        existing_product = await self.session.execute(LIVE_PRODUCT_ID_BY_NAME, {"name": product_data.name})
         if existing_product.first():
             raise DuplicateProductNameError(f"Product with name {product_data.name} already exists")
 
         # Create the product
         product_data_dict = product_data.model_dump()
         product = Product(**product_data_dict)
+        # Only set when the id is allocated by the caller (sharded mode)
+        if product_id is not None:
+            product.id = product_id
         self.session.add(product)
+        # Flush to get the id before writing the change record in the same transaction
+        await self.session.flush()
+        await self._apply_stats_delta(product.id, 1, int(product.available), product.price)
+        change = self._record_change(product, ChangeOperation.CREATED)
+        # Every column is set client side or at the flush, with expire_on_commit=False nothing needs reloading
         await self.session.commit()
-        await self.session.refresh(product)
+        self._publish(change)
 
         return product
     
-    async def get_all_products(self):
-        result = await self.session.execute(select(Product))
+    async def get_all_products(self, fields: Optional[list[str]] = None):
+        if fields:
+            result = await self.session.execute(self._select_fields(fields).where(Product.deleted_at.is_(None)))
+            return result.all()
+
+        result = await self.session.execute(LIVE_PRODUCTS)
         return result.scalars().all()
     
-    async def get_product_by_id(self, product_id: int):
-        product_db = await self.session.get(Product, product_id)
+    async def get_all_products_json(self) -> str:
+        # Read only fast path: no identity map, no instrumentation, no pydantic revalidation
+        if self.session.get_bind().dialect.name == "postgresql":
+            # Let the database build the whole JSON array
+            rows = LIVE_PRODUCT_ROWS.subquery("p")
+            result = await self.session.execute(
+                select(func.coalesce(cast(func.json_agg(aggregate_order_by(literal_column("p"), rows.c.id)), Text), "[]"))
+            )
+            return result.scalar_one()
+
+        return dump_rows(await self.get_all_product_rows())
+
+    async def get_all_product_rows(self) -> list[dict]:
+        result = await self.session.execute(LIVE_PRODUCT_ROWS)
+        return [dict(row) for row in result.mappings()]
+
+    async def get_product_by_id(self, product_id: int, fields: Optional[list[str]] = None):
+        if fields:
+            result = await self.session.execute(
+                self._select_fields(fields).where(Product.id == product_id, Product.deleted_at.is_(None))
+            )
+            product_db = result.first()
+        else:
+            product_db = await self._get_live_product(product_id)
 
         if not product_db: 
             raise ProductNotFoundError("Product not found or does not exist")
 
         return product_db
+
+    async def get_products_by_ids(self, product_ids: list[int]):
+        # One round-trip for the whole batch, ids that don't exist are simply not returned
+        result = await self.session.execute(
+            lambda_stmt(lambda: select(Product).where(Product.id.in_(product_ids), Product.deleted_at.is_(None)))
+        )
+        return result.scalars().all()
     
-    async def update_product(self, product_id: int, product_data: ProductUpdate):
-        product_db = await self.session.get(Product, product_id)
+    async def update_product(self, product_id: int, product_data: ProductUpdate, expected_version: Optional[int] = None):
+        product_db = None
+        for _ in range(settings.UPDATE_MAX_ATTEMPTS):
+            if product_db is not None:
+                # Lost the race to another writer: read the row again instead of keeping the stale copy
+                self.session.expire(product_db)
+            product_db = await self._get_live_product(product_id)
 
-        # Check if the product exists
-        if not product_db:
-            raise ProductNotFoundError("Product not found or does not exist")
-        
-        # Check if at least one field is provided to update the product
-        if not any([
-            product_data.name is not None,
-            product_data.price is not None,
-            product_data.available is not None
-        ]):
-            raise NoFieldsToUpdateError("At least one field must be provided to update the product")
-        
-        # Check if already exists a product with the same name
-        if product_data.name and product_data.name != product_db.name: 
-            result = await self.session.execute(select(Product).where(Product.name == product_data.name))
-            existing_product = result.scalar_one_or_none()
-            if existing_product:
-                raise DuplicateProductNameError(f"Product with name {product_data.name} already exists")
-
-        # Update only the fields that are provided (not None)
-        update_data = {}
-        if product_data.name is not None:
-            update_data["name"] = product_data.name
-        if product_data.price is not None:
-            update_data["price"] = product_data.price
-        if product_data.available is not None:
-            update_data["available"] = product_data.available
-        
-        # Update the product with only the provided fields
-        for field, value in update_data.items():
-            setattr(product_db, field, value)
-        
-        # Update the timestamp manually
-        product_db.updated_at = now_without_microseconds()
-        
-        self.session.add(product_db)
+            # Check if the product exists (it may also have been deleted since the last attempt)
+            if not product_db:
+                raise ProductNotFoundError("Product not found or does not exist")
+
+            # Check the version the client based its changes on (If-Match)
+            if expected_version is not None and expected_version != product_db.version:
+                raise ProductVersionConflictError(f"Product was modified, current version is {product_db.version}")
+
+            # Check if at least one field is provided to update the product
+            if not any([
+                product_data.name is not None,
+                product_data.price is not None,
+                product_data.available is not None
+            ]):
+                raise NoFieldsToUpdateError("At least one field must be provided to update the product")
+
+            # Check if already exists a product with the same name
+            if product_data.name and product_data.name != product_db.name:
+                result = await self.session.execute(LIVE_PRODUCT_ID_BY_NAME, {"name": product_data.name})
+                if result.first():
+                    raise DuplicateProductNameError(f"Product with name {product_data.name} already exists")
+
+            # Update only the fields that are provided (not None)
+            update_data = {}
+            if product_data.name is not None:
+                update_data["name"] = product_data.name
+            if product_data.price is not None:
+                update_data["price"] = product_data.price
+            if product_data.available is not None:
+                update_data["available"] = product_data.available
+
+            # Update the timestamp manually
+            update_data["updated_at"] = now_without_microseconds()
+
+            # Kept before the UPDATE below overwrites product_db, the stats need the difference
+            previous_price, previous_available = product_db.price, product_db.available
+
+            # Conditional UPDATE: only applies if nobody else wrote the row since we read it
+            result = await self.session.execute(
+                update(Product)
+                .where(Product.id == product_id, Product.version == product_db.version, Product.deleted_at.is_(None))
+                .values(**update_data, version=Product.version + 1)
+                .returning(Product)
+                .execution_options(populate_existing=True)
+            )
+            updated = result.scalar_one_or_none()
+            if updated:
+                break
+        else:
+            raise ProductVersionConflictError("Product kept being modified by other requests, fetch it again and retry")
+
+        await self._apply_stats_delta(updated.id, 0, int(updated.available) - int(previous_available), updated.price - previous_price)
+        change = self._record_change(updated, ChangeOperation.UPDATED)
         await self.session.commit()
-        await self.session.refresh(product_db)
+        self._publish(change)
 
-        return product_db
+        return updated
     
     async def delete_product(self, product_id: int):
-        product_db = await self.session.get(Product, product_id)
+        # Soft delete: a single UPDATE, the row is purged later by the compaction task.
+        # Computed outside the lambda, values inside it are only evaluated when the statement is first built
+        deleted_at = now_without_microseconds()
+        result = await self.session.execute(
+            lambda_stmt(lambda: (
+                update(Product)
+                .where(Product.id == product_id, Product.deleted_at.is_(None))
+                .values(deleted_at=deleted_at, version=Product.version + 1)
+                .returning(Product)
+            ))
+        )
+        product_db = result.scalar_one_or_none()
 
         if not product_db:
             raise ProductNotFoundError("Product not found or does not exist")
         
-        await self.session.delete(product_db)
+        await self._apply_stats_delta(product_db.id, -1, -int(product_db.available), -product_db.price)
+        change = self._record_change(product_db, ChangeOperation.DELETED)
+        await self.session.commit()
+        self._publish(change)
+
+        return product_db
+
+    async def get_stats(self) -> dict:
+        totals = (await self.session.execute(STATS_SUMMARY)).one()
+        if totals[0] is None:
+            # Summary rows missing (table not seeded yet), fall back to scanning the catalog
+            totals = (await self.session.execute(LIVE_PRODUCT_TOTALS)).one()
+
+        # Served by the partial index on live prices, not a scan
+        min_price, max_price = (await self.session.execute(LIVE_PRICE_RANGE)).one()
+
+        return summarize_stats(totals[0], totals[1], totals[2], min_price, max_price)
+
+    async def rebuild_stats(self):
+        # Recompute the summary from a full scan, for writes that bypass the service (bulk loads).
+        # The first stripe gets the totals, the others start again from zero
+        total_count, available_count, price_sum = (await self.session.execute(LIVE_PRODUCT_TOTALS)).one()
+        await self.session.execute(delete(ProductStats))
+        self.session.add(ProductStats(id=1, total_count=total_count, available_count=available_count, price_sum=price_sum))
+        self.session.add_all([ProductStats(id=stripe) for stripe in range(2, PRODUCT_STATS_STRIPES + 1)])
         await self.session.commit()
 
-        return product_db
\ No newline at end of file
+    async def get_changes(self, since: int = 0, limit: int = settings.CHANGES_PAGE_SIZE, product_ids: Optional[list[int]] = None):
+        statement = select(ProductChange).where(ProductChange.seq > since)
+        pruned_seq, horizon = await self._change_window(since)
+        if since < pruned_seq:
+            raise ChangeCursorExpiredError(f"Changes after {since} were pruned, reload the products and resume from a new cursor")
+        if horizon is not None:
+            # Never skip past a seq whose transaction hasn't committed yet, it is returned by a later call
+            statement = statement.where(ProductChange.seq < horizon)
+        if product_ids:
+            statement = statement.where(ProductChange.product_id.in_(product_ids))
+
+        result = await self.session.execute(statement.order_by(ProductChange.seq).limit(limit))
+        return result.scalars().all()
+
+    async def wait_for_changes(self, since: int = 0, limit: int = settings.CHANGES_PAGE_SIZE, timeout: float = 0):
+        # Long polling: keep asking for new changes until there is something to return or the timeout expires
+        deadline = time.monotonic() + min(timeout, settings.CHANGES_MAX_WAIT_SECONDS)
+        while True:
+            changes = await self.get_changes(since, limit)
+            remaining = deadline - time.monotonic()
+            # A shutting down worker answers right away, the client polls again on another one
+            if changes or remaining <= 0 or request_drain.draining:
+                return changes
+
+            # End the read transaction so the connection goes back to the pool while waiting
+            await self.session.commit()
+            await asyncio.sleep(min(settings.CHANGES_POLL_INTERVAL_SECONDS, remaining))
+
+    # Cursor based variants shared with ShardedProductService: a cursor is one seq per shard,
+    # every change comes with the shard it was read from
+    async def get_change_page(self, cursor: list[int], limit: int, product_ids: Optional[list[int]] = None):
+        return [(0, change) for change in await self.get_changes(cursor[0], limit, product_ids)]
+
+    async def wait_for_change_page(self, cursor: list[int], limit: int, timeout: float = 0):
+        return [(0, change) for change in await self.wait_for_changes(cursor[0], limit, timeout)]
+
+    async def get_change_cursor(self) -> list[int]:
+        # Every change up to this cursor is committed, a stream starting now resumes from here
+        horizon = await self._change_horizon()
+        if horizon is not None:
+            return [horizon - 1]
+        return [(await self.session.execute(LAST_CHANGE_SEQ)).scalar()]
+
+    async def _change_window(self, since: int) -> tuple[int, Optional[int]]:
+        # Last pruned seq and commit horizon
+        if not since:
+            # since=0 reads from the oldest change still kept, there is no retention to check
+            return 0, await self._change_horizon()
+        if self.session.get_bind().dialect.name != "postgresql":
+            return (await self.session.execute(PRUNED_CHANGE_SEQ)).scalar() or 0, await self._change_horizon()
+        pruned_seq, horizon = (await self.session.execute(CHANGE_WINDOW)).one()
+        return pruned_seq or 0, horizon
+
+    async def _change_horizon(self) -> Optional[int]:
+        # Lowest seq still held by an open transaction, or the next one (migration 0007). It takes no
+        # lock, so a cancelled or timed out call leaves nothing behind.
+        # SQLite serializes writers, there seq order is already commit order
+        if self.session.get_bind().dialect.name != "postgresql":
+            return None
+        return (await self.session.execute(CHANGE_HORIZON)).scalar()
+
+    def _select_fields(self, fields: list[str]):
+        # Column-pruned select returning plain rows instead of ORM entities.
+        # The id is always included so rows can be merged and ordered (sharded mode)
+        columns = [Product.id] + [getattr(Product, field) for field in fields if field != "id"]
+        return select(*columns)
+
+    async def _apply_stats_delta(self, product_id: int, total: int, available: int, price: float):
+        # Relative UPDATE in the caller's transaction, concurrent writers never overwrite each other.
+        # A rename changes nothing here, it doesn't need to lock a stripe at all
+        if not (total or available or price):
+            return
+        await self.session.execute(
+            APPLY_STATS_DELTA,
+            {"stripe": stats_stripe(product_id), "total": total, "available": available, "price": price},
+        )
+
+    async def _get_live_product(self, product_id: int):
+        # Hottest statement: lambda_stmt builds and compiles it once, later calls only bind product_id
+        result = await self.session.execute(
+            lambda_stmt(lambda: select(Product).where(Product.id == product_id, Product.deleted_at.is_(None)))
+        )
+        return result.scalar_one_or_none()
+
+    def _record_change(self, product: Product, operation: ChangeOperation):
+        # Outbox record, committed atomically with the product mutation
+        change = ProductChange(
+            product_id=product.id,
+            operation=operation,
+            payload=trusted_dump(product, ProductResponse),
+        )
+        self.session.add(change)
+        return change
+
+    def _publish(self, change: ProductChange):
+        # Only called after commit, so subscribers never see a change that was rolled back
+        product_cache.invalidate(change.product_id)
+        # Otherwise the outbox fan-out publishes every change in seq order, this worker's own included
+        if not publishes_from_outbox(self.session.get_bind().dialect.name):
+            product_broker.publish(change_event(change, self.shard))
\ No newline at end of file
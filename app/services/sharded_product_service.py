@@ -0,0 +1,157 @@
+# ✅ RESPONSABILITIES OF SERVICE : 
+# 1. Route product operations to the shard that owns the product
+# 2. Fan out list queries to every shard concurrently and merge the results
+# 3. Keep product names unique across shards
+# 4. Merge the shards' change feeds, tracking one cursor per shard
+# 5. MUST NOT contain HTTP 
+
+import asyncio
+import heapq
+import itertools
+import time
+from typing import Optional, Union
+from sqlalchemy import func
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlmodel import select
+from app.core.config import settings
+from app.core.sharding import ShardRouter, get_shard_router
+from app.core.shutdown import request_drain
+from app.models.products.product import Product
+from app.schemas.product import ProductCreate, ProductUpdate
+from app.errors.product_errors import DuplicateProductNameError
+from app.helpers.json_rows import dump_rows
+from app.services.product_service import LIVE_PRODUCT_ID_BY_NAME, ProductService, summarize_stats
+
+class ShardedProductService:
+    def __init__(self, router: ShardRouter):
+        self.router = router
+
+    @property
+    def shard_count(self) -> int:
+        return self.router.count
+
+    async def create_product(self, product_data: ProductCreate):
+        await self._check_name_available(product_data.name)
+
+        shard = self.router.shard_for_name(product_data.name)
+        async with self.router.session(shard) as session:
+            product_id = await self._next_id(session, shard)
+            return await ProductService(session, shard).create_product(product_data, product_id)
+
+    async def get_all_products(self, fields: Optional[list[str]] = None):
+        results = await asyncio.gather(*[
+            self._get_all_from_shard(shard, fields) for shard in range(self.router.count)
+        ])
+        return sorted((product for products in results for product in products), key=lambda product: product.id)
+
+    async def get_all_products_json(self) -> str:
+        return dump_rows(await self.get_all_product_rows())
+
+    async def get_all_product_rows(self) -> list[dict]:
+        async def rows_from_shard(shard: int):
+            async with self.router.session(shard) as session:
+                return await ProductService(session).get_all_product_rows()
+
+        results = await asyncio.gather(*[rows_from_shard(shard) for shard in range(self.router.count)])
+        return sorted((row for shard_rows in results for row in shard_rows), key=lambda row: row["id"])
+
+    async def get_stats(self) -> dict:
+        async def stats_from_shard(shard: int):
+            async with self.router.session(shard) as session:
+                return await ProductService(session).get_stats()
+
+        shards = await asyncio.gather(*[stats_from_shard(shard) for shard in range(self.router.count)])
+        min_prices = [stats["min_price"] for stats in shards if stats["min_price"] is not None]
+        max_prices = [stats["max_price"] for stats in shards if stats["max_price"] is not None]
+        return summarize_stats(
+            sum(stats["total_count"] for stats in shards),
+            sum(stats["available_count"] for stats in shards),
+            sum(stats["price_sum"] for stats in shards),
+            min(min_prices, default=None),
+            max(max_prices, default=None),
+        )
+
+    async def get_product_by_id(self, product_id: int, fields: Optional[list[str]] = None):
+        async with self.router.session(self.router.shard_for_id(product_id)) as session:
+            return await ProductService(session).get_product_by_id(product_id, fields)
+
+    async def get_products_by_ids(self, product_ids: list[int]):
+        by_shard: dict[int, list[int]] = {}
+        for product_id in product_ids:
+            by_shard.setdefault(self.router.shard_for_id(product_id), []).append(product_id)
+
+        async def get_from_shard(shard: int, ids: list[int]):
+            async with self.router.session(shard) as session:
+                return await ProductService(session).get_products_by_ids(ids)
+
+        results = await asyncio.gather(*[get_from_shard(shard, ids) for shard, ids in by_shard.items()])
+        return [product for products in results for product in products]
+
+    async def update_product(self, product_id: int, product_data: ProductUpdate, expected_version: Optional[int] = None):
+        if product_data.name is not None:
+            await self._check_name_available(product_data.name, exclude_id=product_id)
+
+        shard = self.router.shard_for_id(product_id)
+        async with self.router.session(shard) as session:
+            return await ProductService(session, shard).update_product(product_id, product_data, expected_version)
+
+    async def delete_product(self, product_id: int):
+        shard = self.router.shard_for_id(product_id)
+        async with self.router.session(shard) as session:
+            return await ProductService(session, shard).delete_product(product_id)
+
+    async def get_change_page(self, cursor: list[int], limit: int, product_ids: Optional[list[int]] = None):
+        # Every shard has its own outbox and seq, each one is read from its own position in the cursor
+        async def page_from_shard(shard: int):
+            async with self.router.session(shard) as session:
+                changes = await ProductService(session, shard).get_changes(cursor[shard], limit, product_ids)
+                return [(shard, change) for change in changes]
+
+        pages = await asyncio.gather(*[page_from_shard(shard) for shard in range(self.router.count)])
+        # Roughly in time order across shards, never out of seq order within one
+        return list(itertools.islice(heapq.merge(*pages, key=lambda entry: entry[1].created_at), limit))
+
+    async def wait_for_change_page(self, cursor: list[int], limit: int, timeout: float = 0):
+        deadline = time.monotonic() + min(timeout, settings.CHANGES_MAX_WAIT_SECONDS)
+        while True:
+            page = await self.get_change_page(cursor, limit)
+            remaining = deadline - time.monotonic()
+            if page or remaining <= 0 or request_drain.draining:
+                return page
+            # Shard sessions only live for one poll, no connection is held while waiting
+            await asyncio.sleep(min(settings.CHANGES_POLL_INTERVAL_SECONDS, remaining))
+
+    async def get_change_cursor(self) -> list[int]:
+        async def cursor_of_shard(shard: int):
+            async with self.router.session(shard) as session:
+                return (await ProductService(session, shard).get_change_cursor())[0]
+
+        return list(await asyncio.gather(*[cursor_of_shard(shard) for shard in range(self.router.count)]))
+
+    async def _get_all_from_shard(self, shard: int, fields: Optional[list[str]] = None):
+        async with self.router.session(shard) as session:
+            return await ProductService(session).get_all_products(fields)
+
+    async def _check_name_available(self, name: str, exclude_id: Optional[int] = None):
+        # Renamed products stay on their original shard, so every shard has to be asked
+        async def find_on_shard(shard: int):
+            async with self.router.session(shard) as session:
+                result = await session.execute(LIVE_PRODUCT_ID_BY_NAME, {"name": name})
+                return result.scalars().all()
+
+        results = await asyncio.gather(*[find_on_shard(shard) for shard in range(self.router.count)])
+        if any(product_id != exclude_id for ids in results for product_id in ids):
+            raise DuplicateProductNameError(f"Product with name {name} already exists")
+
+    async def _next_id(self, session: AsyncSession, shard: int) -> Optional[int]:
+        # PostgreSQL shards use stepped sequences (ShardRouter.configure_id_sequences)
+        if session.bind.dialect.name == "postgresql":
+            return None
+        result = await session.execute(select(func.max(Product.id)))
+        return self.router.next_id_for_shard(shard, result.scalar())
+
+def get_product_service(session: AsyncSession) -> Union[ProductService, ShardedProductService]:
+    router = get_shard_router()
+    if router is not None:
+        return ShardedProductService(router)
+    return ProductService(session)
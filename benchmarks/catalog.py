@@ -0,0 +1,141 @@
+# Synthetic catalog generator for scale testing (1M-100M products)
+#
+#   python -m benchmarks.catalog --rows 1000000 --seed 42
+#   python -m benchmarks.catalog --rows 100000 --database-url sqlite+aiosqlite:///catalog.db
+#
+# Rows are deterministic for a given seed, so query plans and benchmarks can be compared run to run.
+# PostgreSQL is loaded with COPY, other databases with multi-row inserts. The change feed is not
+# written for synthetic rows, the stats summary is rebuilt once at the end.
+import argparse
+import asyncio
+import itertools
+import math
+import random
+import time
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Iterator, Optional
+from sqlalchemy import insert
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, create_async_engine
+from app.core.config import settings
+from app.models.products.product import Product
+from app.services.product_service import ProductService
+
+# Rows drawn from the same random generator, see generate_products
+SEED_CHUNK_ROWS = 10_000
+
+COLUMNS = ["name", "price", "available", "created_at", "updated_at", "version", "deleted_at"]
+
+# Weighted like a real catalog: a few very common words, a long tail of rare ones
+ADJECTIVES = ["Classic", "Premium", "Eco", "Compact", "Pro", "Ultra", "Smart", "Vintage", "Deluxe", "Basic", "Portable", "Wireless", "Ergonomic", "Heavy Duty", "Mini"]
+MATERIALS = ["Cotton", "Steel", "Wooden", "Leather", "Ceramic", "Glass", "Bamboo", "Aluminum", "Plastic", "Wool", "Silk", "Carbon"]
+NOUNS = ["Chair", "Lamp", "Backpack", "Mug", "Headphones", "Desk", "Jacket", "Bottle", "Keyboard", "Sofa", "Blender", "Watch", "Tent", "Speaker", "Notebook", "Pan", "Shelf", "Sneakers", "Monitor", "Rug"]
+
+@dataclass
+class CatalogSpec:
+  rows: int
+  seed: int = 42
+  available_ratio: float = 0.85
+  deleted_ratio: float = 0.0
+  # Lognormal prices: median ~e^mu, sigma controls how long the expensive tail is
+  price_mu: float = 3.4
+  price_sigma: float = 1.1
+  history_days: int = 3 * 365
+
+def _zipf_cum_weights(count: int, exponent: float = 1.1) -> list[float]:
+  return list(itertools.accumulate(1 / math.pow(rank, exponent) for rank in range(1, count + 1)))
+
+def _sku(index: int) -> str:
+  # Base 36 suffix keeps names unique without making them look sequential
+  digits = "0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZ"
+  value, sku = index + 36 ** 3, ""
+  while value:
+    value, remainder = divmod(value, 36)
+    sku = digits[remainder] + sku
+  return sku
+
+def generate_products(spec: CatalogSpec, now: Optional[datetime] = None) -> Iterator[tuple]:
+  now = (now or datetime(2025, 1, 1)).replace(microsecond=0)
+  adjective_weights, material_weights, noun_weights = (_zipf_cum_weights(len(words)) for words in (ADJECTIVES, MATERIALS, NOUNS))
+  history_seconds = spec.history_days * 86400
+
+  for chunk_start in range(0, spec.rows, SEED_CHUNK_ROWS):
+    # One generator per fixed size chunk: output doesn't depend on the batch size and any
+    # chunk can be regenerated on its own (e.g. by parallel loaders)
+    rng = random.Random(spec.seed * 1_000_003 + chunk_start // SEED_CHUNK_ROWS)
+    for index in range(chunk_start, min(chunk_start + SEED_CHUNK_ROWS, spec.rows)):
+      adjective = rng.choices(ADJECTIVES, cum_weights=adjective_weights)[0]
+      material = rng.choices(MATERIALS, cum_weights=material_weights)[0]
+      noun = rng.choices(NOUNS, cum_weights=noun_weights)[0]
+      name = f"{adjective} {material} {noun} {_sku(index)}"
+
+      # Mostly x.99 price points, skewed towards cheap products
+      price = max(0.99, math.floor(rng.lognormvariate(spec.price_mu, spec.price_sigma)) + 0.99)
+      created_at = now - timedelta(seconds=rng.randrange(history_seconds))
+      updated_at = min(now, created_at + timedelta(seconds=rng.randrange(90 * 86400)))
+      deleted_at = updated_at if rng.random() < spec.deleted_ratio else None
+
+      yield (name, round(price, 2), rng.random() < spec.available_ratio, created_at, updated_at, 1, deleted_at)
+
+def _batches(rows: Iterator[tuple], size: int) -> Iterator[list[tuple]]:
+  batch = []
+  for row in rows:
+    batch.append(row)
+    if len(batch) == size:
+      yield batch
+      batch = []
+  if batch:
+    yield batch
+
+async def _copy_batch(conn, batch: list[tuple]):
+  raw = await conn.get_raw_connection()
+  await raw.driver_connection.copy_records_to_table("product", records=batch, columns=COLUMNS)
+
+async def _insert_batch(conn, batch: list[tuple]):
+  await conn.execute(insert(Product.__table__), [dict(zip(COLUMNS, row)) for row in batch])
+
+async def load_catalog(engine: AsyncEngine, spec: CatalogSpec, batch_size: int = 5000, progress: bool = False) -> int:
+  write_batch = _copy_batch if engine.dialect.name == "postgresql" else _insert_batch
+  loaded = 0
+  started = time.perf_counter()
+
+  for batch in _batches(generate_products(spec), batch_size):
+    # One transaction per batch, a failed load keeps what was already written
+    async with engine.begin() as conn:
+      await write_batch(conn, batch)
+    loaded += len(batch)
+    if progress:
+      elapsed = time.perf_counter() - started
+      print(f"\r{loaded:>12,} / {spec.rows:,} rows  {loaded / elapsed:,.0f} rows/s", end="", flush=True)
+
+  if progress:
+    print()
+
+  async with AsyncSession(engine) as session:
+    await ProductService(session).rebuild_stats()
+  return loaded
+
+def main():
+  parser = argparse.ArgumentParser(description="Bulk load a synthetic product catalog")
+  parser.add_argument("--rows", type=int, default=1_000_000)
+  parser.add_argument("--seed", type=int, default=42)
+  parser.add_argument("--batch-size", type=int, default=5000)
+  parser.add_argument("--available-ratio", type=float, default=0.85)
+  parser.add_argument("--deleted-ratio", type=float, default=0.0, help="Share of soft deleted rows (tombstones)")
+  parser.add_argument("--database-url", default=None, help="Defaults to the configured database")
+  args = parser.parse_args()
+
+  spec = CatalogSpec(rows=args.rows, seed=args.seed, available_ratio=args.available_ratio, deleted_ratio=args.deleted_ratio)
+  engine = create_async_engine(args.database_url or settings.SQLALCHEMY_ASYNC_DATABASE_URI)
+
+  async def run():
+    try:
+      loaded = await load_catalog(engine, spec, args.batch_size, progress=True)
+      print(f"Loaded {loaded:,} products")
+    finally:
+      await engine.dispose()
+
+  asyncio.run(run())
+
+if __name__ == "__main__":
+  main()
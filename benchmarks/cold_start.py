@@ -0,0 +1,53 @@
+# Cold start benchmark: process start -> app imported -> lifespan ready -> first response
+#
+#   python -m benchmarks.cold_start --runs 10
+#
+# Every run is a fresh interpreter so import and engine costs are measured as a new worker sees them.
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+
+CHILD = """
+import asyncio, json, time
+started = time.perf_counter()
+from httpx import AsyncClient, ASGITransport
+from app.main import app
+from app.core.startup import startup_profiler
+imported = time.perf_counter()
+
+async def main():
+    async with app.router.lifespan_context(app):
+        ready = time.perf_counter()
+        transport = ASGITransport(app=app)
+        async with AsyncClient(transport=transport, base_url="http://bench") as client:
+            await client.get("/")
+        first_response = time.perf_counter()
+    print(json.dumps({
+        "import": imported - started,
+        "lifespan": ready - imported,
+        "first_response": first_response - started,
+        "profile": startup_profiler.report(),
+    }))
+
+asyncio.run(main())
+"""
+
+def run_once() -> dict:
+  output = subprocess.run([sys.executable, "-c", CHILD], check=True, capture_output=True, text=True).stdout
+  return json.loads(output.strip().splitlines()[-1])
+
+def main():
+  parser = argparse.ArgumentParser(description="Measure cold start time of the API")
+  parser.add_argument("--runs", type=int, default=5)
+  args = parser.parse_args()
+
+  results = [run_once() for _ in range(args.runs)]
+  for key in ("import", "lifespan", "first_response"):
+    values = [result[key] * 1000 for result in results]
+    print(f"{key:>15}: median {statistics.median(values):8.1f} ms  min {min(values):8.1f} ms")
+  print("last profile:", json.dumps(results[-1]["profile"]))
+
+if __name__ == "__main__":
+  main()
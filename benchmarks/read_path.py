@@ -0,0 +1,67 @@
+# Read path benchmark: ORM hydration + pydantic vs the Core row-to-JSON fast path
+#
+#   python -m benchmarks.read_path --rows 10000 --runs 5
+#
+# Runs on a throwaway clone of the test template database (SQLite unless TEST_DATABASE_URL is set).
+# The numbers are CPU time (process_time) per full list serialization, which is what the fast path
+# saves. On PostgreSQL the fast path moves the serialization into the database with json_agg.
+import argparse
+import asyncio
+import statistics
+import tempfile
+import time
+from pathlib import Path
+from pydantic import TypeAdapter
+from sqlalchemy import insert
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+from app.models.products.product import Product
+from app.schemas.product import ProductResponse
+from app.services.product_service import ProductService
+from tests.harness import TemplateDatabase
+
+PRODUCT_LIST = TypeAdapter(list[ProductResponse])
+
+async def orm_path(session: AsyncSession) -> bytes:
+  products = await ProductService(session).get_all_products()
+  return PRODUCT_LIST.dump_json(PRODUCT_LIST.validate_python(products, from_attributes=True))
+
+async def fast_path(session: AsyncSession) -> str:
+  return await ProductService(session).get_all_products_json()
+
+async def measure(session_factory, read, runs: int) -> list[float]:
+  timings = []
+  for _ in range(runs):
+    # A new session per run, like a request, so the identity map starts empty
+    async with session_factory() as session:
+      started = time.process_time()
+      await read(session)
+      timings.append(time.process_time() - started)
+  return timings
+
+async def run(rows: int, runs: int):
+  with tempfile.TemporaryDirectory() as directory:
+    # Same migrated schema as the test suite, set TEST_DATABASE_URL to benchmark on PostgreSQL
+    template = TemplateDatabase(Path(directory))
+    await asyncio.to_thread(template.build)
+    engine = await template.clone()
+    async with engine.begin() as conn:
+      await conn.execute(insert(Product), [{"name": f"Product {i}", "price": i + 0.99, "available": i % 2 == 0} for i in range(rows)])
+
+    session_factory = async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+    for name, read in (("orm + pydantic", orm_path), ("core fast path", fast_path)):
+      timings = [t * 1000 for t in await measure(session_factory, read, runs)]
+      per_10k = statistics.median(timings) * 10000 / rows
+      print(f"{name:>15}: median {statistics.median(timings):8.1f} ms  min {min(timings):8.1f} ms  ({per_10k:.1f} ms CPU per 10k rows)")
+
+    await template.drop(engine)
+    await asyncio.to_thread(template.destroy)
+
+def main():
+  parser = argparse.ArgumentParser(description="Compare CPU cost of the ORM and Core read paths")
+  parser.add_argument("--rows", type=int, default=10000)
+  parser.add_argument("--runs", type=int, default=5)
+  args = parser.parse_args()
+  asyncio.run(run(args.rows, args.runs))
+
+if __name__ == "__main__":
+  main()
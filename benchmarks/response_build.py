@@ -0,0 +1,44 @@
+# Response construction micro-benchmark: per product cost of building a ProductResponse body
+#
+#   python -m benchmarks.response_build --calls 20000
+#
+# "validated" is what PATCH used to do: model_validate + model_dump in the handler, then FastAPI
+# validating the returned dict again against response_model and serializing it. "trusted" copies the
+# columns once (trusted_dump) and the route returns a JSONResponse, so response_model is skipped.
+import argparse
+from datetime import datetime
+from fastapi.encoders import jsonable_encoder
+from pydantic import TypeAdapter
+from app.helpers.json_rows import trusted_dump
+from app.models.products.product import Product
+from app.schemas.product import ProductResponse
+from benchmarks.timing import per_call_us
+
+RESPONSE_MODEL = TypeAdapter(ProductResponse)
+
+def validated(product: Product):
+  data = ProductResponse.model_validate(product).model_dump()
+  return jsonable_encoder(RESPONSE_MODEL.validate_python(data))
+
+def constructed(product: Product):
+  # model_construct skips validation but still builds a model instance from Python
+  return ProductResponse.model_construct(**{field: getattr(product, field) for field in ProductResponse.model_fields}).model_dump(mode="json")
+
+def trusted(product: Product):
+  return trusted_dump(product, ProductResponse)
+
+def run(calls: int):
+  product = Product(id=1, name="Benchmark Product", price=9.99, available=True, created_at=datetime(2025, 1, 1), updated_at=datetime(2025, 1, 2), version=2)
+
+  for name, build in (("validated", validated), ("constructed", constructed), ("trusted", trusted)):
+    per_call = per_call_us(lambda: build(product), calls)
+    print(f"{name:>12}: {per_call:7.2f} us per product")
+
+def main():
+  parser = argparse.ArgumentParser(description="Compare the per-object cost of building product responses")
+  parser.add_argument("--calls", type=int, default=20000)
+  args = parser.parse_args()
+  run(args.calls)
+
+if __name__ == "__main__":
+  main()
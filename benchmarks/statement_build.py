@@ -0,0 +1,56 @@
+# Statement construction micro-benchmark: building statements inline vs the prebuilt module-level ones
+#
+#   python -m benchmarks.statement_build --calls 20000
+#
+# "build" is the Python cost SQLAlchemy pays before it can even look in its compiled cache:
+# constructing the statement and computing its cache key. "execute" runs the statement through an
+# ORM session on in-memory SQLite, so it adds the cache lookup, parameter binding and the driver.
+import argparse
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session
+from sqlmodel import SQLModel, select
+from app.models.products.product import Product
+from app.services.product_service import LIVE_PRODUCT_ID_BY_NAME, LIVE_PRODUCTS
+from benchmarks.timing import per_call_us
+
+def inline_name_lookup(name: str):
+  return select(Product.id).where(Product.name == name, Product.deleted_at.is_(None)), {}
+
+def prebuilt_name_lookup(name: str):
+  return LIVE_PRODUCT_ID_BY_NAME, {"name": name}
+
+def inline_list(name: str):
+  return select(Product).where(Product.deleted_at.is_(None)), {}
+
+def prebuilt_list(name: str):
+  return LIVE_PRODUCTS, {}
+
+CASES = (
+  ("name lookup", inline_name_lookup, prebuilt_name_lookup),
+  ("list", inline_list, prebuilt_list),
+)
+
+def run(calls: int):
+  engine = create_engine("sqlite://")
+  SQLModel.metadata.create_all(engine)
+
+  with Session(engine) as session:
+    session.add(Product(name="Benchmark Product", price=9.99, available=True))
+    session.commit()
+
+    for name, inline, prebuilt in CASES:
+      for label, build in (("inline", inline), ("prebuilt", prebuilt)):
+        build_us = per_call_us(lambda: build("Benchmark Product")[0]._generate_cache_key(), calls)
+        execute_us = per_call_us(lambda: session.execute(*build("Benchmark Product")).all(), calls // 10)
+        print(f"{name:>12} {label:>9}: build {build_us:7.2f} us  execute {execute_us:7.2f} us")
+
+  engine.dispose()
+
+def main():
+  parser = argparse.ArgumentParser(description="Compare the per-call cost of inline and prebuilt statements")
+  parser.add_argument("--calls", type=int, default=20000)
+  args = parser.parse_args()
+  run(args.calls)
+
+if __name__ == "__main__":
+  main()
@@ -0,0 +1,7 @@
+# Shared timing for the micro-benchmarks
+import timeit
+from typing import Callable
+
+def per_call_us(function: Callable, calls: int, repeat: int = 5) -> float:
+  # Best of the repeats, the minimum is the least disturbed by the rest of the machine
+  return min(timeit.repeat(function, number=calls, repeat=repeat)) / calls * 1e6
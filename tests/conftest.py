@@ -2,13 +2,14 @@ import asyncio
 from typing import AsyncGenerator
 from httpx import AsyncClient, ASGITransport
 import pytest_asyncio
-from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
+import pytest
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import sessionmaker
-from sqlalchemy.pool import StaticPool
-from sqlmodel import SQLModel
 
 # Import your application
 from app.main import app
+from app.core.db import get_async_session
+from tests.harness import TemplateDatabase, assert_max_queries as assert_max_queries_on
 
 # Configure pytest-asyncio
 pytest_plugins = ("pytest_asyncio",)
@@ -27,35 +28,43 @@ def event_loop():
     yield loop
     loop.close()
 
+@pytest_asyncio.fixture(autouse=True)
+def clear_product_cache():
+    """
+    Every test gets a fresh database, so cached products from a previous test are stale.
+    """
+    from app.core.cache import product_cache
+    product_cache.clear()
+    yield
+    product_cache.clear()
+
 # ============================================================================
-# SQLITE DATABASE FIXTURES
+# DATABASE FIXTURES
 # ============================================================================
 
+@pytest.fixture(scope="session")
+def database_template(tmp_path_factory):
+    """
+    Migrated template database, built once per worker (see tests/harness.py).
+    """
+    template = TemplateDatabase(tmp_path_factory.mktemp("databases"))
+    template.build()
+    yield template
+    template.destroy()
+
 @pytest_asyncio.fixture
-async def test_engine():
+async def test_engine(database_template):
     """
-    Create a SQLite database engine for testing.
-    Uses in-memory SQLite for maximum speed.
+    Engine on a private copy of the template database.
+    Every test starts from the migrated schema and can't see other tests' data,
+    even when tests run in parallel processes.
     """
-    test_database_url = "sqlite+aiosqlite:///:memory:"
-    
-    engine = create_async_engine(
-        test_database_url,
-        echo=False,  # Don't show SQL in console during tests
-        poolclass=StaticPool,  # Static pool for tests
-        connect_args={"check_same_thread": False}
-    )
-    
-    # Create all tables
-    async with engine.begin() as conn:
-        # Import all models to create tables
-        from app.models.products.product import Product
-        await conn.run_sync(SQLModel.metadata.create_all)
-    
+    engine = await database_template.clone()
+
     yield engine  # ← RETURN THE ENGINE, NOT A GENERATOR
     
     # Clean up after each test
-    await engine.dispose()
+    await database_template.drop(engine)
 
 @pytest_asyncio.fixture
 async def test_session(test_engine) -> AsyncGenerator[AsyncSession, None]:
@@ -82,18 +91,30 @@ async def test_session(test_engine) -> AsyncGenerator[AsyncSession, None]:
             # If already closed, do nothing
             pass
 
+@pytest.fixture
+def assert_max_queries(test_engine):
+    """
+    `with assert_max_queries(n): ...` fails if the block runs more than n SQL statements
+    on the test database.
+    """
+    return lambda max_queries: assert_max_queries_on(test_engine, max_queries)
+
 # ============================================================================
 # HTTP CLIENT FIXTURES
 # ============================================================================
 
 @pytest_asyncio.fixture
-async def client() -> AsyncGenerator[AsyncClient, None]:
+async def client(test_session) -> AsyncGenerator[AsyncClient, None]:
     """
     HTTP client to make requests to the API during tests.
+    The app's session dependency is wired to the test database automatically,
+    tests can still replace the override with their own.
     """
+    app.dependency_overrides[get_async_session] = lambda: test_session
     transport = ASGITransport(app=app)
     async with AsyncClient(transport=transport, base_url="http://test") as ac:
         yield ac
+    app.dependency_overrides.clear()
 
 # ============================================================================
 # TEST DATA FIXTURES
@@ -132,6 +153,17 @@ def sample_product_data_minimal():
         "available": True
     }
 
+@pytest_asyncio.fixture
+async def synthetic_catalog(test_engine):
+    """
+    A reproducible catalog of 1,000 products (see benchmarks/catalog.py) for tests that need
+    more than a couple of rows. Use the generator directly for millions of rows.
+    """
+    from benchmarks.catalog import CatalogSpec, load_catalog
+    spec = CatalogSpec(rows=1000, seed=1234)
+    await load_catalog(test_engine, spec)
+    return spec
+
 # ============================================================================
 # UTILITY FIXTURES
 # ============================================================================
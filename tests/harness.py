@@ -0,0 +1,141 @@
+"""
+Isolated databases for tests and benchmarks, cloned from a pre-migrated template.
+
+The template is built once per process (once per pytest-xdist worker) by running the
+migrations, then every test gets its own copy:
+
+- SQLite (default): the template file is copied next to the test.
+- PostgreSQL (TEST_DATABASE_URL=postgresql+asyncpg://...): CREATE DATABASE ... TEMPLATE ...
+
+Run the suite in parallel with `pytest -n auto`.
+
+`assert_max_queries` pins how many statements a block of code may send to the database.
+"""
+import asyncio
+import itertools
+import os
+import shutil
+import uuid
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Optional
+from sqlalchemy import event, make_url, text
+from sqlalchemy.ext.asyncio import AsyncEngine, create_async_engine
+from app.migrations.runner import MigrationRunner
+
+
+def worker_id() -> str:
+    """
+    Name of the pytest-xdist worker ("gw0", "gw1", ...) or "main" when not running in parallel.
+    """
+    return os.environ.get("PYTEST_XDIST_WORKER", "main")
+
+
+class TemplateDatabase:
+    """
+    Builds a migrated template database and hands out disposable clones of it.
+    """
+
+    def __init__(self, directory: Path, url: Optional[str] = None):
+        self.directory = Path(directory)
+        self.url = make_url(url or os.environ.get("TEST_DATABASE_URL", "sqlite+aiosqlite://"))
+        self.is_postgresql = self.url.get_backend_name() == "postgresql"
+        # Unique per worker and per run, so parallel workers and stale leftovers never collide
+        self.prefix = f"pm_{worker_id()}_{uuid.uuid4().hex[:8]}"
+        self.template_name = f"{self.prefix}_template"
+        self._counter = itertools.count()
+
+    def build(self):
+        """
+        Create and migrate the template. Synchronous so it can run from a session fixture.
+        """
+        asyncio.run(self._build())
+
+    async def clone(self) -> AsyncEngine:
+        name = f"{self.prefix}_{next(self._counter)}"
+        if self.is_postgresql:
+            await self._admin_execute(f'CREATE DATABASE "{name}" TEMPLATE "{self.template_name}"')
+            return create_async_engine(self.url.set(database=name))
+
+        path = self.directory / f"{name}.db"
+        shutil.copyfile(self._template_path, path)
+        return create_async_engine(f"sqlite+aiosqlite:///{path}")
+
+    async def drop(self, engine: AsyncEngine):
+        await engine.dispose()
+        if self.is_postgresql:
+            await self._admin_execute(f'DROP DATABASE IF EXISTS "{engine.url.database}" WITH (FORCE)')
+        else:
+            Path(engine.url.database).unlink(missing_ok=True)
+
+    def destroy(self):
+        if self.is_postgresql:
+            asyncio.run(self._admin_execute(f'DROP DATABASE IF EXISTS "{self.template_name}" WITH (FORCE)'))
+        else:
+            self._template_path.unlink(missing_ok=True)
+
+    @property
+    def _template_path(self) -> Path:
+        return self.directory / f"{self.template_name}.db"
+
+    async def _build(self):
+        if self.is_postgresql:
+            await self._admin_execute(f'CREATE DATABASE "{self.template_name}"')
+            engine = create_async_engine(self.url.set(database=self.template_name))
+        else:
+            self.directory.mkdir(parents=True, exist_ok=True)
+            engine = create_async_engine(f"sqlite+aiosqlite:///{self._template_path}")
+
+        try:
+            await MigrationRunner(engine).upgrade()
+        finally:
+            # A template can't have open connections while it is being cloned
+            await engine.dispose()
+
+    async def _admin_execute(self, sql: str):
+        # CREATE/DROP DATABASE can't run inside a transaction
+        engine = create_async_engine(self.url, isolation_level="AUTOCOMMIT")
+        try:
+            async with engine.connect() as conn:
+                await conn.execute(text(sql))
+        finally:
+            await engine.dispose()
+
+
+class QueryCounter:
+    """
+    Records every SQL statement sent through an engine while active.
+    """
+
+    def __init__(self, engine: AsyncEngine):
+        self.engine = engine.sync_engine
+        self.statements: list[str] = []
+
+    @property
+    def count(self) -> int:
+        return len(self.statements)
+
+    def _record(self, conn, cursor, statement, parameters, context, executemany):
+        self.statements.append(statement)
+
+    def __enter__(self):
+        event.listen(self.engine, "before_cursor_execute", self._record)
+        return self
+
+    def __exit__(self, *exc_info):
+        event.remove(self.engine, "before_cursor_execute", self._record)
+
+
+@contextmanager
+def assert_max_queries(engine: AsyncEngine, max_queries: int):
+    """
+    Fail if the block sends more than `max_queries` statements to the database:
+
+        with assert_max_queries(test_engine, 2):
+            await client.get("/api/v1/products/1")
+    """
+    with QueryCounter(engine) as counter:
+        yield counter
+    if counter.count > max_queries:
+        statements = "\n".join(f"  {i}. {statement}" for i, statement in enumerate(counter.statements, 1))
+        raise AssertionError(f"Expected at most {max_queries} queries, {counter.count} were executed:\n{statements}")
@@ -0,0 +1,149 @@
+import asyncio
+import time
+import pytest
+import pytest_asyncio
+from fastapi import status
+from httpx import AsyncClient, ASGITransport
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import create_async_engine
+from app.main import app
+from app.core import db, health
+from app.core.config import settings
+from app.core.health import DatabasePing, EventLoopLagMonitor
+
+@pytest_asyncio.fixture
+async def probe_client(test_engine, monkeypatch):
+    """
+    Client whose probes check the test database, with a fresh ping cache.
+    """
+    monkeypatch.setattr(db, "_async_engine", test_engine)
+    monkeypatch.setattr("app.services.health_service.database_ping", DatabasePing(ttl_seconds=60, timeout_seconds=1))
+    transport = ASGITransport(app=app)
+    async with AsyncClient(transport=transport, base_url="http://test") as client:
+        yield client
+
+class TestHealthProbes:
+    """Test suite for the liveness and readiness endpoints."""
+
+    @pytest.mark.asyncio
+    async def test_liveness_never_touches_the_database(self, probe_client, test_engine):
+        """Test that liveness answers without a connection checkout."""
+        # Arrange
+        checkouts = []
+        event.listen(test_engine.sync_engine, "checkout", lambda *args: checkouts.append(args))
+
+        # Act
+        response = await probe_client.get("/health/live")
+
+        # Assert
+        assert response.status_code == status.HTTP_200_OK
+        assert response.json() == {"status": "alive"}
+        assert checkouts == []
+
+    @pytest.mark.asyncio
+    async def test_ready_reports_every_check(self, probe_client):
+        """Test that a healthy worker is ready and says why."""
+        # Act
+        response = await probe_client.get("/health/ready")
+
+        # Assert
+        assert response.status_code == status.HTTP_200_OK
+        data = response.json()
+        assert data["status"] == "ready"
+        assert data["failing"] == []
+        assert data["checks"]["databases"][0]["ok"] is True
+        assert data["checks"]["pools"][0]["checked_out"] == 0
+        assert data["checks"]["pools"][0]["capacity"] == settings.DB_WORKER_CONNECTIONS
+
+    @pytest.mark.asyncio
+    async def test_database_ping_is_cached(self, probe_client, test_engine):
+        """Test that repeated and concurrent probes send a single ping."""
+        # Arrange
+        pings = []
+        event.listen(test_engine.sync_engine, "before_cursor_execute", lambda conn, cursor, statement, *args: pings.append(statement))
+
+        # Act
+        responses = await asyncio.gather(*[probe_client.get("/health/ready") for _ in range(5)])
+        responses.append(await probe_client.get("/health/ready"))
+
+        # Assert
+        assert all(response.status_code == status.HTTP_200_OK for response in responses)
+        assert pings == ["SELECT 1"]
+
+    @pytest.mark.asyncio
+    async def test_unreachable_database_is_not_ready(self, probe_client, tmp_path, monkeypatch):
+        """Test that a failing ping returns 503."""
+        # Arrange
+        broken = create_async_engine(f"sqlite+aiosqlite:///{tmp_path}/missing/dir/product.db")
+        monkeypatch.setattr(db, "_async_engine", broken)
+
+        # Act
+        response = await probe_client.get("/health/ready")
+        await broken.dispose()
+
+        # Assert
+        assert response.status_code == status.HTTP_503_SERVICE_UNAVAILABLE
+        assert response.json()["failing"] == ["database"]
+        assert response.json()["checks"]["databases"][0]["ok"] is False
+
+    @pytest.mark.asyncio
+    async def test_saturated_pool_is_not_ready(self, probe_client, test_engine, monkeypatch):
+        """Test that a worker using its whole connection share stops being ready."""
+        # Arrange
+        monkeypatch.setattr(settings, "DB_MAX_CONNECTIONS", 2)
+        monkeypatch.setattr(settings, "WEB_CONCURRENCY", 1)
+        await probe_client.get("/health/ready")
+
+        # Act
+        async with test_engine.connect() as first, test_engine.connect() as second:
+            await first.exec_driver_sql("SELECT 1")
+            await second.exec_driver_sql("SELECT 1")
+            saturated = await probe_client.get("/health/ready")
+        recovered = await probe_client.get("/health/ready")
+
+        # Assert
+        assert saturated.status_code == status.HTTP_503_SERVICE_UNAVAILABLE
+        assert saturated.json()["failing"] == ["pool"]
+        assert saturated.json()["checks"]["pools"][0]["utilization"] == 1.0
+        assert recovered.status_code == status.HTTP_200_OK
+
+    @pytest.mark.asyncio
+    async def test_event_loop_lag_makes_the_worker_not_ready(self, probe_client, monkeypatch):
+        """Test that a lag above the threshold returns 503."""
+        # Arrange
+        monkeypatch.setattr(health.event_loop_monitor, "samples", [0.0, settings.READINESS_MAX_LOOP_LAG_SECONDS * 2, 0.0])
+
+        # Act
+        response = await probe_client.get("/health/ready")
+
+        # Assert
+        assert response.status_code == status.HTTP_503_SERVICE_UNAVAILABLE
+        assert response.json()["failing"] == ["event_loop"]
+
+    @pytest.mark.asyncio
+    async def test_probes_are_exempt_from_rate_limits_and_admission(self):
+        """Test that the probe paths skip the middlewares that shed load."""
+        # Assert
+        for path in ("/health/live", "/health/ready"):
+            assert path in settings.RATE_LIMIT_EXEMPT_PATHS
+            assert path in settings.ADMISSION_EXEMPT_PATHS
+
+class TestEventLoopLagMonitor:
+    """Test suite for the event loop lag sampler."""
+
+    @pytest.mark.asyncio
+    async def test_blocking_call_shows_up_as_lag(self):
+        """Test that a callback blocking the loop is measured."""
+        # Arrange
+        monitor = EventLoopLagMonitor(interval_seconds=0.01)
+        task = asyncio.create_task(monitor.run())
+        await asyncio.sleep(0)
+
+        # Act
+        time.sleep(0.15)
+        await asyncio.sleep(0.05)
+        task.cancel()
+
+        # Assert
+        assert monitor.lag is not None
+        assert monitor.lag >= 0.1
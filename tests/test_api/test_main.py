@@ -85,6 +85,24 @@ class TestMainEndpoint:
             response = await client.delete("/")
             assert response.status_code == 405
 
+    @pytest.mark.asyncio
+    async def test_cache_metrics_endpoint(self):
+        """
+        Test that the cache metrics expose statement and product cache counters.
+        """
+        # ARRANGE
+        transport = ASGITransport(app=app)
+        async with AsyncClient(transport=transport, base_url="http://test") as client:
+
+            # ACT
+            response = await client.get("/metrics/cache")
+
+            # ASSERT
+            assert response.status_code == 200
+            data = response.json()
+            assert set(data["statements"]) == {"hits", "misses", "uncached", "hit_rate"}
+            assert set(data["products"]) == {"hits", "misses", "entries"}
+
 
 # ============================================================================
 # KEY CONCEPTS EXPLANATION:
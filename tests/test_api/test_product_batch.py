@@ -0,0 +1,99 @@
+import pytest
+from fastapi import status
+from app.main import app
+from app.core.cache import product_cache
+from app.core.db import get_async_session
+
+class TestProductBatch:
+    """Test suite for the batch product lookup routes."""
+
+    def teardown_method(self):
+        app.dependency_overrides.clear()
+
+    async def create_products(self, client, count):
+        ids = []
+        for i in range(count):
+            response = await client.post("/api/v1/products/", json={"name": f"Batch Product {i}", "price": 10.0 + i, "available": True})
+            ids.append(response.json()["data"]["id"])
+        return ids
+
+    @pytest.mark.asyncio
+    async def test_get_batch_returns_products_in_request_order_and_missing_ids(self, client, test_session):
+        """Test that GET /batch returns found products in request order and lists missing ids."""
+        # Arrange
+        app.dependency_overrides[get_async_session] = lambda: test_session
+        ids = await self.create_products(client, 3)
+
+        # Act
+        response = await client.get(f"/api/v1/products/batch?ids={ids[2]},999,{ids[0]}")
+
+        # Assert
+        assert response.status_code == status.HTTP_200_OK
+        body = response.json()
+        assert [product["id"] for product in body["data"]] == [ids[2], ids[0]]
+        assert body["missing"] == [999]
+
+    @pytest.mark.asyncio
+    async def test_post_batch_accepts_ids_in_body(self, client, test_session):
+        """Test that POST /batch works like GET and ignores duplicated ids."""
+        # Arrange
+        app.dependency_overrides[get_async_session] = lambda: test_session
+        ids = await self.create_products(client, 2)
+
+        # Act
+        response = await client.post("/api/v1/products/batch", json={"ids": [ids[1], ids[0], ids[1]]})
+
+        # Assert
+        assert response.status_code == status.HTTP_200_OK
+        assert [product["id"] for product in response.json()["data"]] == [ids[1], ids[0]]
+        assert response.json()["missing"] == []
+
+    @pytest.mark.asyncio
+    async def test_batch_serves_cached_products_and_reports_deleted_ones(self, client, test_session):
+        """Test that cached products are reused and writes invalidate the cache."""
+        # Arrange
+        app.dependency_overrides[get_async_session] = lambda: test_session
+        ids = await self.create_products(client, 2)
+        await client.get(f"/api/v1/products/batch?ids={ids[0]},{ids[1]}")
+        hits_before = product_cache.hits
+
+        # Act
+        await client.delete(f"/api/v1/products/{ids[1]}")
+        response = await client.get(f"/api/v1/products/batch?ids={ids[0]},{ids[1]}")
+
+        # Assert
+        assert product_cache.hits == hits_before + 1
+        assert [product["id"] for product in response.json()["data"]] == [ids[0]]
+        assert response.json()["missing"] == [ids[1]]
+
+    @pytest.mark.asyncio
+    async def test_get_by_id_does_not_return_stale_cached_product_after_update(self, client, test_session):
+        """Test that an update invalidates the cached copy used by GET by id."""
+        # Arrange
+        app.dependency_overrides[get_async_session] = lambda: test_session
+        [product_id] = await self.create_products(client, 1)
+        await client.get(f"/api/v1/products/{product_id}")
+
+        # Act
+        await client.patch(f"/api/v1/products/{product_id}", json={"price": 42.0})
+        response = await client.get(f"/api/v1/products/{product_id}")
+
+        # Assert
+        assert response.json()["price"] == 42.0
+        assert response.headers["etag"] == '"2"'
+
+    @pytest.mark.asyncio
+    async def test_batch_rejects_invalid_and_too_many_ids(self, client, test_session, monkeypatch):
+        """Test that malformed id lists and oversized batches return 400."""
+        # Arrange
+        app.dependency_overrides[get_async_session] = lambda: test_session
+        from app.core.config import settings
+        monkeypatch.setattr(settings, "BATCH_MAX_IDS", 2)
+
+        # Act
+        invalid = await client.get("/api/v1/products/batch?ids=1,abc")
+        too_many = await client.post("/api/v1/products/batch", json={"ids": [1, 2, 3]})
+
+        # Assert
+        assert invalid.status_code == status.HTTP_400_BAD_REQUEST
+        assert too_many.status_code == status.HTTP_400_BAD_REQUEST
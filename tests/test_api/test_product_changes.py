@@ -0,0 +1,80 @@
+import pytest
+from fastapi import status
+from app.main import app
+from app.core.db import get_async_session
+from app.services.compaction_service import CompactionService
+
+class TestProductChangesEndpoint:
+    """Test suite for GET /api/v1/products/changes."""
+
+    @pytest.mark.asyncio
+    async def test_changes_endpoint_empty(self, client, test_session):
+        """Test that the feed is empty and keeps the cursor when nothing changed."""
+        # Arrange
+        app.dependency_overrides[get_async_session] = lambda: test_session
+
+        # Act
+        response = await client.get("/api/v1/products/changes", params={"since": 7})
+
+        # Assert
+        assert response.status_code == status.HTTP_200_OK
+        assert response.json() == {"changes": [], "last_seq": 7}
+
+    @pytest.mark.asyncio
+    async def test_changes_endpoint_returns_incremental_deltas(self, client, test_session, sample_product_data):
+        """Test that consumers only receive changes after their cursor."""
+        # Arrange
+        app.dependency_overrides[get_async_session] = lambda: test_session
+        create_response = await client.post("/api/v1/products/", json=sample_product_data)
+        product_id = create_response.json()["data"]["id"]
+        first = (await client.get("/api/v1/products/changes")).json()
+        await client.patch(f"/api/v1/products/{product_id}", json={"price": 1.5})
+
+        # Act
+        response = await client.get("/api/v1/products/changes", params={"since": first["last_seq"]})
+
+        # Assert
+        assert response.status_code == status.HTTP_200_OK
+        data = response.json()
+        assert len(data["changes"]) == 1
+        assert data["changes"][0]["operation"] == "updated"
+        assert data["changes"][0]["product_id"] == product_id
+        assert data["changes"][0]["payload"]["price"] == 1.5
+        assert data["last_seq"] == data["changes"][0]["seq"]
+
+    @pytest.mark.asyncio
+    async def test_changes_endpoint_rejects_invalid_params(self, client, test_session):
+        """Test query parameter validation."""
+        # Arrange
+        app.dependency_overrides[get_async_session] = lambda: test_session
+
+        # Act & Assert
+        response = await client.get("/api/v1/products/changes", params={"since": -1})
+        assert response.status_code == status.HTTP_422_UNPROCESSABLE_ENTITY
+
+        response = await client.get("/api/v1/products/changes", params={"limit": 0})
+        assert response.status_code == status.HTTP_422_UNPROCESSABLE_ENTITY
+
+    @pytest.mark.asyncio
+    async def test_changes_endpoint_rejects_pruned_cursor(self, client, test_session, sample_product_data):
+        """Test that a cursor from before the retention gets 410 instead of a feed with a hole."""
+        # Arrange
+        app.dependency_overrides[get_async_session] = lambda: test_session
+        create_response = await client.post("/api/v1/products/", json=sample_product_data)
+        product_id = create_response.json()["data"]["id"]
+        first = (await client.get("/api/v1/products/changes")).json()
+        await client.patch(f"/api/v1/products/{product_id}", json={"price": 1.5})
+        await client.patch(f"/api/v1/products/{product_id}", json={"price": 2.5})
+        await CompactionService(test_session).compact_changes(retention_seconds=0, batch_size=2, max_batches=1)
+
+        # Act
+        response = await client.get("/api/v1/products/changes", params={"since": first["last_seq"]})
+        restarted = await client.get("/api/v1/products/changes", params={"since": 0})
+
+        # Assert
+        assert response.status_code == status.HTTP_410_GONE
+        assert [change["payload"]["price"] for change in restarted.json()["changes"]] == [2.5]
+
+    def teardown_method(self):
+        """Clean up dependency overrides after each test."""
+        app.dependency_overrides.clear()
@@ -0,0 +1,73 @@
+import pytest
+from fastapi import status
+from app.main import app
+from app.core.db import get_async_session
+
+class TestProductETag:
+    """Test suite for ETag / If-Match handling on product routes."""
+
+    async def create_product(self, client, sample_product_data):
+        response = await client.post("/api/v1/products/", json=sample_product_data)
+        return response.json()["data"]["id"]
+
+    @pytest.mark.asyncio
+    async def test_get_product_returns_etag(self, client, test_session, sample_product_data):
+        """Test that GET by id exposes the version as ETag."""
+        # Arrange
+        app.dependency_overrides[get_async_session] = lambda: test_session
+        product_id = await self.create_product(client, sample_product_data)
+
+        # Act
+        response = await client.get(f"/api/v1/products/{product_id}")
+
+        # Assert
+        assert response.status_code == status.HTTP_200_OK
+        assert response.headers["etag"] == '"1"'
+        assert response.json()["version"] == 1
+
+    @pytest.mark.asyncio
+    async def test_patch_with_matching_if_match_succeeds(self, client, test_session, sample_product_data):
+        """Test that a current ETag lets the update through and returns the new one."""
+        # Arrange
+        app.dependency_overrides[get_async_session] = lambda: test_session
+        product_id = await self.create_product(client, sample_product_data)
+
+        # Act
+        response = await client.patch(f"/api/v1/products/{product_id}", json={"price": 10.0}, headers={"If-Match": '"1"'})
+
+        # Assert
+        assert response.status_code == status.HTTP_201_CREATED
+        assert response.headers["etag"] == '"2"'
+
+    @pytest.mark.asyncio
+    async def test_patch_with_stale_if_match_returns_412(self, client, test_session, sample_product_data):
+        """Test that a stale ETag returns 412 and leaves the product untouched."""
+        # Arrange
+        app.dependency_overrides[get_async_session] = lambda: test_session
+        product_id = await self.create_product(client, sample_product_data)
+        await client.patch(f"/api/v1/products/{product_id}", json={"price": 10.0})
+
+        # Act
+        response = await client.patch(f"/api/v1/products/{product_id}", json={"price": 20.0}, headers={"If-Match": 'W/"1"'})
+
+        # Assert
+        assert response.status_code == status.HTTP_412_PRECONDITION_FAILED
+        current = await client.get(f"/api/v1/products/{product_id}")
+        assert current.json()["price"] == 10.0
+
+    @pytest.mark.asyncio
+    async def test_patch_with_invalid_if_match_returns_400(self, client, test_session, sample_product_data):
+        """Test that an unparseable If-Match header is rejected."""
+        # Arrange
+        app.dependency_overrides[get_async_session] = lambda: test_session
+        product_id = await self.create_product(client, sample_product_data)
+
+        # Act
+        response = await client.patch(f"/api/v1/products/{product_id}", json={"price": 10.0}, headers={"If-Match": "abc"})
+
+        # Assert
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+    def teardown_method(self):
+        """Clean up dependency overrides after each test."""
+        app.dependency_overrides.clear()
@@ -0,0 +1,67 @@
+import pytest
+from fastapi import status
+from app.main import app
+from app.core.db import get_async_session
+
+class TestProductSparseFieldsets:
+    """Test suite for the ?fields= sparse fieldset parameter."""
+
+    def teardown_method(self):
+        app.dependency_overrides.clear()
+
+    @pytest.mark.asyncio
+    async def test_list_returns_only_requested_fields(self, client, test_session, sample_product_data):
+        """Test that the list route only serializes the requested fields."""
+        # Arrange
+        app.dependency_overrides[get_async_session] = lambda: test_session
+        await client.post("/api/v1/products/", json=sample_product_data)
+
+        # Act
+        response = await client.get("/api/v1/products/?fields=price,available")
+
+        # Assert
+        assert response.status_code == status.HTTP_200_OK
+        assert response.json() == [{"price": sample_product_data["price"], "available": True}]
+
+    @pytest.mark.asyncio
+    async def test_get_by_id_returns_only_requested_fields_with_etag(self, client, test_session, sample_product_data):
+        """Test that GET by id prunes the body but still sends the ETag."""
+        # Arrange
+        app.dependency_overrides[get_async_session] = lambda: test_session
+        created = await client.post("/api/v1/products/", json=sample_product_data)
+        product_id = created.json()["data"]["id"]
+
+        # Act
+        uncached = await client.get(f"/api/v1/products/{product_id}?fields=id,name")
+        await client.get(f"/api/v1/products/{product_id}")
+        cached = await client.get(f"/api/v1/products/{product_id}?fields=id,name")
+
+        # Assert
+        for response in (uncached, cached):
+            assert response.status_code == status.HTTP_200_OK
+            assert response.json() == {"id": product_id, "name": sample_product_data["name"]}
+            assert response.headers["etag"] == '"1"'
+
+    @pytest.mark.asyncio
+    async def test_unknown_field_returns_400(self, client, test_session):
+        """Test that asking for a field that doesn't exist is rejected."""
+        # Arrange
+        app.dependency_overrides[get_async_session] = lambda: test_session
+
+        # Act
+        response = await client.get("/api/v1/products/?fields=id,secret")
+
+        # Assert
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+    @pytest.mark.asyncio
+    async def test_get_by_id_with_fields_returns_404_for_missing_product(self, client, test_session):
+        """Test that a pruned lookup still reports missing products."""
+        # Arrange
+        app.dependency_overrides[get_async_session] = lambda: test_session
+
+        # Act
+        response = await client.get("/api/v1/products/999?fields=id")
+
+        # Assert
+        assert response.status_code == status.HTTP_404_NOT_FOUND
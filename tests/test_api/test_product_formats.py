@@ -0,0 +1,64 @@
+import pytest
+from fastapi import status
+from app.main import app
+from app.core.db import get_async_session
+from app.helpers import binary_formats
+
+class TestProductFormats:
+    """Test suite for MessagePack and Arrow responses on the product list."""
+
+    def teardown_method(self):
+        app.dependency_overrides.clear()
+
+    async def create_products(self, client, count):
+        for i in range(count):
+            await client.post("/api/v1/products/", json={"name": f"Format Product {i}", "price": 1.5 + i, "available": i % 2 == 0})
+
+    @pytest.mark.asyncio
+    async def test_list_as_msgpack(self, client, test_session):
+        """Test that Accept: application/x-msgpack returns the same rows as JSON."""
+        # Arrange
+        msgpack = pytest.importorskip("msgpack")
+        app.dependency_overrides[get_async_session] = lambda: test_session
+        await self.create_products(client, 3)
+        as_json = (await client.get("/api/v1/products/")).json()
+
+        # Act
+        response = await client.get("/api/v1/products/", headers={"Accept": "application/x-msgpack"})
+
+        # Assert
+        assert response.status_code == status.HTTP_200_OK
+        assert response.headers["content-type"] == "application/x-msgpack"
+        assert msgpack.unpackb(response.content) == as_json
+
+    @pytest.mark.asyncio
+    async def test_list_as_arrow_stream_with_fields(self, client, test_session):
+        """Test that the Arrow stream is columnar and honours sparse fieldsets."""
+        # Arrange
+        pyarrow = pytest.importorskip("pyarrow")
+        import pyarrow.ipc
+        app.dependency_overrides[get_async_session] = lambda: test_session
+        await self.create_products(client, 3)
+
+        # Act
+        response = await client.get("/api/v1/products/?fields=price,available", headers={"Accept": "application/vnd.apache.arrow.stream"})
+
+        # Assert
+        assert response.status_code == status.HTTP_200_OK
+        table = pyarrow.ipc.open_stream(response.content).read_all()
+        assert table.column_names == ["price", "available"]
+        assert table.column("price").to_pylist() == [1.5, 2.5, 3.5]
+        assert table.schema.field("available").type == pyarrow.bool_()
+
+    @pytest.mark.asyncio
+    async def test_unavailable_format_returns_406(self, client, test_session, monkeypatch):
+        """Test that asking only for a format whose library is missing returns 406."""
+        # Arrange
+        app.dependency_overrides[get_async_session] = lambda: test_session
+        monkeypatch.setattr(binary_formats, "pyarrow", None)
+
+        # Act
+        response = await client.get("/api/v1/products/", headers={"Accept": "application/vnd.apache.arrow.stream"})
+
+        # Assert
+        assert response.status_code == status.HTTP_406_NOT_ACCEPTABLE
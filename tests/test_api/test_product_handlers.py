@@ -78,6 +78,27 @@ class TestProductHandlers:
         assert isinstance(data, list)
         assert len(data) == 0
 
+    @pytest.mark.asyncio
+    async def test_get_product_stats_endpoint(self, client, test_session, sample_product_data):
+        """Test that /stats summarizes the catalog and is not parsed as a product id."""
+        # Arrange
+        app.dependency_overrides[get_async_session] = lambda: test_session
+        await client.post("/api/v1/products/", json=sample_product_data)
+        await client.post("/api/v1/products/", json={"name": "Second Product", "price": 0.01, "available": False})
+
+        # Act
+        response = await client.get("/api/v1/products/stats")
+
+        # Assert
+        assert response.status_code == status.HTTP_200_OK
+        assert response.json() == {
+            "total_count": 2,
+            "available_count": 1,
+            "average_price": 50.0,
+            "min_price": 0.01,
+            "max_price": sample_product_data["price"],
+        }
+
     @pytest.mark.asyncio
     async def test_get_products_endpoint_with_data(self, client, test_session, sample_product_data):
         """Test getting all products when database has products."""
@@ -0,0 +1,97 @@
+import uuid
+import pytest
+from fastapi import status
+from httpx import AsyncClient, ASGITransport
+from app.main import app
+from app.core.config import settings
+from app.core.db import get_async_session
+
+class TestProductIdempotency:
+    """Test suite for Idempotency-Key on product write routes."""
+
+    @pytest.mark.asyncio
+    async def test_post_retry_replays_first_response(self, client, test_session, sample_product_data):
+        """Test that a retried POST does not create a duplicate."""
+        # Arrange
+        app.dependency_overrides[get_async_session] = lambda: test_session
+        headers = {"Idempotency-Key": str(uuid.uuid4())}
+
+        # Act
+        first = await client.post("/api/v1/products/", json=sample_product_data, headers=headers)
+        retry = await client.post("/api/v1/products/", json=sample_product_data, headers=headers)
+
+        # Assert
+        assert first.status_code == status.HTTP_201_CREATED
+        assert retry.status_code == status.HTTP_201_CREATED
+        assert retry.json() == first.json()
+        assert retry.headers["idempotent-replayed"] == "true"
+        assert len((await client.get("/api/v1/products/")).json()) == 1
+
+    @pytest.mark.asyncio
+    async def test_post_with_reused_key_and_other_body_returns_422(self, client, test_session, sample_product_data):
+        """Test that a key cannot be reused for a different product."""
+        # Arrange
+        app.dependency_overrides[get_async_session] = lambda: test_session
+        headers = {"Idempotency-Key": str(uuid.uuid4())}
+        await client.post("/api/v1/products/", json=sample_product_data, headers=headers)
+
+        # Act
+        response = await client.post("/api/v1/products/", json={**sample_product_data, "name": "Other"}, headers=headers)
+
+        # Assert
+        assert response.status_code == status.HTTP_422_UNPROCESSABLE_ENTITY
+
+    @pytest.mark.asyncio
+    async def test_disabled_store_ignores_the_key(self, client, test_session, sample_product_data, monkeypatch):
+        """Test that with IDEMPOTENCY_ENABLED off (several workers) the header has no effect."""
+        # Arrange
+        app.dependency_overrides[get_async_session] = lambda: test_session
+        monkeypatch.setattr(settings, "IDEMPOTENCY_ENABLED", False)
+        headers = {"Idempotency-Key": str(uuid.uuid4())}
+        await client.post("/api/v1/products/", json=sample_product_data, headers=headers)
+
+        # Act
+        retry = await client.post("/api/v1/products/", json=sample_product_data, headers=headers)
+
+        # Assert
+        assert retry.status_code == status.HTTP_400_BAD_REQUEST
+        assert "idempotent-replayed" not in retry.headers
+
+    @pytest.mark.asyncio
+    async def test_patch_retry_replays_response_and_etag(self, client, test_session, sample_product_data):
+        """Test that a retried PATCH is applied once and keeps its ETag."""
+        # Arrange
+        app.dependency_overrides[get_async_session] = lambda: test_session
+        product_id = (await client.post("/api/v1/products/", json=sample_product_data)).json()["data"]["id"]
+        headers = {"Idempotency-Key": str(uuid.uuid4())}
+
+        # Act
+        first = await client.patch(f"/api/v1/products/{product_id}", json={"price": 5.0}, headers=headers)
+        retry = await client.patch(f"/api/v1/products/{product_id}", json={"price": 5.0}, headers=headers)
+
+        # Assert
+        assert first.status_code == status.HTTP_201_CREATED
+        assert retry.json() == first.json()
+        assert retry.headers["etag"] == first.headers["etag"] == '"2"'
+        assert (await client.get(f"/api/v1/products/{product_id}")).json()["version"] == 2
+
+    @pytest.mark.asyncio
+    async def test_same_key_from_another_client_is_not_replayed(self, client, sample_product_data):
+        """Test that keys are scoped to the client, another client's key never returns its response."""
+        # Arrange
+        headers = {"Idempotency-Key": "shared-key"}
+        other_transport = ASGITransport(app=app, client=("203.0.113.7", 4000))
+
+        # Act
+        first = await client.post("/api/v1/products/", json=sample_product_data, headers=headers)
+        async with AsyncClient(transport=other_transport, base_url="http://test") as other_client:
+            other = await other_client.post("/api/v1/products/", json={**sample_product_data, "name": "Other"}, headers=headers)
+
+        # Assert
+        assert first.status_code == other.status_code == status.HTTP_201_CREATED
+        assert "idempotent-replayed" not in other.headers
+        assert other.json()["data"]["name"] == "Other"
+
+    def teardown_method(self):
+        """Clean up dependency overrides after each test."""
+        app.dependency_overrides.clear()
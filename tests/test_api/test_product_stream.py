@@ -0,0 +1,85 @@
+import json
+import pytest
+from fastapi import HTTPException
+from app.api.handlers.product_handler import stream_product_changes_handler
+from app.core.broker import product_broker
+from app.core.config import settings
+from app.services.product_service import ProductService
+from app.schemas.product import ProductCreate, ProductUpdate
+
+async def next_event(response):
+    chunk = await response.body_iterator.__anext__()
+    data_line = [line for line in chunk.splitlines() if line.startswith("data: ")][0]
+    return json.loads(data_line[len("data: "):])
+
+class TestProductStream:
+    """Test suite for the SSE product change stream."""
+
+    @pytest.mark.asyncio
+    async def test_stream_pushes_service_writes(self, test_session, sample_product_data):
+        """Test that writes through ProductService are pushed to open streams."""
+        # Arrange
+        service = ProductService(test_session)
+        product = await service.create_product(ProductCreate(**sample_product_data))
+        response = await stream_product_changes_handler(str(product.id), None, test_session)
+
+        try:
+            # Act
+            await service.update_product(product.id, ProductUpdate(price=12.5))
+            event = await next_event(response)
+
+            # Assert
+            assert response.media_type == "text/event-stream"
+            assert event["operation"] == "updated"
+            assert event["product_id"] == product.id
+            assert event["payload"]["price"] == 12.5
+        finally:
+            await response.body_iterator.aclose()
+
+    @pytest.mark.asyncio
+    async def test_stream_replays_backlog_from_last_event_id(self, test_session, sample_product_data):
+        """Test that reconnecting clients get the changes they missed first."""
+        # Arrange
+        service = ProductService(test_session)
+        product = await service.create_product(ProductCreate(**sample_product_data))
+        await service.update_product(product.id, ProductUpdate(price=3.0))
+        first_seq = (await service.get_changes())[0].seq
+
+        # Act
+        response = await stream_product_changes_handler(None, first_seq, test_session)
+        try:
+            event = await next_event(response)
+        finally:
+            await response.body_iterator.aclose()
+
+        # Assert
+        assert event["operation"] == "updated"
+        assert product_broker.subscriber_count == 0
+
+    @pytest.mark.asyncio
+    async def test_stream_replays_every_page_of_the_backlog(self, test_session, monkeypatch):
+        """Test that a client that missed more than one page gets all of it before live events."""
+        # Arrange
+        monkeypatch.setattr(settings, "CHANGES_PAGE_SIZE", 2)
+        service = ProductService(test_session)
+        for i in range(5):
+            await service.create_product(ProductCreate(name=f"Backlog Product {i}", price=1.0 + i))
+
+        # Act
+        response = await stream_product_changes_handler(None, 0, test_session)
+        try:
+            events = [await next_event(response) for _ in range(5)]
+        finally:
+            await response.body_iterator.aclose()
+
+        # Assert
+        assert [event["payload"]["name"] for event in events] == [f"Backlog Product {i}" for i in range(5)]
+
+    @pytest.mark.asyncio
+    async def test_stream_rejects_invalid_ids(self, test_session):
+        """Test that malformed id filters return 400."""
+        # Act & Assert
+        with pytest.raises(HTTPException) as exc_info:
+            await stream_product_changes_handler("1,abc", None, test_session)
+
+        assert exc_info.value.status_code == 400
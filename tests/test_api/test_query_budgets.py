@@ -0,0 +1,178 @@
+import pytest
+from fastapi import status
+from app.api.handlers.product_handler import stream_product_changes_handler
+from app.core.cache import product_cache
+from tests.harness import QueryCounter
+
+# Pinned number of SQL statements per route. Raising one of these must be a deliberate
+# decision made in review, not a side effect of an N+1 or an extra refresh.
+QUERY_BUDGETS = {
+    # duplicate check, INSERT, stats, change record
+    "POST /": 4,
+    "GET /": 1,
+    "GET /?fields": 1,
+    # summary row, min/max
+    "GET /stats": 2,
+    # retention and commit horizon in one statement, page
+    "GET /changes": 2,
+    "GET /stream": 2,
+    "GET /batch": 1,
+    "POST /batch": 1,
+    "GET /{product_id}": 1,
+    # read, conditional UPDATE, stats, change record
+    "PATCH /{product_id}": 4,
+    # read, name check, conditional UPDATE, change record: a rename leaves the stats alone
+    "PATCH /{product_id} rename": 4,
+    # soft delete UPDATE, stats, change record
+    "DELETE /{product_id}": 3,
+}
+
+class TestQueryBudgets:
+    """Test suite pinning how many SQL statements every product route may run."""
+
+    async def create_products(self, client, count):
+        ids = []
+        for i in range(count):
+            response = await client.post("/api/v1/products/", json={"name": f"Budget Product {i}", "price": 10.0 + i, "available": True})
+            ids.append(response.json()["data"]["id"])
+        product_cache.clear()
+        return ids
+
+    @pytest.mark.asyncio
+    async def test_create_product(self, client, assert_max_queries, sample_product_data):
+        """Test the query budget of POST /."""
+        # Act
+        with assert_max_queries(QUERY_BUDGETS["POST /"]):
+            response = await client.post("/api/v1/products/", json=sample_product_data)
+
+        # Assert
+        assert response.status_code == status.HTTP_201_CREATED
+
+    @pytest.mark.asyncio
+    async def test_list_products_does_not_grow_with_the_catalog(self, client, assert_max_queries):
+        """Test that listing 1 or 20 products costs the same number of queries."""
+        # Arrange
+        await self.create_products(client, 20)
+
+        # Act
+        with assert_max_queries(QUERY_BUDGETS["GET /"]):
+            full = await client.get("/api/v1/products/")
+        with assert_max_queries(QUERY_BUDGETS["GET /?fields"]):
+            pruned = await client.get("/api/v1/products/?fields=id,price")
+
+        # Assert
+        assert len(full.json()) == len(pruned.json()) == 20
+
+    @pytest.mark.asyncio
+    async def test_stats(self, client, assert_max_queries):
+        """Test the query budget of GET /stats."""
+        # Arrange
+        await self.create_products(client, 3)
+
+        # Act
+        with assert_max_queries(QUERY_BUDGETS["GET /stats"]):
+            response = await client.get("/api/v1/products/stats")
+
+        # Assert
+        assert response.json()["total_count"] == 3
+
+    @pytest.mark.asyncio
+    async def test_changes(self, client, assert_max_queries):
+        """Test the query budget of GET /changes."""
+        # Arrange
+        await self.create_products(client, 5)
+
+        # Act
+        with assert_max_queries(QUERY_BUDGETS["GET /changes"]):
+            response = await client.get("/api/v1/products/changes?since=1")
+
+        # Assert
+        assert len(response.json()["changes"]) == 4
+
+    @pytest.mark.asyncio
+    async def test_stream_backlog(self, client, test_session, assert_max_queries):
+        """Test the query budget of GET /stream when replaying missed changes."""
+        # Arrange
+        await self.create_products(client, 5)
+
+        # Act
+        with assert_max_queries(QUERY_BUDGETS["GET /stream"]):
+            response = await stream_product_changes_handler(None, 0, test_session)
+            await response.body_iterator.__anext__()
+        await response.body_iterator.aclose()
+
+    @pytest.mark.asyncio
+    async def test_batch(self, client, assert_max_queries):
+        """Test that a batch lookup is one query whatever the number of ids."""
+        # Arrange
+        ids = await self.create_products(client, 10)
+
+        # Act
+        with assert_max_queries(QUERY_BUDGETS["GET /batch"]):
+            get_response = await client.get(f"/api/v1/products/batch?ids={','.join(map(str, ids))}")
+        product_cache.clear()
+        with assert_max_queries(QUERY_BUDGETS["POST /batch"]):
+            post_response = await client.post("/api/v1/products/batch", json={"ids": ids})
+
+        # Assert
+        assert len(get_response.json()["data"]) == len(post_response.json()["data"]) == 10
+
+    @pytest.mark.asyncio
+    async def test_get_product_by_id(self, client, assert_max_queries):
+        """Test the query budget of GET /{product_id}, which is never served from the cache."""
+        # Arrange
+        [product_id] = await self.create_products(client, 1)
+
+        # Act & Assert
+        with assert_max_queries(QUERY_BUDGETS["GET /{product_id}"]):
+            await client.get(f"/api/v1/products/{product_id}")
+        with assert_max_queries(QUERY_BUDGETS["GET /{product_id}"]):
+            response = await client.get(f"/api/v1/products/{product_id}")
+        assert response.status_code == status.HTTP_200_OK
+
+    @pytest.mark.asyncio
+    async def test_update_product(self, client, assert_max_queries):
+        """Test the query budget of PATCH /{product_id}."""
+        # Arrange
+        [product_id] = await self.create_products(client, 1)
+
+        # Act & Assert
+        with assert_max_queries(QUERY_BUDGETS["PATCH /{product_id}"]):
+            await client.patch(f"/api/v1/products/{product_id}", json={"price": 1.0})
+        with assert_max_queries(QUERY_BUDGETS["PATCH /{product_id} rename"]):
+            response = await client.patch(f"/api/v1/products/{product_id}", json={"name": "Renamed"})
+        assert response.status_code == status.HTTP_201_CREATED
+
+    @pytest.mark.asyncio
+    async def test_delete_product(self, client, assert_max_queries):
+        """Test the query budget of DELETE /{product_id}."""
+        # Arrange
+        [product_id] = await self.create_products(client, 1)
+
+        # Act
+        with assert_max_queries(QUERY_BUDGETS["DELETE /{product_id}"]):
+            await client.delete(f"/api/v1/products/{product_id}")
+
+        # Assert
+        assert (await client.get(f"/api/v1/products/{product_id}")).status_code == status.HTTP_404_NOT_FOUND
+
+    @pytest.mark.asyncio
+    async def test_over_budget_blocks_fail_with_the_statements(self, client, assert_max_queries):
+        """Test that exceeding a budget reports every statement that ran."""
+        # Act & Assert
+        with pytest.raises(AssertionError, match="(?s)at most 1 queries, 2 were executed.*productstats"):
+            with assert_max_queries(1):
+                await client.get("/api/v1/products/stats")
+
+    @pytest.mark.asyncio
+    async def test_counter_only_sees_its_own_block(self, client, test_engine):
+        """Test that the counter stops recording once the block is left."""
+        # Arrange
+        with QueryCounter(test_engine) as counter:
+            await client.get("/api/v1/products/stats")
+
+        # Act
+        await client.get("/api/v1/products/stats")
+
+        # Assert
+        assert counter.count == QUERY_BUDGETS["GET /stats"]
@@ -0,0 +1,73 @@
+import pytest
+from app.core.broker import ProductChangeBroker
+from app.errors.broker_errors import TooManySubscribersError
+
+def make_event(seq, product_id):
+    return {"seq": seq, "product_id": product_id, "operation": "updated", "payload": None}
+
+class TestProductChangeBroker:
+    """Test suite for the in-process product change broker."""
+
+    @pytest.mark.asyncio
+    async def test_wildcard_subscriber_receives_every_event(self):
+        """Test that a subscriber without filter gets all events."""
+        # Arrange
+        broker = ProductChangeBroker(buffer_size=10, max_subscribers=10)
+        subscription = broker.subscribe()
+
+        # Act
+        broker.publish(make_event(1, 1))
+        broker.publish(make_event(2, 2))
+
+        # Assert
+        assert (await subscription.get(0.1))["seq"] == 1
+        assert (await subscription.get(0.1))["seq"] == 2
+
+    @pytest.mark.asyncio
+    async def test_filtered_subscriber_only_receives_its_products(self):
+        """Test that product id filters are honored."""
+        # Arrange
+        broker = ProductChangeBroker(buffer_size=10, max_subscribers=10)
+        subscription = broker.subscribe([2])
+
+        # Act
+        broker.publish(make_event(1, 1))
+        broker.publish(make_event(2, 2))
+
+        # Assert
+        assert (await subscription.get(0.1))["seq"] == 2
+        assert await subscription.get(0.05) is None
+
+    @pytest.mark.asyncio
+    async def test_slow_consumer_is_evicted_when_buffer_is_full(self):
+        """Test that a full buffer evicts the subscriber instead of blocking publishers."""
+        # Arrange
+        broker = ProductChangeBroker(buffer_size=2, max_subscribers=10)
+        slow = broker.subscribe()
+        fast = broker.subscribe()
+
+        # Act
+        for seq in range(1, 4):
+            broker.publish(make_event(seq, 1))
+            await fast.get(0.1)
+
+        # Assert
+        assert slow.evicted is True
+        assert await slow.get(0.1) is None
+        assert fast.evicted is False
+        assert broker.subscriber_count == 1
+
+    def test_unsubscribe_releases_slot(self):
+        """Test subscriber accounting and the subscriber limit."""
+        # Arrange
+        broker = ProductChangeBroker(buffer_size=1, max_subscribers=1)
+        subscription = broker.subscribe([1, 2])
+
+        # Act & Assert
+        with pytest.raises(TooManySubscribersError):
+            broker.subscribe()
+
+        broker.unsubscribe(subscription)
+        broker.unsubscribe(subscription)
+        assert broker.subscriber_count == 0
+        broker.subscribe()
@@ -0,0 +1,87 @@
+import time
+from app.core.cache import ProductCache
+
+class TestProductCache:
+    """Test suite for the in-process product cache."""
+
+    def test_get_returns_stored_entry_and_counts_hits(self):
+        """Test that a stored product is returned and counted as a hit."""
+        # Arrange
+        cache = ProductCache(max_entries=10, ttl_seconds=60)
+        cache.set(1, {"id": 1, "version": 1})
+
+        # Act
+        result = cache.get(1)
+        missing = cache.get(2)
+
+        # Assert
+        assert result == {"id": 1, "version": 1}
+        assert missing is None
+        assert (cache.hits, cache.misses) == (1, 1)
+
+    def test_expired_entries_are_dropped(self, monkeypatch):
+        """Test that entries older than the TTL are treated as misses."""
+        # Arrange
+        cache = ProductCache(max_entries=10, ttl_seconds=5)
+        cache.set(1, {"id": 1, "version": 1})
+        now = time.monotonic()
+        monkeypatch.setattr(time, "monotonic", lambda: now + 10)
+
+        # Act
+        result = cache.get(1)
+
+        # Assert
+        assert result is None
+        assert len(cache) == 0
+
+    def test_least_recently_used_entry_is_evicted(self):
+        """Test that the cache stays bounded by evicting the least recently used entry."""
+        # Arrange
+        cache = ProductCache(max_entries=2, ttl_seconds=60)
+        cache.set(1, {"id": 1, "version": 1})
+        cache.set(2, {"id": 2, "version": 1})
+        cache.get(1)
+
+        # Act
+        cache.set(3, {"id": 3, "version": 1})
+
+        # Assert
+        assert cache.get_many([1, 2, 3]) == {1: {"id": 1, "version": 1}, 3: {"id": 3, "version": 1}}
+
+    def test_disabled_cache_stores_nothing(self):
+        """Test that a disabled cache always misses."""
+        # Arrange
+        cache = ProductCache(max_entries=10, ttl_seconds=60, enabled=False)
+
+        # Act
+        cache.set(1, {"id": 1, "version": 1})
+
+        # Assert
+        assert cache.get(1) is None
+
+    def test_fill_started_before_an_invalidation_is_dropped(self):
+        """Test that a row read before a write committed is not cached after the write's invalidation."""
+        # Arrange
+        cache = ProductCache(max_entries=10, ttl_seconds=60)
+        generation = cache.generation
+
+        # Act
+        cache.invalidate(1)
+        cache.set(1, {"id": 1, "version": 1}, generation)
+        cache.set(2, {"id": 2, "version": 1}, cache.generation)
+
+        # Assert
+        assert cache.get(1) is None
+        assert cache.get(2) == {"id": 2, "version": 1}
+
+    def test_older_version_never_replaces_a_newer_entry(self):
+        """Test that a late fill with an older row keeps the cached newer one."""
+        # Arrange
+        cache = ProductCache(max_entries=10, ttl_seconds=60)
+        cache.set(1, {"id": 1, "version": 3})
+
+        # Act
+        cache.set(1, {"id": 1, "version": 2})
+
+        # Assert
+        assert cache.get(1) == {"id": 1, "version": 3}
@@ -0,0 +1,69 @@
+import time
+from types import SimpleNamespace
+from sqlalchemy.dialects import postgresql
+from app.core.db import apply_request_deadline
+from app.core.deadline import request_deadline, remaining_time, statement_timeout_ms
+
+class FakeConnection:
+    def __init__(self, dialect_name):
+        self.dialect = SimpleNamespace(name=dialect_name)
+        self.statements = []
+
+    def execute(self, statement, params):
+        self.statements.append((statement, params))
+
+class TestRequestDeadline:
+    """Test suite for deadline propagation to the database layer."""
+
+    def test_no_deadline_outside_requests(self):
+        """Test that nothing is enforced without a deadline."""
+        assert remaining_time() is None
+        assert statement_timeout_ms() is None
+
+    def test_statement_timeout_follows_remaining_time(self):
+        """Test that the statement timeout is the time left until the deadline."""
+        # Arrange
+        token = request_deadline.set(time.monotonic() + 2)
+
+        try:
+            # Act
+            timeout_ms = statement_timeout_ms()
+        finally:
+            request_deadline.reset(token)
+
+        # Assert
+        assert 1000 < timeout_ms <= 2000
+
+    def test_expired_deadline_still_sets_a_timeout(self):
+        """Test that an expired deadline never turns into 0 (no timeout) for PostgreSQL."""
+        # Arrange
+        token = request_deadline.set(time.monotonic() - 1)
+
+        try:
+            # Act & Assert
+            assert statement_timeout_ms() == 1
+        finally:
+            request_deadline.reset(token)
+
+    def test_after_begin_sets_local_statement_timeout_on_postgresql(self):
+        """Test that each transaction sets a local statement_timeout on PostgreSQL only, always with the same SQL."""
+        # Arrange
+        postgres = FakeConnection("postgresql")
+        sqlite = FakeConnection("sqlite")
+        token = request_deadline.set(time.monotonic() + 1)
+
+        try:
+            # Act
+            apply_request_deadline(None, None, postgres)
+            time.sleep(0.01)
+            apply_request_deadline(None, None, postgres)
+            apply_request_deadline(None, None, sqlite)
+        finally:
+            request_deadline.reset(token)
+
+        # Assert
+        (first, first_params), (second, second_params) = postgres.statements
+        assert first is second
+        assert "set_config" in str(first.compile(dialect=postgresql.dialect()))
+        assert int(first_params["timeout_ms"]) > int(second_params["timeout_ms"])
+        assert sqlite.statements == []
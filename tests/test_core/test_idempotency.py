@@ -0,0 +1,106 @@
+import asyncio
+import pytest
+from app.core.idempotency import IdempotencyStore, StoredResponse
+from app.errors.idempotency_errors import IdempotencyKeyReusedError
+
+class TestIdempotencyStore:
+    """Test suite for the bounded Idempotency-Key result store."""
+
+    @pytest.mark.asyncio
+    async def test_replay_returns_stored_response_without_running_again(self):
+        """Test that a repeated key replays the first result."""
+        # Arrange
+        store = IdempotencyStore(max_keys=10, ttl_seconds=60)
+        calls = []
+
+        async def producer():
+            calls.append(1)
+            return StoredResponse(201, {"id": len(calls)})
+
+        # Act
+        first, first_replayed = await store.run("key", "fp", producer)
+        second, second_replayed = await store.run("key", "fp", producer)
+
+        # Assert
+        assert len(calls) == 1
+        assert first_replayed is False
+        assert second_replayed is True
+        assert second.content == {"id": 1}
+
+    @pytest.mark.asyncio
+    async def test_concurrent_requests_are_coalesced(self):
+        """Test that in-flight requests with the same key share one execution."""
+        # Arrange
+        store = IdempotencyStore(max_keys=10, ttl_seconds=60)
+        calls = []
+
+        async def producer():
+            calls.append(1)
+            await asyncio.sleep(0.05)
+            return StoredResponse(201, {"ok": True})
+
+        # Act
+        results = await asyncio.gather(*[store.run("key", "fp", producer) for _ in range(5)])
+
+        # Assert
+        assert len(calls) == 1
+        assert [replayed for _, replayed in results].count(False) == 1
+
+    @pytest.mark.asyncio
+    async def test_same_key_with_different_fingerprint_raises(self):
+        """Test that reusing a key for another payload is rejected."""
+        # Arrange
+        store = IdempotencyStore(max_keys=10, ttl_seconds=60)
+
+        async def producer():
+            return StoredResponse(201, {})
+
+        await store.run("key", "fp-1", producer)
+
+        # Act & Assert
+        with pytest.raises(IdempotencyKeyReusedError):
+            await store.run("key", "fp-2", producer)
+
+    @pytest.mark.asyncio
+    async def test_failed_requests_are_not_stored(self):
+        """Test that an exception releases the key for a retry."""
+        # Arrange
+        store = IdempotencyStore(max_keys=10, ttl_seconds=60)
+
+        async def failing():
+            raise RuntimeError("boom")
+
+        async def producer():
+            return StoredResponse(201, {"ok": True})
+
+        # Act
+        with pytest.raises(RuntimeError):
+            await store.run("key", "fp", failing)
+        response, replayed = await store.run("key", "fp", producer)
+
+        # Assert
+        assert replayed is False
+        assert response.content == {"ok": True}
+
+    @pytest.mark.asyncio
+    async def test_store_is_bounded_by_ttl_and_size(self):
+        """Test LRU eviction and TTL expiry."""
+        # Arrange
+        store = IdempotencyStore(max_keys=2, ttl_seconds=60)
+
+        async def producer():
+            return StoredResponse(201, {})
+
+        # Act
+        for key in ["a", "b", "c"]:
+            await store.run(key, "fp", producer)
+
+        # Assert
+        assert len(store) == 2
+        _, replayed = await store.run("a", "fp", producer)
+        assert replayed is False
+
+        store.ttl_seconds = 0
+        await store.run("z", "fp", producer)
+        _, replayed = await store.run("z", "fp", producer)
+        assert replayed is False
@@ -0,0 +1,36 @@
+import asyncio
+import pytest
+from sqlalchemy.util.concurrency import greenlet_spawn
+from sqlalchemy.util.queue import Empty
+from app.core.pool import ShieldedCheckoutQueue
+
+class TestShieldedCheckoutQueue:
+    """Test suite for the pool queue used by the application engines."""
+
+    @pytest.mark.asyncio
+    async def test_cancelled_checkout_gives_the_connection_back(self):
+        """Test that a request cancelled right as a connection is released stops and leaves the connection in the pool."""
+        # Arrange
+        queue = ShieldedCheckoutQueue(maxsize=1)
+        checkout = asyncio.create_task(greenlet_spawn(queue.get, True, 5))
+        await asyncio.sleep(0.01)
+
+        # Act - released and cancelled in the same loop iteration
+        queue.put_nowait("connection")
+        checkout.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await checkout
+        await asyncio.sleep(0.01)
+
+        # Assert
+        assert queue.get_nowait() == "connection"
+
+    @pytest.mark.asyncio
+    async def test_checkout_times_out_when_the_pool_stays_empty(self):
+        """Test that the pool timeout still applies."""
+        # Arrange
+        queue = ShieldedCheckoutQueue(maxsize=1)
+
+        # Act & Assert
+        with pytest.raises(Empty):
+            await greenlet_spawn(queue.get, True, 0.01)
@@ -0,0 +1,60 @@
+import subprocess
+import sys
+import pytest
+from app.core import db
+from app.core.config import settings
+from app.core.startup import StartupProfiler
+
+class TestStartupProfiler:
+    """Test suite for the startup time profiler."""
+
+    def test_phase_and_mark_are_recorded(self):
+        """Test that phases record durations and marks record time since start."""
+        # Arrange
+        profiler = StartupProfiler()
+
+        # Act
+        with profiler.phase("work"):
+            sum(range(1000))
+        profiler.mark("ready")
+        report = profiler.report()
+
+        # Assert
+        assert set(report["phases"]) == {"work"}
+        assert report["marks"]["ready"] >= report["phases"]["work"]
+
+class TestLazyEngine:
+    """Test suite for deferred engine creation and opt-in create_all."""
+
+    def test_importing_the_app_does_not_create_the_engine(self):
+        """Test that a fresh interpreter can import the app without building an engine."""
+        # Act
+        result = subprocess.run(
+            [sys.executable, "-c", "import app.main, app.core.db as db; print(db._async_engine is None)"],
+            capture_output=True,
+            text=True,
+        )
+
+        # Assert
+        assert result.stdout.strip() == "True", result.stderr
+
+    @pytest.mark.asyncio
+    async def test_lifespan_skips_create_all_by_default(self, monkeypatch):
+        """Test that startup does not touch the schema unless DB_CREATE_ALL is set."""
+        # Arrange
+        calls = []
+
+        async def fake_create_db_and_tables():
+            calls.append(1)
+
+        monkeypatch.setattr(db, "create_db_and_tables", fake_create_db_and_tables)
+
+        # Act
+        async with db.lifespan(None):
+            pass
+        monkeypatch.setattr(settings, "DB_CREATE_ALL", True)
+        async with db.lifespan(None):
+            pass
+
+        # Assert
+        assert calls == [1]
@@ -0,0 +1,60 @@
+import pytest
+from sqlalchemy import text
+from app.core.statement_cache import StatementCacheStats
+from app.services.product_service import ProductService
+from app.schemas.product import ProductCreate
+
+class TestStatementCacheStats:
+    """Test suite for the compiled statement cache hit counters."""
+
+    @pytest.mark.asyncio
+    async def test_repeated_lookups_hit_the_compiled_cache(self, test_engine, test_session):
+        """Test that the by-id lookup is compiled once and reused for other ids."""
+        # Arrange
+        service = ProductService(test_session)
+        first = await service.create_product(ProductCreate(name="First", price=1.0))
+        second = await service.create_product(ProductCreate(name="Second", price=2.0))
+        stats = StatementCacheStats()
+        stats.track(test_engine)
+
+        # Act
+        try:
+            found = [await service.get_product_by_id(product_id) for product_id in (first.id, second.id, first.id)]
+        finally:
+            stats.untrack(test_engine)
+
+        # Assert
+        assert [product.name for product in found] == ["First", "Second", "First"]
+        assert stats.hits >= 2
+        assert stats.report()["hit_rate"] >= 2 / 3
+
+    @pytest.mark.asyncio
+    async def test_raw_driver_sql_is_reported_as_uncached(self, test_engine):
+        """Test that statements without a cache key don't count as misses."""
+        # Arrange
+        stats = StatementCacheStats()
+        stats.track(test_engine)
+
+        # Act
+        try:
+            async with test_engine.connect() as conn:
+                await conn.exec_driver_sql("SELECT 1")
+        finally:
+            stats.untrack(test_engine)
+
+        # Assert
+        assert stats.report() == {"hits": 0, "misses": 0, "uncached": 1, "hit_rate": None}
+
+    @pytest.mark.asyncio
+    async def test_lambda_statements_bind_new_values_on_every_call(self, test_session):
+        """Test that cached lambda statements never reuse values from an earlier call."""
+        # Arrange
+        service = ProductService(test_session)
+        products = [await service.create_product(ProductCreate(name=f"Product {i}", price=1.0)) for i in range(3)]
+
+        # Act
+        await service.delete_product(products[1].id)
+        remaining = await service.get_products_by_ids([p.id for p in products])
+
+        # Assert
+        assert sorted(p.id for p in remaining) == [products[0].id, products[2].id]
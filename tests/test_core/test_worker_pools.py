@@ -0,0 +1,112 @@
+import os
+import sys
+import pytest
+from app.core import db
+from app.core.config import Settings
+from app.server import main, worker_count
+
+
+class TestWorkerPoolSizing:
+    """Test suite for splitting the instance's connection budget between workers."""
+
+    def test_without_budget_every_worker_keeps_the_configured_pool(self):
+        """Test that DB_POOL_SIZE / DB_MAX_OVERFLOW are used as is when no budget is set."""
+        # Act
+        config = Settings(DB_POOL_SIZE=5, DB_MAX_OVERFLOW=10, WEB_CONCURRENCY=8)
+
+        # Assert
+        assert (config.DB_WORKER_POOL_SIZE, config.DB_WORKER_MAX_OVERFLOW) == (5, 10)
+        assert config.ADMISSION_CONCURRENCY_LIMIT == 15
+
+    def test_budget_is_split_evenly_between_workers(self):
+        """Test that the workers' pools never add up to more than DB_MAX_CONNECTIONS."""
+        # Act
+        config = Settings(DB_POOL_SIZE=5, DB_MAX_OVERFLOW=10, DB_MAX_CONNECTIONS=100, WEB_CONCURRENCY=8)
+
+        # Assert
+        assert config.DB_WORKER_CONNECTIONS == 12
+        assert (config.DB_WORKER_POOL_SIZE, config.DB_WORKER_MAX_OVERFLOW) == (5, 7)
+        assert config.DB_WORKER_CONNECTIONS * 8 <= 100
+        assert config.ADMISSION_CONCURRENCY_LIMIT == 12
+
+    def test_small_share_shrinks_the_steady_pool(self):
+        """Test that a share below DB_POOL_SIZE leaves no overflow and at least one connection."""
+        # Act
+        small = Settings(DB_POOL_SIZE=5, DB_MAX_CONNECTIONS=12, WEB_CONCURRENCY=4)
+        starved = Settings(DB_POOL_SIZE=5, DB_MAX_CONNECTIONS=2, WEB_CONCURRENCY=4)
+
+        # Assert
+        assert (small.DB_WORKER_POOL_SIZE, small.DB_WORKER_MAX_OVERFLOW) == (3, 0)
+        assert (starved.DB_WORKER_POOL_SIZE, starved.DB_WORKER_MAX_OVERFLOW) == (1, 0)
+
+    def test_worker_count_defaults_to_the_cores(self, monkeypatch):
+        """Test the precedence of --workers, WEB_CONCURRENCY and the number of cores."""
+        # Arrange
+        monkeypatch.setattr("app.server.settings.WEB_CONCURRENCY", None)
+        monkeypatch.setattr("app.server.settings.RATE_LIMIT_ENABLED", False)
+        monkeypatch.setattr("app.server.settings.IDEMPOTENCY_ENABLED", False)
+        monkeypatch.setattr(os, "cpu_count", lambda: 6)
+
+        # Act & Assert
+        assert worker_count() == 6
+        assert worker_count(2) == 2
+        monkeypatch.setattr("app.server.settings.WEB_CONCURRENCY", 3)
+        assert worker_count() == 3
+
+    def test_process_local_state_defaults_to_one_worker(self, monkeypatch):
+        """Test that rate limits and idempotency keys keep the default at a single worker."""
+        # Arrange
+        monkeypatch.setattr("app.server.settings.WEB_CONCURRENCY", None)
+        monkeypatch.setattr("app.server.settings.RATE_LIMIT_ENABLED", True)
+        monkeypatch.setattr("app.server.settings.IDEMPOTENCY_ENABLED", False)
+        monkeypatch.setattr(os, "cpu_count", lambda: 6)
+
+        # Act & Assert
+        assert worker_count() == 1
+        assert Settings(RATE_LIMIT_ENABLED=False, IDEMPOTENCY_ENABLED=True).PROCESS_LOCAL_FEATURES == ["IDEMPOTENCY_ENABLED"]
+
+    def test_several_workers_are_refused_with_process_local_state(self, monkeypatch):
+        """Test that the supervisor exits instead of starting workers that can't share their state."""
+        # Arrange
+        monkeypatch.setattr("app.server.settings.RATE_LIMIT_ENABLED", True)
+        monkeypatch.setattr(sys, "argv", ["app.server", "--workers", "4"])
+        started = []
+        monkeypatch.setattr("app.server.DrainingServer.run", lambda self, *args: started.append(self))
+
+        # Act
+        with pytest.raises(SystemExit) as exit_info:
+            main()
+
+        # Assert
+        assert exit_info.value.code == 1
+        assert started == []
+
+    def test_several_workers_tail_the_outbox(self):
+        """Test that the change fan-out follows the worker count unless it is set explicitly."""
+        # Act & Assert
+        assert not Settings(WEB_CONCURRENCY=1).CHANGE_FANOUT_OUTBOX_ENABLED
+        assert Settings(WEB_CONCURRENCY=4).CHANGE_FANOUT_OUTBOX_ENABLED
+        assert not Settings(WEB_CONCURRENCY=4, CHANGE_FANOUT_FROM_OUTBOX=False).CHANGE_FANOUT_OUTBOX_ENABLED
+
+
+class TestEngineAfterFork:
+    """Test suite for keeping pooled connections out of forked workers."""
+
+    @pytest.mark.skipif(not hasattr(os, "fork"), reason="fork is not available")
+    def test_forked_child_builds_its_own_engine(self):
+        """Test that a child process forgets the parent's engine and creates a new one."""
+        # Arrange
+        parent_engine = db.get_engine()
+
+        # Act
+        pid = os.fork()
+        if pid == 0:
+            # Child: report through the exit code, pytest must not run anything here
+            forgot = db._async_engine is None and db._session_factory is None
+            fresh = db.get_engine() is not parent_engine
+            os._exit(0 if forgot and fresh else 1)
+        _, status = os.waitpid(pid, 0)
+
+        # Assert
+        assert os.waitstatus_to_exitcode(status) == 0
+        assert db.get_engine() is parent_engine
@@ -0,0 +1,35 @@
+import pytest
+from app.helpers import binary_formats
+from app.helpers.binary_formats import negotiate_media_type, JSON, MSGPACK, ARROW_STREAM
+from app.errors.format_errors import NotAcceptableError
+
+
+class TestNegotiateMediaType:
+    """Test suite for Accept header negotiation of the bulk read formats."""
+
+    def test_missing_or_wildcard_accept_returns_json(self):
+        """Test that JSON stays the default."""
+        # Act & Assert
+        assert negotiate_media_type(None) == JSON
+        assert negotiate_media_type("*/*") == JSON
+
+    def test_highest_quality_supported_type_wins(self, monkeypatch):
+        """Test that q-values are honoured and ties keep the client's order."""
+        # Arrange
+        monkeypatch.setattr(binary_formats, "msgpack", object())
+        monkeypatch.setattr(binary_formats, "pyarrow", object())
+
+        # Act & Assert
+        assert negotiate_media_type(f"{JSON};q=0.5, {MSGPACK}") == MSGPACK
+        assert negotiate_media_type(f"{ARROW_STREAM}, {MSGPACK}") == ARROW_STREAM
+        assert negotiate_media_type(f"{MSGPACK};q=0, {JSON}") == JSON
+
+    def test_unavailable_library_falls_back_or_raises(self, monkeypatch):
+        """Test that a format whose library is not installed is never selected."""
+        # Arrange
+        monkeypatch.setattr(binary_formats, "msgpack", None)
+
+        # Act & Assert
+        assert negotiate_media_type(f"{MSGPACK}, {JSON};q=0.1") == JSON
+        with pytest.raises(NotAcceptableError):
+            negotiate_media_type(MSGPACK)
@@ -0,0 +1,29 @@
+import pytest
+from app.helpers.change_cursor import parse_change_cursor, format_change_cursor
+
+class TestChangeCursor:
+    """Test suite for the change feed cursor."""
+
+    def test_single_database_keeps_a_plain_seq(self):
+        """Test that unsharded cursors are the seq itself, as an int."""
+        # Act & Assert
+        assert parse_change_cursor("12", 1) == [12]
+        assert parse_change_cursor(12, 1) == [12]
+        assert format_change_cursor([12]) == 12
+
+    def test_sharded_cursor_has_one_seq_per_shard(self):
+        """Test the dotted form and that "0" or nothing starts every shard from the beginning."""
+        # Act & Assert
+        assert parse_change_cursor("12.7.30", 3) == [12, 7, 30]
+        assert format_change_cursor([12, 7, 30]) == "12.7.30"
+        assert parse_change_cursor("0", 3) == [0, 0, 0]
+        assert parse_change_cursor(None, 2) == [0, 0]
+
+    def test_invalid_cursors_are_rejected(self):
+        """Test malformed values and a cursor from another shard count."""
+        # Act & Assert
+        for value in ("", "1.x", "-1", "1..2"):
+            with pytest.raises(ValueError):
+                parse_change_cursor(value, 2)
+        with pytest.raises(ValueError):
+            parse_change_cursor("4.5", 3)
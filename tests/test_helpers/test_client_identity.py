@@ -0,0 +1,32 @@
+from app.helpers.client_identity import client_identity
+
+def make_scope(peer, forwarded=None):
+    headers = [(b"x-client-id", b"spoofed")]
+    if forwarded is not None:
+        headers.append((b"x-forwarded-for", forwarded.encode()))
+    return {"client": (peer, 1234), "headers": headers}
+
+class TestClientIdentity:
+    """Test suite for client_identity."""
+
+    def test_peer_address_is_used_without_trusted_proxies(self):
+        """Test that client supplied headers are ignored when the peer is not a proxy."""
+        # Act & Assert
+        assert client_identity(make_scope("198.51.100.1", "10.0.0.9"), []) == "198.51.100.1"
+
+    def test_trusted_proxy_forwards_the_client_address(self):
+        """Test that the rightmost address not added by our proxies is the client."""
+        # Arrange
+        proxies = ["10.0.0.1", "10.0.0.2"]
+
+        # Act
+        identity = client_identity(make_scope("10.0.0.1", "6.6.6.6, 198.51.100.1, 10.0.0.2"), proxies)
+
+        # Assert
+        assert identity == "198.51.100.1"
+
+    def test_trusted_proxy_without_header_falls_back_to_the_peer(self):
+        """Test that a proxy that forwarded nothing is identified by its own address."""
+        # Act & Assert
+        assert client_identity(make_scope("10.0.0.1"), ["10.0.0.1"]) == "10.0.0.1"
+        assert client_identity({"client": None, "headers": []}, []) == "unknown"
@@ -0,0 +1,49 @@
+import json
+from datetime import datetime
+from app.helpers.json_rows import dump_rows, trusted_dump
+from app.models.products.product import Product
+from app.schemas.product import ProductResponse, partial_product_response
+
+
+class TestTrustedDump:
+    """Test suite for serializing database objects without pydantic validation."""
+
+    def make_product(self):
+        return Product(
+            id=7,
+            name="Trusted Product",
+            price=12.5,
+            available=False,
+            created_at=datetime(2025, 1, 1, 8, 30),
+            updated_at=datetime(2025, 1, 2, 9, 15, 0, 250000),
+            version=3,
+        )
+
+    def test_matches_validated_dump(self):
+        """Test that the trusted path produces exactly what model_validate + model_dump(mode="json") does."""
+        # Arrange
+        product = self.make_product()
+
+        # Act
+        data = trusted_dump(product, ProductResponse)
+
+        # Assert
+        assert data == ProductResponse.model_validate(product).model_dump(mode="json")
+        assert list(data) == list(ProductResponse.model_fields)
+
+    def test_only_copies_the_model_fields(self):
+        """Test that a partial model only reads its own fields."""
+        # Act
+        data = trusted_dump(self.make_product(), partial_product_response(("id", "price")))
+
+        # Assert
+        assert data == {"id": 7, "price": 12.5}
+
+    def test_output_is_json_ready(self):
+        """Test that the result needs no further encoding and agrees with dump_rows."""
+        # Act
+        data = trusted_dump(self.make_product(), ProductResponse)
+
+        # Assert
+        assert json.loads(json.dumps(data)) == data
+        assert json.loads(dump_rows([data])) == [data]
@@ -0,0 +1,36 @@
+import pytest
+from app.helpers.query_params import parse_id_list, parse_field_list
+
+
+class TestQueryParams:
+    """Test suite for query parameter parsing helpers."""
+
+    def test_parse_id_list_keeps_order_and_drops_duplicates(self):
+        """Test that ids are returned in order without duplicates."""
+        # Act
+        result = parse_id_list("3, 1,3,,2")
+
+        # Assert
+        assert result == [3, 1, 2]
+
+    def test_parse_id_list_rejects_non_numeric_ids(self):
+        """Test that a non numeric id raises ValueError."""
+        # Act & Assert
+        with pytest.raises(ValueError):
+            parse_id_list("1,abc")
+
+    def test_parse_field_list_follows_allowed_order(self):
+        """Test that fields come back in the order of the allowed fields."""
+        # Act
+        result = parse_field_list("price, id,price", ["id", "name", "price"])
+
+        # Assert
+        assert result == ["id", "price"]
+
+    def test_parse_field_list_rejects_unknown_and_empty_fields(self):
+        """Test that unknown or empty fieldsets raise ValueError."""
+        # Act & Assert
+        with pytest.raises(ValueError, match="password"):
+            parse_field_list("id,password", ["id", "name"])
+        with pytest.raises(ValueError):
+            parse_field_list(" , ", ["id", "name"])
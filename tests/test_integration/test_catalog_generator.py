@@ -0,0 +1,51 @@
+import pytest
+from sqlalchemy import func, select
+from app.models.products.product import Product
+from app.services.product_service import ProductService
+from benchmarks.catalog import CatalogSpec, generate_products
+
+class TestCatalogGenerator:
+    """Test suite for the synthetic catalog generator."""
+
+    def test_same_seed_generates_the_same_rows(self):
+        """Test that the generator is reproducible and the seed changes the output."""
+        # Arrange
+        spec = CatalogSpec(rows=25_000, seed=7)
+
+        # Act
+        first = list(generate_products(spec))
+        second = list(generate_products(spec))
+        other_seed = list(generate_products(CatalogSpec(rows=25_000, seed=8)))
+
+        # Assert
+        assert first == second
+        assert first != other_seed
+
+    def test_rows_follow_the_requested_distributions(self):
+        """Test unique names, skewed prices and the availability ratio."""
+        # Arrange
+        spec = CatalogSpec(rows=20_000, available_ratio=0.7, deleted_ratio=0.1)
+
+        # Act
+        rows = list(generate_products(spec))
+        prices = sorted(row[1] for row in rows)
+
+        # Assert
+        assert len({row[0] for row in rows}) == spec.rows
+        assert prices[0] >= 0.99
+        # Long tail: the mean is well above the median
+        assert sum(prices) / len(prices) > prices[len(prices) // 2] * 1.3
+        assert abs(sum(row[2] for row in rows) / spec.rows - 0.7) < 0.02
+        assert abs(sum(row[6] is not None for row in rows) / spec.rows - 0.1) < 0.02
+
+    @pytest.mark.asyncio
+    async def test_loaded_catalog_is_visible_to_the_service(self, synthetic_catalog, test_session):
+        """Test that bulk loaded rows are queryable and the stats summary was rebuilt."""
+        # Act
+        count = (await test_session.execute(select(func.count()).select_from(Product))).scalar_one()
+        stats = await ProductService(test_session).get_stats()
+
+        # Assert
+        assert count == synthetic_catalog.rows
+        assert stats["total_count"] == synthetic_catalog.rows
+        assert stats["min_price"] >= 0.99
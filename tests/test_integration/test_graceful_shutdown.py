@@ -0,0 +1,148 @@
+import asyncio
+import time
+import httpx
+import pytest
+import pytest_asyncio
+import uvicorn
+from fastapi import status
+from httpx import AsyncClient, ASGITransport
+from sqlalchemy import event
+from app.main import app
+from app.core import db
+from app.core.shutdown import request_drain
+from app.core.statement_cache import statement_cache_stats
+from app.server import DrainingServer
+from app.services.product_service import ProductService, summarize_stats
+
+SLOW_REQUESTS = 10
+
+@pytest_asyncio.fixture
+async def served_app(test_engine, monkeypatch):
+    """
+    The real app running its lifespan on the test database, without dependency overrides,
+    with a record of every DBAPI connection opened and closed.
+    """
+    opened, closed = [], []
+    event.listen(test_engine.sync_engine, "connect", lambda dbapi_connection, record: opened.append(record))
+    event.listen(test_engine.sync_engine, "close", lambda dbapi_connection, record: closed.append(record))
+    monkeypatch.setattr(db.settings, "COMPACTION_ENABLED", False)
+    # Installed the way get_engine would have created it
+    monkeypatch.setattr(db, "_async_engine", test_engine)
+    statement_cache_stats.track(test_engine)
+    monkeypatch.setattr(db, "_session_factory", None)
+
+    lifespan = app.router.lifespan_context(app)
+    await lifespan.__aenter__()
+    transport = ASGITransport(app=app)
+    async with AsyncClient(transport=transport, base_url="http://test") as client:
+        yield client, lifespan, opened, closed
+
+class TestGracefulShutdown:
+    """Test that shutting down under load finishes every request and closes every connection."""
+
+    @pytest.mark.asyncio
+    async def test_shutdown_under_load_drains_requests_and_disposes_the_pool(self, served_app, monkeypatch):
+        """Test that in-flight requests complete, new ones are refused and no connection stays open."""
+        # Arrange
+        client, lifespan, opened, closed = served_app
+        get_stats = ProductService.get_stats
+
+        async def slow_get_stats(self):
+            # Still holding its connection when the shutdown starts
+            stats = await get_stats(self)
+            await asyncio.sleep(0.2)
+            return stats
+
+        monkeypatch.setattr(ProductService, "get_stats", slow_get_stats)
+        in_flight = [asyncio.create_task(client.get("/api/v1/products/stats")) for _ in range(SLOW_REQUESTS)]
+        long_poll = asyncio.create_task(client.get("/api/v1/products/changes?wait=20"))
+        while request_drain.in_flight < SLOW_REQUESTS + 1:
+            await asyncio.sleep(0.01)
+
+        # Act
+        started = time.monotonic()
+        shutdown = asyncio.create_task(lifespan.__aexit__(None, None, None))
+        while not request_drain.draining:
+            await asyncio.sleep(0)
+        late = await client.get("/api/v1/products/stats")
+        responses = await asyncio.gather(*in_flight)
+        poll = await long_poll
+        await shutdown
+
+        # Assert
+        assert [response.status_code for response in responses] == [status.HTTP_200_OK] * SLOW_REQUESTS
+        assert all(response.json()["total_count"] == 0 for response in responses)
+        # The long poll is answered instead of holding the shutdown for 20 seconds
+        assert poll.status_code == status.HTTP_200_OK
+        assert poll.json()["changes"] == []
+        assert time.monotonic() - started < 5
+        assert late.status_code == status.HTTP_503_SERVICE_UNAVAILABLE
+        assert late.headers["connection"] == "close"
+        # Every connection the pool opened was closed by the engine disposal
+        assert opened and len(closed) == len(opened)
+        assert db._async_engine is None
+        assert request_drain.in_flight == 0 and not request_drain.draining
+
+    @pytest.mark.asyncio
+    async def test_shutdown_gives_up_on_requests_after_the_drain_timeout(self, served_app, monkeypatch):
+        """Test that a request outliving the drain timeout doesn't block the shutdown."""
+        # Arrange
+        client, lifespan, _, _ = served_app
+        monkeypatch.setattr(db.settings, "SHUTDOWN_DRAIN_TIMEOUT_SECONDS", 0.1)
+        release = asyncio.Event()
+
+        async def stuck_get_stats(self):
+            await release.wait()
+            return summarize_stats(0, 0, 0, None, None)
+
+        monkeypatch.setattr(ProductService, "get_stats", stuck_get_stats)
+        stuck = asyncio.create_task(client.get("/api/v1/products/stats"))
+        while request_drain.in_flight < 1:
+            await asyncio.sleep(0.01)
+
+        # Act
+        await asyncio.wait_for(lifespan.__aexit__(None, None, None), 5)
+
+        # Assert
+        assert db._async_engine is None
+        release.set()
+        assert (await stuck).status_code == status.HTTP_200_OK
+
+
+class TestShutdownUnderUvicorn:
+    """Test the shutdown of a real uvicorn server, which only runs the lifespan shutdown after the connections close."""
+
+    @pytest.mark.asyncio
+    async def test_exit_ends_streams_and_long_polls_right_away(self, test_engine, monkeypatch):
+        """Test that open streams and long polls don't hold the worker until timeout_graceful_shutdown."""
+        # Arrange
+        monkeypatch.setattr(db.settings, "COMPACTION_ENABLED", False)
+        monkeypatch.setattr(db, "_async_engine", test_engine)
+        monkeypatch.setattr(db, "_session_factory", None)
+        config = uvicorn.Config(app, host="127.0.0.1", port=0, timeout_graceful_shutdown=30, log_level="warning")
+        server = DrainingServer(config)
+        serving = asyncio.create_task(server.serve())
+        while not server.started:
+            await asyncio.sleep(0.01)
+        port = server.servers[0].sockets[0].getsockname()[1]
+
+        async with httpx.AsyncClient(base_url=f"http://127.0.0.1:{port}", timeout=60) as client:
+            long_poll = asyncio.create_task(client.get("/api/v1/products/changes?wait=20"))
+            async with client.stream("GET", "/api/v1/products/stream") as stream:
+                while request_drain.in_flight < 2:
+                    await asyncio.sleep(0.01)
+
+                # Act: what uvicorn's signal handler does on SIGTERM
+                started = time.monotonic()
+                server.should_exit = True
+                body = [chunk async for chunk in stream.aiter_text()]
+            poll = await long_poll
+            await asyncio.wait_for(serving, 10)
+
+        # Assert
+        assert time.monotonic() - started < 5
+        assert stream.status_code == status.HTTP_200_OK and body == []
+        assert poll.status_code == status.HTTP_200_OK
+        assert poll.json()["changes"] == []
+        assert db._async_engine is None
+        assert request_drain.in_flight == 0 and not request_drain.draining
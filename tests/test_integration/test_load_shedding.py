@@ -0,0 +1,71 @@
+import asyncio
+import pytest
+import pytest_asyncio
+from fastapi import status
+from httpx import AsyncClient, ASGITransport
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from sqlmodel import SQLModel
+from app.main import app
+from app.core.db import get_async_session
+from app.core.pool import ShieldedCheckoutQueuePool
+
+class SlowSession(AsyncSession):
+    """Session that holds a pooled connection for `delay` seconds before every statement."""
+    delay = 0.0
+
+    async def execute(self, *args, **kwargs):
+        await self.connection()
+        await asyncio.sleep(self.delay)
+        return await super().execute(*args, **kwargs)
+
+@pytest_asyncio.fixture
+async def slow_db(tmp_path):
+    """
+    File based SQLite engine with a small real pool, wired into the app through a slow session.
+    """
+    engine = create_async_engine(
+        f"sqlite+aiosqlite:///{tmp_path / 'slow.db'}", poolclass=ShieldedCheckoutQueuePool, pool_size=2, max_overflow=0
+    )
+    async with engine.begin() as conn:
+        await conn.run_sync(SQLModel.metadata.create_all)
+
+    session_factory = async_sessionmaker(engine, class_=SlowSession, expire_on_commit=False)
+
+    async def slow_session():
+        async with session_factory() as session:
+            yield session
+
+    app.dependency_overrides[get_async_session] = slow_session
+    yield engine
+
+    app.dependency_overrides.clear()
+    SlowSession.delay = 0.0
+    await engine.dispose()
+
+class TestLoadShedding:
+    """Test that request deadlines shed load and give pool connections back under a slow database."""
+
+    @pytest.mark.asyncio
+    async def test_pool_recovers_after_deadline_exceeded(self, slow_db):
+        """Test that timed out requests return 504 and leave no connection checked out."""
+        # Arrange
+        SlowSession.delay = 5.0
+        # Own client address, so the app's rate limit buckets left by other tests don't apply
+        transport = ASGITransport(app=app, client=("192.0.2.32", 1))
+
+        async with AsyncClient(transport=transport, base_url="http://test") as client:
+            # Act - more concurrent requests than the pool has connections
+            responses = await asyncio.gather(*[
+                client.get("/api/v1/products/", headers={"X-Request-Timeout": "0.2"})
+                for _ in range(5)
+            ])
+            await asyncio.sleep(0.05)
+            checked_out = slow_db.pool.checkedout()
+
+            SlowSession.delay = 0.0
+            recovered = await client.get("/api/v1/products/")
+
+        # Assert
+        assert all(r.status_code == status.HTTP_504_GATEWAY_TIMEOUT for r in responses)
+        assert checked_out == 0
+        assert recovered.status_code == status.HTTP_200_OK
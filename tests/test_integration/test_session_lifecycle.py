@@ -0,0 +1,91 @@
+import pytest
+import pytest_asyncio
+from fastapi import status
+from httpx import AsyncClient, ASGITransport
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+from app.main import app
+from app.core.cache import product_cache
+from app.core.db import get_async_session
+from app.api.handlers.product_handler import get_products_handler, stream_product_changes_handler
+
+@pytest_asyncio.fixture
+async def pooled_app(test_engine):
+    """
+    The app wired to request scoped sessions on a real pool, like in production,
+    with a record of every connection checkout.
+    """
+    session_factory = async_sessionmaker(test_engine, class_=AsyncSession, expire_on_commit=False)
+    checkouts = []
+
+    def on_checkout(dbapi_connection, connection_record, connection_proxy):
+        checkouts.append(connection_record)
+
+    async def request_session():
+        async with session_factory() as session:
+            yield session
+
+    event.listen(test_engine.sync_engine.pool, "checkout", on_checkout)
+    app.dependency_overrides[get_async_session] = request_session
+    transport = ASGITransport(app=app)
+    async with AsyncClient(transport=transport, base_url="http://test") as client:
+        yield client, session_factory, checkouts
+
+    app.dependency_overrides.clear()
+    event.remove(test_engine.sync_engine.pool, "checkout", on_checkout)
+
+class TestSessionLifecycle:
+    """Test that requests only hold a pooled connection while they actually use the database."""
+
+    @pytest.mark.asyncio
+    async def test_cached_and_rejected_requests_never_check_out_a_connection(self, pooled_app, sample_product_data):
+        """Test that the session dependency alone doesn't touch the pool."""
+        # Arrange
+        client, _, checkouts = pooled_app
+        created = await client.post("/api/v1/products/", json=sample_product_data)
+        product_id = created.json()["data"]["id"]
+        await client.get(f"/api/v1/products/batch?ids={product_id}")
+        checkouts.clear()
+
+        # Act
+        cached = await client.get(f"/api/v1/products/batch?ids={product_id}")
+        rejected = await client.get("/api/v1/products/?fields=unknown")
+
+        # Assert
+        assert cached.status_code == status.HTTP_200_OK
+        assert rejected.status_code == status.HTTP_400_BAD_REQUEST
+        assert checkouts == []
+
+    @pytest.mark.asyncio
+    async def test_handler_releases_the_connection_before_returning(self, pooled_app, test_engine, sample_product_data):
+        """Test that the connection is back in the pool before the response is serialized."""
+        # Arrange
+        client, session_factory, _ = pooled_app
+        await client.post("/api/v1/products/", json=sample_product_data)
+
+        async with session_factory() as session:
+            # Act
+            response = await get_products_handler(session)
+
+            # Assert
+            assert test_engine.sync_engine.pool.checkedout() == 0
+            assert not session.in_transaction()
+            assert b"Test Product" in response.body
+
+    @pytest.mark.asyncio
+    async def test_open_stream_does_not_hold_a_connection(self, pooled_app, test_engine, sample_product_data):
+        """Test that an SSE stream releases its connection once the backlog is read."""
+        # Arrange
+        client, session_factory, _ = pooled_app
+        await client.post("/api/v1/products/", json=sample_product_data)
+
+        async with session_factory() as session:
+            response = await stream_product_changes_handler(None, 0, session)
+            try:
+                # Act
+                await response.body_iterator.__anext__()
+
+                # Assert
+                assert test_engine.sync_engine.pool.checkedout() == 0
+            finally:
+                await response.body_iterator.aclose()
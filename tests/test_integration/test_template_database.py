@@ -0,0 +1,51 @@
+import pytest
+from sqlalchemy import inspect, text
+from tests.harness import TemplateDatabase
+
+class TestTemplateDatabase:
+    """Test suite for the template database harness used by the fixtures and benchmarks."""
+
+    @pytest.mark.asyncio
+    async def test_clones_have_the_migrated_schema(self, database_template):
+        """Test that a clone already contains every migrated table."""
+        # Arrange
+        engine = await database_template.clone()
+
+        # Act
+        async with engine.connect() as conn:
+            tables = await conn.run_sync(lambda sync_conn: set(inspect(sync_conn).get_table_names()))
+
+        # Assert
+        assert {"product", "productchange", "productstats", "schema_migrations"} <= tables
+        await database_template.drop(engine)
+
+    @pytest.mark.asyncio
+    async def test_clones_are_isolated_from_each_other(self, database_template):
+        """Test that data written in one clone is not visible in another."""
+        # Arrange
+        first = await database_template.clone()
+        second = await database_template.clone()
+
+        # Act
+        async with first.begin() as conn:
+            await conn.execute(text("UPDATE productstats SET total_count = 42"))
+        async with second.connect() as conn:
+            total = (await conn.execute(text("SELECT SUM(total_count) FROM productstats"))).scalar_one()
+
+        # Assert
+        assert total == 0
+        await database_template.drop(first)
+        await database_template.drop(second)
+
+    def test_template_names_are_unique_per_worker(self, tmp_path, monkeypatch):
+        """Test that parallel workers never share a template."""
+        # Arrange
+        monkeypatch.setenv("PYTEST_XDIST_WORKER", "gw3")
+
+        # Act
+        first = TemplateDatabase(tmp_path)
+        second = TemplateDatabase(tmp_path)
+
+        # Assert
+        assert first.template_name.startswith("pm_gw3_")
+        assert first.template_name != second.template_name
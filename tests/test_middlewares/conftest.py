@@ -0,0 +1,21 @@
+import asyncio
+import pytest
+from fastapi import FastAPI
+
+@pytest.fixture
+def middleware_app():
+    """
+    Minimal app without database dependencies to exercise middlewares in isolation.
+    """
+    app = FastAPI()
+
+    @app.get("/items/{item_id}")
+    async def get_item(item_id: int):
+        return {"id": item_id}
+
+    @app.get("/slow")
+    async def slow():
+        await asyncio.sleep(0.1)
+        return {"ok": True}
+
+    return app
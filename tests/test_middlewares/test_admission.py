@@ -0,0 +1,26 @@
+import asyncio
+import pytest
+from fastapi import status
+from httpx import AsyncClient, ASGITransport
+from app.middlewares.admission import AdmissionControlMiddleware
+
+class TestAdmissionControlMiddleware:
+    """Test suite for AdmissionControlMiddleware."""
+
+    @pytest.mark.asyncio
+    async def test_excess_concurrent_requests_get_fast_503(self, middleware_app):
+        """Test that requests over the concurrency limit are rejected without waiting."""
+        # Arrange
+        app = middleware_app
+        app.add_middleware(AdmissionControlMiddleware, max_concurrency=2, exempt_paths=[])
+        transport = ASGITransport(app=app)
+
+        async with AsyncClient(transport=transport, base_url="http://test") as client:
+            # Act
+            responses = await asyncio.gather(*[client.get("/slow") for _ in range(4)])
+            after = await client.get("/slow")
+
+        # Assert
+        codes = sorted(r.status_code for r in responses)
+        assert codes == [200, 200, status.HTTP_503_SERVICE_UNAVAILABLE, status.HTTP_503_SERVICE_UNAVAILABLE]
+        assert after.status_code == 200
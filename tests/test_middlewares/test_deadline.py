@@ -0,0 +1,59 @@
+import pytest
+from fastapi import status
+from httpx import AsyncClient, ASGITransport
+from app.middlewares.deadline import DeadlineMiddleware
+
+class TestDeadlineMiddleware:
+    """Test suite for DeadlineMiddleware."""
+
+    @pytest.mark.asyncio
+    async def test_slow_request_returns_504(self, middleware_app):
+        """Test that a request over its deadline is cancelled with 504."""
+        # Arrange
+        middleware_app.add_middleware(DeadlineMiddleware, default_timeout=0.02, max_timeout=1, route_timeouts={}, exempt_paths=[])
+        transport = ASGITransport(app=middleware_app)
+
+        async with AsyncClient(transport=transport, base_url="http://test") as client:
+            # Act
+            slow = await client.get("/slow")
+            fast = await client.get("/items/1")
+
+        # Assert
+        assert slow.status_code == status.HTTP_504_GATEWAY_TIMEOUT
+        assert fast.status_code == status.HTTP_200_OK
+
+    @pytest.mark.asyncio
+    async def test_route_default_and_header_override(self, middleware_app):
+        """Test per-route defaults and the X-Request-Timeout header."""
+        # Arrange
+        middleware_app.add_middleware(
+            DeadlineMiddleware,
+            default_timeout=0.02,
+            max_timeout=1,
+            route_timeouts={"GET /slow": 1},
+            exempt_paths=[]
+        )
+        transport = ASGITransport(app=middleware_app)
+
+        async with AsyncClient(transport=transport, base_url="http://test") as client:
+            # Act
+            route_default = await client.get("/slow")
+            shorter = await client.get("/slow", headers={"X-Request-Timeout": "0.01"})
+
+        # Assert
+        assert route_default.status_code == status.HTTP_200_OK
+        assert shorter.status_code == status.HTTP_504_GATEWAY_TIMEOUT
+
+    @pytest.mark.asyncio
+    async def test_non_finite_header_keeps_the_default(self, middleware_app):
+        """Test that nan and inf in X-Request-Timeout are ignored instead of disabling the deadline."""
+        # Arrange
+        middleware_app.add_middleware(DeadlineMiddleware, default_timeout=0.02, max_timeout=1, route_timeouts={}, exempt_paths=[])
+        transport = ASGITransport(app=middleware_app)
+
+        async with AsyncClient(transport=transport, base_url="http://test") as client:
+            # Act
+            responses = [await client.get("/slow", headers={"X-Request-Timeout": value}) for value in ("nan", "inf", "-inf")]
+
+        # Assert
+        assert [r.status_code for r in responses] == [status.HTTP_504_GATEWAY_TIMEOUT] * 3
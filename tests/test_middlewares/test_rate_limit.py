@@ -0,0 +1,107 @@
+import pytest
+from fastapi import status
+from httpx import AsyncClient, ASGITransport
+from app.middlewares.rate_limit import RateLimitMiddleware, TokenBucket, route_key
+
+class TestTokenBucket:
+    """Test suite for the token bucket used by the rate limiter."""
+
+    def test_bucket_allows_burst_then_limits(self):
+        """Test that the bucket empties after `capacity` takes."""
+        # Arrange
+        bucket = TokenBucket(rate=1.0, capacity=2)
+
+        # Act & Assert
+        assert bucket.take() == 0
+        assert bucket.take() == 0
+        assert bucket.take() > 0
+
+    def test_route_key_collapses_ids(self):
+        """Test that numeric path segments share a single route key."""
+        assert route_key("GET", "/api/v1/products/12") == "GET /api/v1/products/{id}"
+
+class TestRateLimitMiddleware:
+    """Test suite for RateLimitMiddleware."""
+
+    @pytest.mark.asyncio
+    async def test_requests_over_the_limit_get_429(self, middleware_app):
+        """Test that a client exceeding its bucket receives 429 with Retry-After."""
+        # Arrange
+        app = middleware_app
+        app.add_middleware(RateLimitMiddleware, rate=0.5, burst=2, route_limits={}, exempt_paths=[], max_buckets=100)
+        transport = ASGITransport(app=app)
+
+        async with AsyncClient(transport=transport, base_url="http://test") as client:
+            # Act
+            responses = [await client.get(f"/items/{i}") for i in range(3)]
+
+        # Assert
+        assert [r.status_code for r in responses] == [200, 200, status.HTTP_429_TOO_MANY_REQUESTS]
+        assert int(responses[-1].headers["retry-after"]) >= 1
+
+    @pytest.mark.asyncio
+    async def test_limits_are_per_client_and_per_route(self, middleware_app):
+        """Test that buckets are isolated by client address and by route overrides."""
+        # Arrange
+        app = middleware_app
+        app.add_middleware(
+            RateLimitMiddleware,
+            rate=0.5,
+            burst=1,
+            route_limits={"GET /slow": (0.5, 3)},
+            exempt_paths=[],
+            max_buckets=100
+        )
+
+        async with AsyncClient(transport=ASGITransport(app=app, client=("198.51.100.1", 1)), base_url="http://test") as client_a, \
+                AsyncClient(transport=ASGITransport(app=app, client=("198.51.100.2", 1)), base_url="http://test") as client_b:
+            # Act
+            first = await client_a.get("/items/1")
+            other_client = await client_b.get("/items/1")
+            limited = await client_a.get("/items/1")
+            override = [await client_a.get("/slow") for _ in range(3)]
+
+        # Assert
+        assert first.status_code == 200
+        assert other_client.status_code == 200
+        assert limited.status_code == status.HTTP_429_TOO_MANY_REQUESTS
+        assert all(r.status_code == 200 for r in override)
+
+    @pytest.mark.asyncio
+    async def test_client_supplied_ids_do_not_get_a_fresh_bucket(self, middleware_app):
+        """Test that rotating X-Client-Id or X-Forwarded-For doesn't get around the limit."""
+        # Arrange
+        app = middleware_app
+        app.add_middleware(RateLimitMiddleware, rate=0.5, burst=1, route_limits={}, exempt_paths=[], max_buckets=100)
+        transport = ASGITransport(app=app)
+
+        async with AsyncClient(transport=transport, base_url="http://test") as client:
+            # Act
+            responses = [
+                await client.get("/items/1", headers={"X-Client-Id": f"client-{i}", "X-Forwarded-For": f"192.0.2.{i}"})
+                for i in range(2)
+            ]
+
+        # Assert
+        assert [r.status_code for r in responses] == [200, status.HTTP_429_TOO_MANY_REQUESTS]
+
+    @pytest.mark.asyncio
+    async def test_trusted_proxy_is_limited_per_forwarded_client(self, middleware_app):
+        """Test that requests relayed by a trusted proxy get one bucket per original client."""
+        # Arrange
+        app = middleware_app
+        app.add_middleware(
+            RateLimitMiddleware, rate=0.5, burst=1, route_limits={}, exempt_paths=[], max_buckets=100,
+            trusted_proxies=["10.0.0.1"]
+        )
+        transport = ASGITransport(app=app, client=("10.0.0.1", 1))
+
+        async with AsyncClient(transport=transport, base_url="http://test") as client:
+            # Act
+            first = await client.get("/items/1", headers={"X-Forwarded-For": "198.51.100.1"})
+            other_client = await client.get("/items/1", headers={"X-Forwarded-For": "198.51.100.2"})
+            limited = await client.get("/items/1", headers={"X-Forwarded-For": "198.51.100.1"})
+
+        # Assert
+        assert first.status_code == other_client.status_code == 200
+        assert limited.status_code == status.HTTP_429_TOO_MANY_REQUESTS
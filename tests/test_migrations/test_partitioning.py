@@ -0,0 +1,58 @@
+import importlib
+import pytest
+
+partitioning = importlib.import_module("app.migrations.versions.0005_product_hash_partitions")
+
+class RecordingOperations:
+    """PostgreSQL operations that record the SQL instead of running it, on a table not partitioned yet."""
+    is_postgresql = True
+
+    def __init__(self):
+        self.statements = []
+
+    async def execute(self, sql, params=None):
+        self.statements.append(sql)
+        return self
+
+    def first(self):
+        return None
+
+class TestProductHashPartitioning:
+    """Test suite for the optional hash partitioning migration."""
+
+    def test_partition_statements_create_one_table_per_remainder(self):
+        """Test that N partitions are created with matching modulus and remainders."""
+        # Act
+        statements = partitioning.partition_statements(4)
+        partitions = [s for s in statements if "PARTITION OF product" in s]
+
+        # Assert
+        assert len(partitions) == 4
+        assert all("MODULUS 4" in s for s in partitions)
+        assert {f"REMAINDER {r})" in s for r, s in enumerate(partitions)} == {True}
+        assert statements.index("INSERT INTO product SELECT * FROM product_unpartitioned") > statements.index(partitions[-1])
+        assert "DROP TABLE product_unpartitioned" in statements
+
+    def test_partitioned_table_keeps_live_row_indexes(self):
+        """Test that the partial indexes are recreated on both directions."""
+        # Act
+        upgrade = partitioning.partition_statements(2)
+        downgrade = partitioning.unpartition_statements()
+
+        # Assert
+        for statement in partitioning.INDEXES:
+            assert statement in upgrade
+            assert statement in downgrade
+
+    @pytest.mark.asyncio
+    async def test_partition_count_is_fixed_by_the_migration(self, monkeypatch):
+        """Test that the upgrade always builds the migration's own number of partitions, whatever the environment."""
+        # Arrange
+        monkeypatch.setenv("PRODUCT_HASH_PARTITIONS", "3")
+        op = RecordingOperations()
+
+        # Act
+        await partitioning.upgrade(op)
+
+        # Assert
+        assert op.statements[1:] == partitioning.partition_statements(partitioning.PARTITIONS)
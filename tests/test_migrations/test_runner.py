@@ -0,0 +1,199 @@
+import importlib
+import pytest
+import pytest_asyncio
+from sqlalchemy import inspect, text
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlmodel import SQLModel
+from app.models import Product, ProductChange
+from app.models.products.product_stats import PRODUCT_STATS_STRIPES
+from app.migrations.runner import MigrationRunner
+from app.migrations.operations import Operations
+from app.errors.migration_errors import UnknownRevisionError
+
+@pytest_asyncio.fixture
+async def file_engine(tmp_path):
+    """
+    Empty SQLite file database, migrations need a real file to run across connections.
+    """
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'migrations.db'}")
+    yield engine
+    await engine.dispose()
+
+async def describe(engine):
+    def inspect_schema(conn):
+        inspector = inspect(conn)
+        tables = set(inspector.get_table_names())
+        columns = {table: {c["name"] for c in inspector.get_columns(table)} for table in tables}
+        indexes = {i["name"] for table in tables for i in inspector.get_indexes(table)}
+        return tables, columns, indexes
+
+    async with engine.connect() as conn:
+        return await conn.run_sync(inspect_schema)
+
+class TestMigrationRunner:
+    """Test suite for the versioned migrations runner."""
+
+    @pytest.mark.asyncio
+    async def test_upgrade_to_head_matches_models(self, file_engine):
+        """Test that migrating an empty database produces the schema the models expect."""
+        # Arrange
+        runner = MigrationRunner(file_engine)
+
+        # Act
+        applied = await runner.upgrade()
+        tables, columns, indexes = await describe(file_engine)
+
+        # Assert
+        assert applied == [m.revision for m in runner.migrations]
+        assert await runner.current() == runner.head
+        assert columns["product"] == {c.name for c in Product.__table__.columns}
+        assert columns["productchange"] == {c.name for c in ProductChange.__table__.columns}
+        assert {i.name for i in Product.__table__.indexes} <= indexes
+        assert "ix_product_name" not in indexes
+
+    @pytest.mark.asyncio
+    async def test_upgrade_is_idempotent(self, file_engine):
+        """Test that a second upgrade has nothing to apply."""
+        # Arrange
+        runner = MigrationRunner(file_engine)
+        await runner.upgrade()
+
+        # Act & Assert
+        assert await runner.upgrade() == []
+
+    @pytest.mark.asyncio
+    async def test_downgrade_to_base_and_back(self, file_engine):
+        """Test that every migration can be reverted and applied again."""
+        # Arrange
+        runner = MigrationRunner(file_engine)
+        await runner.upgrade()
+
+        # Act
+        reverted = await runner.downgrade("base")
+        tables, _, _ = await describe(file_engine)
+        reapplied = await runner.upgrade()
+
+        # Assert
+        assert reverted == [m.revision for m in reversed(runner.migrations)]
+        assert "product" not in tables
+        assert await runner.current() == runner.head
+        assert len(reapplied) == len(runner.migrations)
+
+    @pytest.mark.asyncio
+    async def test_partial_upgrade_and_downgrade(self, file_engine):
+        """Test upgrading to and downgrading from a given revision."""
+        # Arrange
+        runner = MigrationRunner(file_engine)
+
+        # Act
+        await runner.upgrade("0002")
+        _, columns, _ = await describe(file_engine)
+        await runner.upgrade()
+        await runner.downgrade("0003")
+
+        # Assert
+        assert "deleted_at" not in columns["product"]
+        assert await runner.current() == "0003"
+
+    @pytest.mark.asyncio
+    async def test_unknown_revision_is_rejected(self, file_engine):
+        """Test that a mistyped target fails instead of migrating to head or base."""
+        # Arrange
+        runner = MigrationRunner(file_engine)
+        await runner.upgrade("0002")
+
+        # Act & Assert
+        with pytest.raises(UnknownRevisionError):
+            await runner.upgrade("0099")
+        with pytest.raises(UnknownRevisionError):
+            await runner.downgrade("bsae")
+        assert await runner.current() == "0002"
+
+    @pytest.mark.asyncio
+    async def test_upgrade_adopts_database_created_with_create_all(self, file_engine):
+        """Test that databases created by create_all can be brought under migrations."""
+        # Arrange
+        async with file_engine.begin() as conn:
+            await conn.run_sync(SQLModel.metadata.create_all)
+        runner = MigrationRunner(file_engine)
+
+        # Act
+        await runner.upgrade()
+
+        # Assert
+        assert await runner.current() == runner.head
+
+    @pytest.mark.asyncio
+    async def test_stats_table_is_seeded_from_existing_products(self, file_engine):
+        """Test that the stats migration summarizes the products that already exist."""
+        # Arrange
+        runner = MigrationRunner(file_engine)
+        await runner.upgrade("0005")
+        async with file_engine.begin() as conn:
+            await conn.execute(text(
+                "INSERT INTO product (name, price, available, created_at, updated_at, version, deleted_at) VALUES "
+                "('A', 10, 1, '2025-01-01', '2025-01-01', 1, NULL), "
+                "('B', 20, 0, '2025-01-01', '2025-01-01', 1, NULL), "
+                "('C', 99, 1, '2025-01-01', '2025-01-01', 1, '2025-01-02')"
+            ))
+
+        # Act
+        await runner.upgrade()
+
+        # Assert
+        async with file_engine.connect() as conn:
+            row = (await conn.execute(text("SELECT SUM(total_count), SUM(available_count), SUM(price_sum) FROM productstats"))).one()
+        assert tuple(row) == (2, 1, 30.0)
+
+    @pytest.mark.asyncio
+    async def test_stats_stripes_keep_the_totals_both_ways(self, file_engine):
+        """Test that striping the counters and folding them back preserves the summary."""
+        # Arrange
+        runner = MigrationRunner(file_engine)
+        await runner.upgrade("0007")
+        async with file_engine.begin() as conn:
+            await conn.execute(text("UPDATE productstats SET total_count = 5, available_count = 2, price_sum = 50"))
+        summary = text("SELECT COUNT(*), SUM(total_count), SUM(available_count), SUM(price_sum) FROM productstats")
+
+        # Act
+        await runner.upgrade()
+        async with file_engine.begin() as conn:
+            striped = (await conn.execute(summary)).one()
+            await conn.execute(text("UPDATE productstats SET total_count = total_count + 1, price_sum = price_sum + 10 WHERE id = 7"))
+        await runner.downgrade("0007")
+        async with file_engine.connect() as conn:
+            folded = (await conn.execute(summary)).one()
+
+        # Assert
+        assert tuple(striped) == (PRODUCT_STATS_STRIPES, 5, 2, 50.0)
+        assert tuple(folded) == (1, 6, 2, 60.0)
+
+    def test_stats_stripes_match_the_model(self):
+        """Test that the frozen stripe count of the migration is the one the model writes to."""
+        # Arrange
+        migration = importlib.import_module("app.migrations.versions.0008_product_stats_stripes")
+
+        # Assert
+        assert migration.STRIPES == PRODUCT_STATS_STRIPES
+
+    @pytest.mark.asyncio
+    async def test_backfill_updates_in_batches(self, file_engine):
+        """Test that backfill touches every matching row across several batches."""
+        # Arrange
+        await MigrationRunner(file_engine).upgrade()
+        async with file_engine.connect() as conn:
+            conn = await conn.execution_options(isolation_level="AUTOCOMMIT")
+            op = Operations(conn)
+            for i in range(5):
+                await op.execute(
+                    "INSERT INTO product (name, price, available, version) VALUES (:name, 1, 1, 1)",
+                    {"name": f"Product {i}"},
+                )
+
+            # Act
+            updated = await op.backfill("product", "price = 2", "price = 1", batch_size=2)
+            result = await op.execute("SELECT COUNT(*) FROM product WHERE price = 2")
+
+        # Assert
+        assert updated == 5
+        assert result.scalar() == 5
@@ -0,0 +1,93 @@
+import asyncio
+import pytest
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+from app.core.broker import product_broker
+from app.core.cache import product_cache
+from app.core.config import settings
+from app.services.change_fanout_service import ChangeFanout, run_change_fanout
+from app.services.product_service import ProductService
+from app.schemas.product import ProductCreate, ProductUpdate
+
+class TestChangeFanout:
+    """Test suite for feeding a worker's streams and cache from the outbox written by every worker."""
+
+    @pytest.mark.asyncio
+    async def test_changes_committed_elsewhere_reach_local_subscribers(self, test_engine, monkeypatch):
+        """Test that writes never publish directly and the outbox delivers them in seq order."""
+        # Arrange
+        monkeypatch.setattr(settings, "CHANGE_FANOUT_FROM_OUTBOX", True)
+        session_factory = async_sessionmaker(test_engine, class_=AsyncSession, expire_on_commit=False)
+        fanout = ChangeFanout(lambda: session_factory)
+        await fanout.poll()
+        subscription = product_broker.subscribe()
+
+        # Act
+        async with session_factory() as session:
+            # Another worker's write: this process only learns about it from the outbox
+            service = ProductService(session)
+            product = await service.create_product(ProductCreate(name="Elsewhere", price=1.0))
+            await service.update_product(product.id, ProductUpdate(price=2.0))
+        published_by_writer = subscription.queue.qsize()
+        delivered = await fanout.poll()
+        events = [await subscription.get(1), await subscription.get(1)]
+        product_broker.unsubscribe(subscription)
+
+        # Assert
+        assert published_by_writer == 0
+        assert delivered == 2
+        assert [event["operation"] for event in events] == ["created", "updated"]
+        assert events[0]["seq"] < events[1]["seq"] == fanout.cursor[0]
+        assert "shard" not in events[0]
+
+    @pytest.mark.asyncio
+    async def test_fanout_invalidates_the_cache_and_starts_at_the_current_position(self, test_engine, monkeypatch):
+        """Test that older changes are left to the stream backlog and new ones evict cached products."""
+        # Arrange
+        monkeypatch.setattr(settings, "CHANGE_FANOUT_FROM_OUTBOX", True)
+        session_factory = async_sessionmaker(test_engine, class_=AsyncSession, expire_on_commit=False)
+        async with session_factory() as session:
+            product = await ProductService(session).create_product(ProductCreate(name="Cached", price=1.0))
+        fanout = ChangeFanout(lambda: session_factory)
+
+        # Act
+        skipped = await fanout.poll()
+        product_cache.set(product.id, {"id": product.id, "version": 1})
+        async with session_factory() as session:
+            await ProductService(session).delete_product(product.id)
+        # The writer already evicted it, a copy cached by this worker in the meantime must go as well
+        product_cache.set(product.id, {"id": product.id, "version": 1})
+        delivered = await fanout.poll()
+
+        # Assert
+        assert skipped == 0
+        assert delivered == 1
+        assert product_cache.get(product.id) is None
+
+    @pytest.mark.asyncio
+    async def test_background_loop_keeps_running_after_a_failure(self, test_engine, monkeypatch):
+        """Test that an unreachable database is retried on the next interval."""
+        # Arrange
+        monkeypatch.setattr(settings, "CHANGE_FANOUT_FROM_OUTBOX", True)
+        session_factory = async_sessionmaker(test_engine, class_=AsyncSession, expire_on_commit=False)
+        calls = []
+
+        def get_session_factory():
+            calls.append(1)
+            if len(calls) == 1:
+                raise ConnectionError("database unreachable")
+            return session_factory
+
+        subscription = product_broker.subscribe()
+        task = asyncio.create_task(run_change_fanout(get_session_factory, interval_seconds=0.01))
+        while len(calls) < 3:
+            await asyncio.sleep(0.01)
+
+        # Act
+        async with session_factory() as session:
+            await ProductService(session).create_product(ProductCreate(name="After Failure", price=1.0))
+        event = await subscription.get(2)
+        task.cancel()
+        product_broker.unsubscribe(subscription)
+
+        # Assert
+        assert event["operation"] == "created"
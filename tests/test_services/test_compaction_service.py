@@ -0,0 +1,143 @@
+import pytest
+from sqlmodel import select
+from app.services.product_service import ProductService
+from app.services.compaction_service import CompactionService
+from app.models.products.product import Product
+from app.models.products.product_change import ProductChange, ProductChangeRetention
+from app.schemas.product import ProductCreate
+from app.errors.product_errors import ProductNotFoundError, ChangeCursorExpiredError
+
+class TestSoftDelete:
+    """Test suite for soft deletes in ProductService."""
+
+    @pytest.mark.asyncio
+    async def test_delete_marks_row_instead_of_removing_it(self, test_session, sample_product_data):
+        """Test that delete only sets deleted_at."""
+        # Arrange
+        service = ProductService(test_session)
+        product = await service.create_product(ProductCreate(**sample_product_data))
+
+        # Act
+        deleted_product = await service.delete_product(product.id)
+
+        # Assert
+        assert deleted_product.deleted_at is not None
+        result = await test_session.execute(select(Product).where(Product.id == product.id))
+        assert result.scalar_one().deleted_at is not None
+
+    @pytest.mark.asyncio
+    async def test_deleted_products_are_hidden_from_reads(self, test_session, sample_product_data):
+        """Test that list, get and a second delete ignore soft deleted rows."""
+        # Arrange
+        service = ProductService(test_session)
+        product = await service.create_product(ProductCreate(**sample_product_data))
+        await service.create_product(ProductCreate(name="Kept Product", price=1.0))
+
+        # Act
+        await service.delete_product(product.id)
+
+        # Assert
+        assert [p.name for p in await service.get_all_products()] == ["Kept Product"]
+        with pytest.raises(ProductNotFoundError):
+            await service.get_product_by_id(product.id)
+        with pytest.raises(ProductNotFoundError):
+            await service.delete_product(product.id)
+
+    @pytest.mark.asyncio
+    async def test_name_can_be_reused_after_delete(self, test_session, sample_product_data):
+        """Test that tombstones do not count for the duplicate name rule."""
+        # Arrange
+        service = ProductService(test_session)
+        product = await service.create_product(ProductCreate(**sample_product_data))
+        await service.delete_product(product.id)
+
+        # Act
+        recreated = await service.create_product(ProductCreate(**sample_product_data))
+
+        # Assert
+        assert recreated.id != product.id
+
+class TestCompactionService:
+    """Test suite for the background tombstone compaction."""
+
+    @pytest.mark.asyncio
+    async def test_compact_purges_tombstones_in_batches(self, test_session):
+        """Test that every expired tombstone is purged across several batches."""
+        # Arrange
+        service = ProductService(test_session)
+        for i in range(5):
+            product = await service.create_product(ProductCreate(name=f"Product {i}", price=1.0))
+            await service.delete_product(product.id)
+        await service.create_product(ProductCreate(name="Live Product", price=1.0))
+
+        # Act
+        purged = await CompactionService(test_session).compact(retention_seconds=0, batch_size=2, pause_seconds=0)
+
+        # Assert
+        assert purged == 5
+        result = await test_session.execute(select(Product))
+        assert [p.name for p in result.scalars().all()] == ["Live Product"]
+
+    @pytest.mark.asyncio
+    async def test_compact_keeps_recent_tombstones(self, test_session, sample_product_data):
+        """Test that tombstones inside the retention window are kept."""
+        # Arrange
+        service = ProductService(test_session)
+        product = await service.create_product(ProductCreate(**sample_product_data))
+        await service.delete_product(product.id)
+
+        # Act
+        purged = await CompactionService(test_session).compact(retention_seconds=3600, batch_size=10, pause_seconds=0)
+
+        # Assert
+        assert purged == 0
+
+class TestChangeRetention:
+    """Test suite for pruning the change feed past its retention."""
+
+    @pytest.mark.asyncio
+    async def test_compact_changes_prunes_oldest_first_and_records_the_last_seq(self, test_session):
+        """Test that old changes are deleted in batches from the lowest seq and pruned_seq follows."""
+        # Arrange
+        service = ProductService(test_session)
+        for i in range(5):
+            await service.create_product(ProductCreate(name=f"Product {i}", price=1.0))
+        seqs = [change.seq for change in await service.get_changes()]
+
+        # Act
+        pruned = await CompactionService(test_session).compact_changes(retention_seconds=0, batch_size=2, max_batches=2, pause_seconds=0)
+
+        # Assert
+        assert pruned == 4
+        result = await test_session.execute(select(ProductChange.seq))
+        assert result.scalars().all() == seqs[4:]
+        assert (await test_session.get(ProductChangeRetention, 1)).pruned_seq == seqs[3]
+
+    @pytest.mark.asyncio
+    async def test_compact_changes_keeps_recent_changes(self, test_session, sample_product_data):
+        """Test that changes inside the retention window are kept."""
+        # Arrange
+        await ProductService(test_session).create_product(ProductCreate(**sample_product_data))
+
+        # Act
+        pruned = await CompactionService(test_session).compact_changes(retention_seconds=3600, batch_size=10, pause_seconds=0)
+
+        # Assert
+        assert pruned == 0
+        assert (await test_session.get(ProductChangeRetention, 1)).pruned_seq == 0
+
+    @pytest.mark.asyncio
+    async def test_cursor_below_pruned_seq_is_rejected(self, test_session):
+        """Test that reading after a pruned change fails, while the last pruned seq or 0 still reads."""
+        # Arrange
+        service = ProductService(test_session)
+        for i in range(3):
+            await service.create_product(ProductCreate(name=f"Product {i}", price=1.0))
+        seqs = [change.seq for change in await service.get_changes()]
+        await CompactionService(test_session).compact_changes(retention_seconds=0, batch_size=2, max_batches=1)
+
+        # Act & Assert
+        with pytest.raises(ChangeCursorExpiredError):
+            await service.get_changes(since=seqs[0])
+        assert [change.seq for change in await service.get_changes(since=seqs[1])] == seqs[2:]
+        assert [change.seq for change in await service.get_changes(since=0)] == seqs[2:]
@@ -0,0 +1,150 @@
+import asyncio
+import importlib
+import re
+import pytest
+import time
+from sqlalchemy import text
+from app.services.product_service import ProductService, CHANGE_HORIZON
+from app.models.products import product_change
+from app.models.products.product_change import ChangeOperation
+from app.schemas.product import ProductCreate, ProductUpdate
+
+class TestProductChangeFeed:
+    """Test suite for the transactional outbox written by ProductService."""
+
+    @pytest.mark.asyncio
+    async def test_create_update_delete_write_change_records(self, test_session, sample_product_data):
+        """Test that every mutation writes one change record in order."""
+        # Arrange
+        service = ProductService(test_session)
+
+        # Act
+        product = await service.create_product(ProductCreate(**sample_product_data))
+        await service.update_product(product.id, ProductUpdate(price=10.0))
+        await service.delete_product(product.id)
+        changes = await service.get_changes()
+
+        # Assert
+        assert [c.operation for c in changes] == [
+            ChangeOperation.CREATED,
+            ChangeOperation.UPDATED,
+            ChangeOperation.DELETED,
+        ]
+        assert all(c.product_id == product.id for c in changes)
+        assert changes[0].seq < changes[1].seq < changes[2].seq
+        assert changes[1].payload["price"] == 10.0
+
+    @pytest.mark.asyncio
+    async def test_get_changes_since_returns_only_newer_changes(self, test_session, sample_product_data):
+        """Test that `since` acts as an exclusive cursor."""
+        # Arrange
+        service = ProductService(test_session)
+        await service.create_product(ProductCreate(**sample_product_data))
+        first_page = await service.get_changes()
+        await service.create_product(ProductCreate(name="Second Product", price=5.0))
+
+        # Act
+        changes = await service.get_changes(since=first_page[-1].seq)
+
+        # Assert
+        assert len(changes) == 1
+        assert changes[0].payload["name"] == "Second Product"
+
+    @pytest.mark.asyncio
+    async def test_failed_mutation_does_not_write_change(self, test_session, sample_product_data):
+        """Test that a rejected create leaves no change record behind."""
+        # Arrange
+        service = ProductService(test_session)
+        await service.create_product(ProductCreate(**sample_product_data))
+
+        # Act
+        with pytest.raises(Exception):
+            await service.create_product(ProductCreate(**sample_product_data))
+        changes = await service.get_changes()
+
+        # Assert
+        assert len(changes) == 1
+
+    @pytest.mark.asyncio
+    async def test_wait_for_changes_times_out_with_empty_result(self, test_session):
+        """Test that long polling returns an empty list once the timeout expires."""
+        # Arrange
+        service = ProductService(test_session)
+        started = time.monotonic()
+
+        # Act
+        changes = await service.wait_for_changes(since=0, timeout=0.2)
+
+        # Assert
+        assert changes == []
+        assert time.monotonic() - started >= 0.2
+
+    @pytest.mark.asyncio
+    async def test_changes_stop_below_the_commit_horizon(self, test_session, monkeypatch):
+        """Test that a seq still held by an open transaction hides it and every later change."""
+        # Arrange
+        service = ProductService(test_session)
+        for i in range(3):
+            await service.create_product(ProductCreate(name=f"Horizon Product {i}", price=1.0 + i))
+        seqs = [change.seq for change in await service.get_changes()]
+
+        async def in_flight_horizon(self):
+            return seqs[1]
+
+        monkeypatch.setattr(ProductService, "_change_horizon", in_flight_horizon)
+
+        # Act
+        before_commit = await service.get_changes()
+        monkeypatch.undo()
+        after_commit = await service.get_changes(since=before_commit[-1].seq)
+
+        # Assert
+        assert [change.seq for change in before_commit] == seqs[:1]
+        assert [change.seq for change in after_commit] == seqs[1:]
+
+class TestChangeHorizon:
+    """Test suite for the PostgreSQL commit horizon functions (migration 0007)."""
+
+    # pg_advisory_lock / pg_advisory_unlock and their _shared variants outlive a cancelled statement
+    SESSION_LOCK = re.compile(r"pg_advisory_(un)?lock(_shared)?\(")
+
+    def test_functions_only_take_transaction_locks(self):
+        """Test that neither the migration nor the create_all copy holds a session level advisory lock."""
+        # Arrange
+        horizon = importlib.import_module("app.migrations.versions.0007_product_change_horizon")
+        functions = [
+            horizon.NEXT_CHANGE_SEQ,
+            horizon.CHANGE_HORIZON,
+            product_change.NEXT_CHANGE_SEQ.statement,
+            product_change.CHANGE_HORIZON.statement,
+        ]
+
+        # Assert
+        assert all(not self.SESSION_LOCK.search(function) for function in functions)
+        assert "pg_advisory_xact_lock(7261, allocated)" in horizon.NEXT_CHANGE_SEQ
+
+    @pytest.mark.asyncio
+    async def test_cancelled_horizon_leaves_no_lock_behind(self, test_engine):
+        """Test that change_horizon() cancelled mid-call holds nothing and the next call returns."""
+        if test_engine.dialect.name != "postgresql":
+            pytest.skip("the commit horizon only exists on PostgreSQL (TEST_DATABASE_URL)")
+
+        async with test_engine.connect() as writer, test_engine.connect() as observer:
+            # Arrange: a writer between nextval and its seq lock keeps the horizon looking again
+            await writer.execute(text("SELECT pg_advisory_xact_lock(7260, pg_backend_pid())"))
+            writer_pid = (await writer.execute(text("SELECT pg_backend_pid()"))).scalar()
+
+            # Act
+            async with test_engine.connect() as reader:
+                with pytest.raises(asyncio.TimeoutError):
+                    await asyncio.wait_for(reader.execute(CHANGE_HORIZON), timeout=0.2)
+            leftover = (await observer.execute(
+                text("SELECT count(*) FROM pg_locks WHERE locktype = 'advisory' AND pid <> :writer"),
+                {"writer": writer_pid},
+            )).scalar()
+            await writer.rollback()
+            horizon = (await asyncio.wait_for(observer.execute(CHANGE_HORIZON), timeout=5)).scalar()
+
+        # Assert
+        assert leftover == 0
+        assert horizon == 1
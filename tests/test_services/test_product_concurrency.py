@@ -0,0 +1,89 @@
+import pytest
+from sqlalchemy import text
+from app.services.product_service import ProductService
+from app.schemas.product import ProductCreate, ProductUpdate
+from app.errors.product_errors import ProductNotFoundError, ProductVersionConflictError
+
+class TestProductOptimisticConcurrency:
+    """Test suite for version checks on product updates."""
+
+    @pytest.mark.asyncio
+    async def test_update_increments_version(self, test_session, sample_product_data):
+        """Test that each write bumps the version."""
+        # Arrange
+        service = ProductService(test_session)
+        product = await service.create_product(ProductCreate(**sample_product_data))
+
+        # Act
+        updated = await service.update_product(product.id, ProductUpdate(price=1.0), expected_version=1)
+
+        # Assert
+        assert updated.version == 2
+        assert updated.price == 1.0
+
+    @pytest.mark.asyncio
+    async def test_update_with_stale_expected_version_raises(self, test_session, sample_product_data):
+        """Test that an If-Match style version mismatch is rejected."""
+        # Arrange
+        service = ProductService(test_session)
+        product = await service.create_product(ProductCreate(**sample_product_data))
+        await service.update_product(product.id, ProductUpdate(price=1.0))
+
+        # Act & Assert
+        with pytest.raises(ProductVersionConflictError):
+            await service.update_product(product.id, ProductUpdate(price=2.0), expected_version=1)
+
+    def write_after_read(self, monkeypatch, test_session, sql):
+        """
+        Run `sql` once right after update_product has read the product, before its conditional UPDATE.
+        """
+        get_live_product = ProductService._get_live_product
+        pending = [sql]
+
+        async def read_then_write(service, product_id):
+            product = await get_live_product(service, product_id)
+            if pending:
+                await test_session.execute(text(pending.pop()), {"id": product_id})
+            return product
+
+        monkeypatch.setattr(ProductService, "_get_live_product", read_then_write)
+
+    @pytest.mark.asyncio
+    async def test_concurrent_write_between_read_and_update_is_detected(self, test_session, sample_product_data, monkeypatch):
+        """Test that the conditional UPDATE catches a write that happened after an If-Match read."""
+        # Arrange
+        service = ProductService(test_session)
+        product = await service.create_product(ProductCreate(**sample_product_data))
+        self.write_after_read(monkeypatch, test_session, "UPDATE product SET price = 5, version = version + 1 WHERE id = :id")
+
+        # Act & Assert
+        with pytest.raises(ProductVersionConflictError):
+            await service.update_product(product.id, ProductUpdate(price=2.0), expected_version=1)
+
+    @pytest.mark.asyncio
+    async def test_lost_race_without_if_match_is_retried(self, test_session, sample_product_data, monkeypatch):
+        """Test that an unconditional PATCH re-reads the product and applies on top of the other write."""
+        # Arrange
+        service = ProductService(test_session)
+        product = await service.create_product(ProductCreate(**sample_product_data))
+        self.write_after_read(monkeypatch, test_session, "UPDATE product SET price = 5, version = version + 1 WHERE id = :id")
+
+        # Act
+        updated = await service.update_product(product.id, ProductUpdate(available=False))
+
+        # Assert
+        assert updated.version == 3
+        assert updated.price == 5
+        assert updated.available is False
+
+    @pytest.mark.asyncio
+    async def test_delete_between_read_and_update_is_not_found(self, test_session, sample_product_data, monkeypatch):
+        """Test that a product soft deleted after the read is reported missing, not conflicting."""
+        # Arrange
+        service = ProductService(test_session)
+        product = await service.create_product(ProductCreate(**sample_product_data))
+        self.write_after_read(monkeypatch, test_session, "UPDATE product SET deleted_at = CURRENT_TIMESTAMP, version = version + 1 WHERE id = :id")
+
+        # Act & Assert
+        with pytest.raises(ProductNotFoundError):
+            await service.update_product(product.id, ProductUpdate(price=2.0))
@@ -2,9 +2,10 @@ import pytest
 from sqlmodel import select
 from app.services.product_service import ProductService
 from app.models.products.product import Product
-from app.schemas.product import ProductCreate, ProductUpdate
+from app.schemas.product import ProductCreate, ProductResponse, ProductUpdate
 from app.errors.product_errors import ProductNotFoundError, DuplicateProductNameError, NoFieldsToUpdateError
 import asyncio
+import json
 
 class TestProductService:
     """Test suite for ProductService class covering all business logic methods."""
@@ -41,9 +42,24 @@ class TestProductService:
         # Act & Assert - Try to create second product with same name
         with pytest.raises(DuplicateProductNameError) as exc_info:
             await service.create_product(product_data)
-        
+
         assert f"Product with name {sample_product_data['name']} already exists" in str(exc_info.value)
 
+    @pytest.mark.asyncio
+    async def test_prebuilt_name_lookup_binds_each_call(self, test_session, sample_product_data):
+        """Test that the shared name lookup statement checks the name of every call, not the first one."""
+        # Arrange
+        service = ProductService(test_session)
+        await service.create_product(ProductCreate(**sample_product_data))
+
+        # Act
+        other = await service.create_product(ProductCreate(**{**sample_product_data, "name": "Another Product"}))
+
+        # Assert
+        assert other.name == "Another Product"
+        with pytest.raises(DuplicateProductNameError):
+            await service.create_product(ProductCreate(**{**sample_product_data, "name": "Another Product"}))
+
     @pytest.mark.asyncio
     async def test_get_all_products_empty(self, test_session):
         """Test getting all products when database is empty."""
@@ -102,6 +118,37 @@ class TestProductService:
         assert retrieved_product.price == created_product.price
         assert retrieved_product.available == created_product.available
 
+    @pytest.mark.asyncio
+    async def test_get_products_with_fields_returns_pruned_rows(self, test_session, sample_product_data):
+        """Test that a sparse fieldset selects only the requested columns (plus the id)."""
+        # Arrange
+        service = ProductService(test_session)
+        created_product = await service.create_product(ProductCreate(**sample_product_data))
+
+        # Act
+        rows = await service.get_all_products(["price"])
+        row = await service.get_product_by_id(created_product.id, ["available"])
+
+        # Assert
+        assert [tuple(r) for r in rows] == [(created_product.id, sample_product_data["price"])]
+        assert row._fields == ("id", "available")
+        assert not isinstance(row, Product)
+
+    @pytest.mark.asyncio
+    async def test_get_all_products_json_matches_orm_serialization(self, test_session, sample_product_data):
+        """Test that the Core fast path serializes exactly like ProductResponse, without deleted products."""
+        # Arrange
+        service = ProductService(test_session)
+        first = await service.create_product(ProductCreate(**sample_product_data))
+        deleted = await service.create_product(ProductCreate(name="Deleted Product", price=5.0))
+        await service.delete_product(deleted.id)
+
+        # Act
+        result = json.loads(await service.get_all_products_json())
+
+        # Assert
+        assert result == [ProductResponse.model_validate(first).model_dump(mode="json")]
+
     @pytest.mark.asyncio
     async def test_get_product_by_id_not_found(self, test_session):
         """Test that getting non-existent product raises ProductNotFoundError."""
@@ -0,0 +1,116 @@
+import pytest
+from sqlalchemy import delete, event, func, text
+from sqlmodel import select
+from app.models.products.product_stats import PRODUCT_STATS_STRIPES, ProductStats, stats_stripe
+from app.services.product_service import ProductService
+from app.schemas.product import ProductCreate, ProductUpdate
+
+class TestProductStats:
+    """Test suite for the incrementally maintained catalog stats."""
+
+    @pytest.mark.asyncio
+    async def test_stats_of_empty_catalog(self, test_session):
+        """Test that an empty catalog has zero counts and no prices."""
+        # Arrange
+        service = ProductService(test_session)
+
+        # Act
+        stats = await service.get_stats()
+
+        # Assert
+        assert stats["total_count"] == 0
+        assert stats["available_count"] == 0
+        assert stats["average_price"] is None
+        assert stats["min_price"] is None
+
+    @pytest.mark.asyncio
+    async def test_writes_keep_the_summary_row_up_to_date(self, test_session):
+        """Test that create, update and delete adjust the counters in the same transaction."""
+        # Arrange
+        service = ProductService(test_session)
+        first = await service.create_product(ProductCreate(name="First", price=10.0, available=True))
+        second = await service.create_product(ProductCreate(name="Second", price=20.0, available=False))
+        third = await service.create_product(ProductCreate(name="Third", price=60.0, available=True))
+
+        # Act
+        await service.update_product(second.id, ProductUpdate(price=30.0, available=True))
+        await service.delete_product(third.id)
+        stats = await service.get_stats()
+
+        # Assert
+        assert stats == {
+            "total_count": 2,
+            "available_count": 2,
+            "price_sum": 40.0,
+            "average_price": 20.0,
+            "min_price": 10.0,
+            "max_price": 30.0,
+        }
+        summary = (await test_session.execute(select(func.sum(ProductStats.total_count), func.sum(ProductStats.price_sum)))).one()
+        assert tuple(summary) == (2, 40.0)
+
+    @pytest.mark.asyncio
+    async def test_stats_fall_back_to_aggregates_without_summary_row(self, test_session):
+        """Test that missing summary rows are replaced by a scan of the catalog."""
+        # Arrange
+        service = ProductService(test_session)
+        await service.create_product(ProductCreate(name="Only", price=5.0, available=False))
+        await test_session.execute(delete(ProductStats))
+        await test_session.commit()
+
+        # Act
+        stats = await service.get_stats()
+
+        # Assert
+        assert stats["total_count"] == 1
+        assert stats["available_count"] == 0
+        assert stats["average_price"] == 5.0
+
+    @pytest.mark.asyncio
+    async def test_writers_update_the_stripe_of_their_product(self, test_session):
+        """Test that consecutive products land on different counter rows that add up to the totals."""
+        # Arrange
+        service = ProductService(test_session)
+        products = [await service.create_product(ProductCreate(name=f"Striped {i}", price=1.0, available=True)) for i in range(3)]
+
+        # Act
+        rows = (await test_session.execute(select(ProductStats.id, ProductStats.total_count).where(ProductStats.total_count != 0))).all()
+
+        # Assert
+        assert len({stats_stripe(product.id) for product in products}) == 3
+        assert sorted(rows) == sorted((stats_stripe(product.id), 1) for product in products)
+        assert (await service.get_stats())["total_count"] == 3
+
+    @pytest.mark.asyncio
+    async def test_rename_does_not_touch_the_counters(self, test_session, test_engine):
+        """Test that an update leaving price and availability alone skips the stats UPDATE."""
+        # Arrange
+        service = ProductService(test_session)
+        product = await service.create_product(ProductCreate(name="Before", price=3.0, available=True))
+        statements = []
+        record = lambda conn, cursor, statement, *args: statements.append(statement)
+        event.listen(test_engine.sync_engine, "before_cursor_execute", record)
+
+        # Act
+        await service.update_product(product.id, ProductUpdate(name="After", price=3.0))
+        event.remove(test_engine.sync_engine, "before_cursor_execute", record)
+
+        # Assert
+        assert not any("productstats" in statement for statement in statements)
+        assert (await service.get_stats())["price_sum"] == 3.0
+
+    @pytest.mark.asyncio
+    async def test_rebuild_resets_every_stripe(self, test_session):
+        """Test that a rebuild puts the scanned totals back on the stripes."""
+        # Arrange
+        service = ProductService(test_session)
+        await service.create_product(ProductCreate(name="Kept", price=4.0, available=True))
+        await test_session.execute(text("UPDATE productstats SET total_count = 99"))
+        await test_session.commit()
+
+        # Act
+        await service.rebuild_stats()
+
+        # Assert
+        assert (await test_session.execute(select(func.count(ProductStats.id)))).scalar_one() == PRODUCT_STATS_STRIPES
+        assert (await service.get_stats())["total_count"] == 1
@@ -0,0 +1,241 @@
+import asyncio
+import pytest
+import pytest_asyncio
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from sqlmodel import SQLModel
+from app.api.handlers.product_handler import stream_product_changes_handler
+from sqlalchemy import event
+from app.core import sharding
+from app.core.broker import product_broker
+from app.core.config import settings
+from app.core.db import engine_options
+from app.core.pool import ShieldedCheckoutQueuePool
+from app.core.sharding import ShardRouter
+from app.core.statement_cache import statement_cache_stats
+from app.services.change_fanout_service import ChangeFanout
+from app.services.compaction_service import CompactionService, run_compaction
+from app.services.sharded_product_service import ShardedProductService
+from app.schemas.product import ProductCreate, ProductUpdate
+from app.errors.product_errors import DuplicateProductNameError, ProductNotFoundError
+
+@pytest_asyncio.fixture
+async def shard_router(tmp_path):
+    """
+    Two SQLite file databases acting as shards.
+    """
+    engines = [create_async_engine(f"sqlite+aiosqlite:///{tmp_path / f'shard_{i}.db'}") for i in range(2)]
+    for engine in engines:
+        async with engine.begin() as conn:
+            await conn.run_sync(SQLModel.metadata.create_all)
+
+    router = ShardRouter(engines)
+    yield router
+    await router.dispose()
+
+class TestShardRouter:
+    """Test suite for shard routing rules."""
+
+    def test_ids_map_back_to_the_shard_that_allocated_them(self):
+        """Test that next_id_for_shard and shard_for_id agree."""
+        # Arrange
+        router = ShardRouter([None, None, None])
+
+        # Act & Assert
+        for shard in range(3):
+            product_id = router.next_id_for_shard(shard, 10)
+            assert product_id > 10
+            assert router.shard_for_id(product_id) == shard
+
+    def test_shard_engines_share_the_default_engine_options(self, monkeypatch):
+        """Test that shard engines get the default engine's pool, timeouts and statement cache tracking."""
+        # Arrange
+        monkeypatch.setattr(sharding.settings, "SHARD_DATABASE_URIS", [f"postgresql+asyncpg://u:p@shard{i}/db" for i in range(2)])
+        monkeypatch.setattr(sharding, "_shard_router", None)
+        captured = []
+        monkeypatch.setattr(sharding, "create_async_engine", lambda uri, **options: captured.append(options) or create_async_engine(uri, **options))
+
+        # Act
+        router = sharding.get_shard_router()
+
+        # Assert
+        assert captured == [engine_options(), engine_options()]
+        assert all(isinstance(engine.pool, ShieldedCheckoutQueuePool) for engine in router.engines)
+        assert all(event.contains(engine.sync_engine, "after_cursor_execute", statement_cache_stats.record) for engine in router.engines)
+        for engine in router.engines:
+            statement_cache_stats.untrack(engine)
+
+class TestShardedProductService:
+    """Test suite for ShardedProductService across two databases."""
+
+    @pytest.mark.asyncio
+    async def test_products_are_spread_and_listed_from_every_shard(self, shard_router):
+        """Test that creates land on several shards and the list merges them in id order."""
+        # Arrange
+        service = ShardedProductService(shard_router)
+
+        # Act
+        created = [await service.create_product(ProductCreate(name=f"Product {i}", price=1.0)) for i in range(10)]
+        listed = await service.get_all_products()
+
+        # Assert
+        assert {shard_router.shard_for_id(p.id) for p in created} == {0, 1}
+        assert [p.id for p in listed] == sorted(p.id for p in created)
+        assert len({p.id for p in listed}) == 10
+
+    @pytest.mark.asyncio
+    async def test_get_update_delete_are_routed_by_id(self, shard_router):
+        """Test single product operations through the router."""
+        # Arrange
+        service = ShardedProductService(shard_router)
+        product = await service.create_product(ProductCreate(name="Routed Product", price=1.0))
+
+        # Act
+        fetched = await service.get_product_by_id(product.id)
+        updated = await service.update_product(product.id, ProductUpdate(price=2.0), expected_version=1)
+        await service.delete_product(product.id)
+
+        # Assert
+        assert fetched.name == "Routed Product"
+        assert updated.price == 2.0
+        with pytest.raises(ProductNotFoundError):
+            await service.get_product_by_id(product.id)
+
+    @pytest.mark.asyncio
+    async def test_batch_lookup_queries_each_shard_once(self, shard_router):
+        """Test that a batch lookup collects products from every shard."""
+        # Arrange
+        service = ShardedProductService(shard_router)
+        created = [await service.create_product(ProductCreate(name=f"Product {i}", price=1.0)) for i in range(4)]
+
+        # Act
+        found = await service.get_products_by_ids([p.id for p in created] + [999])
+
+        # Assert
+        assert sorted(p.id for p in found) == sorted(p.id for p in created)
+
+    @pytest.mark.asyncio
+    async def test_stats_are_combined_across_shards(self, shard_router):
+        """Test that per-shard summaries add up to the catalog stats."""
+        # Arrange
+        service = ShardedProductService(shard_router)
+        for i in range(6):
+            await service.create_product(ProductCreate(name=f"Product {i}", price=float(i + 1), available=i % 2 == 0))
+
+        # Act
+        stats = await service.get_stats()
+
+        # Assert
+        assert stats["total_count"] == 6
+        assert stats["available_count"] == 3
+        assert stats["average_price"] == 3.5
+        assert (stats["min_price"], stats["max_price"]) == (1.0, 6.0)
+
+    @pytest.mark.asyncio
+    async def test_names_are_unique_across_shards(self, shard_router):
+        """Test that a rename can't collide with a product living on another shard."""
+        # Arrange
+        service = ShardedProductService(shard_router)
+        products = [await service.create_product(ProductCreate(name=f"Product {i}", price=1.0)) for i in range(6)]
+        first = products[0]
+        other = next(p for p in products if shard_router.shard_for_id(p.id) != shard_router.shard_for_id(first.id))
+
+        # Act & Assert
+        with pytest.raises(DuplicateProductNameError):
+            await service.create_product(ProductCreate(name=other.name, price=1.0))
+        with pytest.raises(DuplicateProductNameError):
+            await service.update_product(first.id, ProductUpdate(name=other.name))
+
+class TestShardedChangeFeed:
+    """Test suite for the change feed, SSE replay and compaction in sharded mode."""
+
+    @pytest.mark.asyncio
+    async def test_change_pages_follow_one_cursor_per_shard(self, shard_router):
+        """Test that changes of every shard are returned once, each shard from its own position."""
+        # Arrange
+        service = ShardedProductService(shard_router)
+        created = [await service.create_product(ProductCreate(name=f"Product {i}", price=1.0)) for i in range(6)]
+
+        # Act
+        first_page = await service.get_change_page([0, 0], 4)
+        cursor = [0, 0]
+        for shard, change in first_page:
+            cursor[shard] = change.seq
+        second_page = await service.get_change_page(cursor, 4)
+        for shard, change in second_page:
+            cursor[shard] = change.seq
+        empty = await service.get_change_page(cursor, 4)
+
+        # Assert
+        pages = first_page + second_page
+        assert sorted(change.product_id for _, change in pages) == sorted(p.id for p in created)
+        assert all(shard_router.shard_for_id(change.product_id) == shard for shard, change in pages)
+        assert empty == []
+
+    @pytest.mark.asyncio
+    async def test_changes_endpoint_and_stream_replay_read_every_shard(self, shard_router, client, test_session, monkeypatch):
+        """Test that /changes and the SSE backlog go through the shards and hand out per-shard cursors."""
+        # Arrange
+        monkeypatch.setattr("app.services.sharded_product_service.get_shard_router", lambda: shard_router)
+        service = ShardedProductService(shard_router)
+        created = [await service.create_product(ProductCreate(name=f"Product {i}", price=1.0)) for i in range(10)]
+        per_shard = [sum(shard_router.shard_for_id(p.id) == shard for p in created) for shard in range(2)]
+
+        # Act
+        page = (await client.get("/api/v1/products/changes")).json()
+        mismatched = await client.get("/api/v1/products/changes", params={"since": "1.2.3"})
+        stream = await stream_product_changes_handler(None, "0.0", test_session)
+        try:
+            first_event = await stream.body_iterator.__anext__()
+        finally:
+            await stream.body_iterator.aclose()
+
+        # Assert
+        assert sorted(change["product_id"] for change in page["changes"]) == sorted(p.id for p in created)
+        # Every shard's outbox counts from 1, the cursor is at the last seq of each
+        assert page["last_seq"] == f"{per_shard[0]}.{per_shard[1]}"
+        assert mismatched.status_code == 400
+        assert first_event.startswith("id: ")
+        assert first_event.splitlines()[0].count(".") == 1
+
+    @pytest.mark.asyncio
+    async def test_outbox_fanout_follows_every_shard(self, shard_router, test_engine, monkeypatch):
+        """Test that the fan-out publishes each shard's changes with their shard and per-shard cursor."""
+        # Arrange
+        monkeypatch.setattr("app.services.sharded_product_service.get_shard_router", lambda: shard_router)
+        monkeypatch.setattr(settings, "CHANGE_FANOUT_FROM_OUTBOX", True)
+        fanout = ChangeFanout(lambda: async_sessionmaker(test_engine, class_=AsyncSession))
+        await fanout.poll()
+        subscription = product_broker.subscribe()
+        service = ShardedProductService(shard_router)
+        created = [await service.create_product(ProductCreate(name=f"Product {i}", price=1.0)) for i in range(4)]
+
+        # Act
+        delivered = await fanout.poll()
+        events = [await subscription.get(1) for _ in range(delivered)]
+        product_broker.unsubscribe(subscription)
+
+        # Assert
+        assert sorted(event["product_id"] for event in events) == sorted(p.id for p in created)
+        assert all(shard_router.shard_for_id(event["product_id"]) == event["shard"] for event in events)
+        assert fanout.cursor == [sum(event["shard"] == shard for event in events) for shard in range(2)]
+
+    @pytest.mark.asyncio
+    async def test_compaction_visits_every_shard(self, shard_router, monkeypatch):
+        """Test that the background compaction purges tombstones on each shard."""
+        # Arrange
+        visited = []
+
+        async def record_compaction(self, *args, **kwargs):
+            visited.append(str(self.session.bind.url))
+            return 0
+
+        monkeypatch.setattr(CompactionService, "compact", record_compaction)
+
+        # Act
+        task = asyncio.create_task(run_compaction(lambda: shard_router.session_factories, interval_seconds=0))
+        while len(visited) < 2:
+            await asyncio.sleep(0.01)
+        task.cancel()
+
+        # Assert
+        assert visited[:2] == [str(engine.url) for engine in shard_router.engines]